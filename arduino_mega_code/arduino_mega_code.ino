@@ -7,6 +7,39 @@ const int SERVO_PIN = 2;
 Servo gripperServo;
 const int FSR_PINS[8] = {A3, A6, A4, A4, A8, A5, A7, A1};
 int currentServoAngle = 0;
+// false: text packets "S<angle>,<fsr0>,...,<fsr7>E".
+// true:  binary packets 0xAA 0x55 <len> <9 x uint16 LE> <CRC-8>, parsed by
+//        serial_frames.py when FRAME_FORMAT = "binary" in main_mega.py.
+const bool BINARY_FRAMES = false;
+
+// CRC-8, polynomial 0x07, init 0 (matches crc8() in serial_frames.py).
+uint8_t crc8(const uint8_t *data, size_t len) {
+  uint8_t crc = 0;
+  for (size_t i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (int b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+    }
+  }
+  return crc;
+}
+
+void sendBinaryPacket() {
+  // [length][angle lo][angle hi][fsr0 lo][fsr0 hi]...; CRC covers length + payload.
+  uint8_t frame[1 + 18];
+  frame[0] = 18;
+  frame[1] = currentServoAngle & 0xFF;
+  frame[2] = currentServoAngle >> 8;
+  for (int i = 0; i < 8; i++) {
+    int sensorValue = analogRead(FSR_PINS[i]);
+    frame[3 + 2 * i] = sensorValue & 0xFF;
+    frame[4 + 2 * i] = sensorValue >> 8;
+  }
+  Serial.write(0xAA);
+  Serial.write(0x55);
+  Serial.write(frame, sizeof(frame));
+  Serial.write(crc8(frame, sizeof(frame)));
+}
 
 void setup() {
   Serial.begin(115200);
@@ -24,6 +57,11 @@ void loop() {
   }
 
   // === Part 2: Build and send a verified data packet ===
+  if (BINARY_FRAMES) {
+    sendBinaryPacket();
+    delay(5);
+    return;
+  }
   String dataPacket = "";
   dataPacket += String(currentServoAngle);
   dataPacket += ",";
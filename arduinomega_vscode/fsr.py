@@ -1,7 +1,15 @@
-# In here we are testing the FSR and getting the delay of FSR readings and addressing 
+# In here we are testing the FSR and getting the delay of FSR readings and addressing
 # the delay in the FSR readings using kalman filter.
+#
+# Acquisition runs on its own thread at full serial speed and writes into
+# fixed-size ring buffers; the plot (blitted) and the live table are redrawn
+# at DISPLAY_FPS from those buffers, so memory stays flat however long it runs.
+# Every ANALYSIS_INTERVAL_SECONDS the buffer is run through fsr_latency_analysis
+# (arrival jitter / drift and the delay the Kalman filter would add), and every
+# reading is logged to LOG_PATH so the same analysis can be repeated offline.
 
 import serial
+import threading
 import time
 import matplotlib.pyplot as plt
 from collections import deque
@@ -9,27 +17,83 @@ import numpy as np
 from rich.console import Console
 from rich.table import Table
 from rich.live import Live
+from fsr_latency_analysis import (KALMAN_R, format_timing, group_delay, inter_arrival_stats,
+                                  kalman_filter, print_report, theoretical_group_delay)
 
 # --- Configuration ---
 # IMPORTANT: Change this to your Arduino's serial port
 SERIAL_PORT = 'COM5'  # For Windows. For Mac/Linux, it might be '/dev/tty.usbmodemXXXX'
 # This matches your Arduino code's baud rate
 BAUD_RATE = 115200
-MAX_DATA_POINTS = 100  # Number of data points to display on the plot
+MAX_DATA_POINTS = 2000  # Ring buffer size; must cover PLOT_WINDOW_SECONDS at the Arduino's rate
+PLOT_WINDOW_SECONDS = 5.0  # The plot shows the last N seconds
+TABLE_ROWS = 15  # Readings shown in the live table
+DISPLAY_FPS = 20  # Plot and table refresh rate, independent of the acquisition rate
+ANALYSIS_INTERVAL_SECONDS = 2.0  # How often the live timing / filter-delay summary is recomputed
+KALMAN_Q = 1e-3  # Process noise of the filter being evaluated (R is KALMAN_R)
+LOG_PATH = "fsr_arrivals.csv"  # timestamp_ns,value per reading; None to disable
 
 # --- Global Variables ---
 ser = None
-data_queue = deque(maxlen=MAX_DATA_POINTS)
-time_queue = deque(maxlen=MAX_DATA_POINTS)
-last_time = time.perf_counter()
-delays = deque(maxlen=MAX_DATA_POINTS)
-
-# --- Rich Table Setup ---
 console = Console()
-table = Table(show_header=True, header_style="bold magenta")
-table.add_column("Timestamp (s)", style="dim", width=20)
-table.add_column("FSR Reading", justify="right")
-table.add_column("Delay (ms)", justify="right")
+
+
+class DelayStats:
+    """Running count / mean / std / min / max of the inter-sample delay, in O(1) memory."""
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, delay):
+        self.count += 1
+        d = delay - self.mean
+        self.mean += d / self.count
+        self._m2 += d * (delay - self.mean)
+        self.min = min(self.min, delay)
+        self.max = max(self.max, delay)
+
+    @property
+    def std(self):
+        return (self._m2 / self.count) ** 0.5 if self.count else 0.0
+
+
+class FSRRingBuffer:
+    """
+    Fixed-size store shared by the acquisition thread (writer) and the display
+    (reader): preallocated time/value arrays for the plot, the last TABLE_ROWS
+    readings for the table, and running delay statistics.
+    """
+    def __init__(self, size=MAX_DATA_POINTS):
+        self.size = size
+        self.times = np.zeros(size)
+        self.values = np.zeros(size)
+        self.count = 0  # total readings ever written
+        self.rows = deque(maxlen=TABLE_ROWS)
+        self.delay_stats = DelayStats()
+        self.warnings = 0
+        self.lock = threading.Lock()
+
+    def add(self, timestamp, value, delay):
+        with self.lock:
+            i = self.count % self.size
+            self.times[i] = timestamp
+            self.values[i] = value
+            self.count += 1
+            self.rows.append((timestamp, value, delay))
+            if self.count > 1:  # The first delay includes the start-up wait
+                self.delay_stats.add(delay)
+
+    def snapshot(self):
+        """Copies of (times, values) in chronological order plus the table rows."""
+        with self.lock:
+            n = min(self.count, self.size)
+            start = self.count % self.size if self.count > self.size else 0
+            order = (np.arange(n) + start) % self.size
+            return self.times[order], self.values[order], list(self.rows)
+
 
 def setup_serial():
     """Initializes the serial connection to the Arduino."""
@@ -45,64 +109,96 @@ def setup_serial():
         console.print(f"   Error details: {e}", style="red")
         return False
 
-def read_serial_data():
-    """Reads a line of data from the serial port."""
-    global last_time
-    if not ser or not ser.in_waiting > 0:
-        return None, None, None
-    
-    try:
-        # Read the line and decode it from bytes to a string
-        line = ser.readline().decode('utf-8').strip()
-        
-        if line:
-            # Convert the line directly to an integer
-            fsr_value = int(line)
-            
-            current_time = time.perf_counter()
-            delay = (current_time - last_time) * 1000  # Delay in milliseconds
-            last_time = current_time
-
-            data_queue.append(fsr_value)
-            time_queue.append(current_time)
-            delays.append(delay)
-            
-            return current_time, fsr_value, delay
-    except ValueError:
-        console.print(f"⚠️ Warning: Could not convert data to integer: '{line}'", style="yellow")
-    except UnicodeDecodeError:
-        console.print(f"⚠️ Warning: Unicode decode error. A non-UTF8 byte was received.", style="yellow")
-    
-    return None, None, None
-
-def update_plot(ax):
-    """Manually redraws the plot with the latest data."""
-    if not time_queue:
-        return
+def acquisition_thread(buffer, stop_event, log_file=None):
+    """Reads lines as fast as the Arduino sends them and stores them in the ring buffer."""
+    last_time = time.perf_counter()
+    while not stop_event.is_set():
+        try:
+            # Blocks until a full line arrives (or the 1 s port timeout).
+            line = ser.readline()
+            if not line:
+                continue
+            arrival_ns = time.perf_counter_ns()
+            current_time = arrival_ns / 1e9
+            fsr_value = int(line.decode('utf-8').strip())
+        except (ValueError, UnicodeDecodeError):
+            buffer.warnings += 1
+            continue
+        except serial.SerialException as e:
+            console.print(f"Serial error: {e}", style="bold red")
+            stop_event.set()
+            break
+        delay = (current_time - last_time) * 1000  # Delay in milliseconds
+        last_time = current_time
+        buffer.add(current_time, fsr_value, delay)
+        if log_file:
+            log_file.write(f"{arrival_ns},{fsr_value}\n")
+
+def live_analysis(times, values):
+    """One-line summary of arrival timing and the delay of the Kalman filter at KALMAN_Q/KALMAN_R."""
+    stats = inter_arrival_stats(times)
+    if stats is None:
+        return ""
+    lag = group_delay(values, kalman_filter(values, KALMAN_Q, KALMAN_R))
+    measured = "n/a" if lag is None else f"{lag * stats['fitted_period_ms']:.1f} ms"
+    theory = theoretical_group_delay(KALMAN_Q, KALMAN_R) * stats['fitted_period_ms']
+    return (f"{format_timing(stats)}\n"
+            f"Kalman Q={KALMAN_Q:g} R={KALMAN_R:g}: delay {measured} (theory {theory:.1f} ms)")
+
+def build_table(rows, buffer, analysis=""):
+    caption = f"{buffer.count} readings, {buffer.warnings} unparsable lines"
+    table = Table(show_header=True, header_style="bold magenta",
+                  caption=f"{caption}\n{analysis}" if analysis else caption)
+    table.add_column("Timestamp (s)", style="dim", width=20)
+    table.add_column("FSR Reading", justify="right")
+    table.add_column("Delay (ms)", justify="right")
+    for timestamp, fsr_reading, delay in rows:
+        table.add_row(f"{timestamp:.4f}", str(fsr_reading), f"{delay:.2f}", style="green")
+    return table
+
+class BlittedPlot:
+    """
+    The scrolling FSR plot. Axes, labels and grid are drawn once and cached;
+    each refresh restores that background and redraws only the line. The
+    x-axis is "seconds before now" so it never has to move; a full redraw
+    only happens when the data leaves the current y-limits.
+    """
+    def __init__(self):
+        self.fig, self.ax = plt.subplots(figsize=(12, 6))
+        ax = self.ax
+        (self.line,) = ax.plot([], [], 'o-', color='b', markersize=2, label='FSR Reading', animated=True)
+        # --- Scientific Plot Styling ---
+        ax.set_title("Real-Time FSR Sensor Readings", fontsize=16, fontweight='bold')
+        ax.set_xlabel("Time Before Now (s)", fontsize=12)
+        ax.set_ylabel("FSR Reading (Analog Value)", fontsize=12)
+        ax.grid(True, which='both', linestyle='--', linewidth=0.5)
+        ax.legend(loc='upper left')
+        ax.minorticks_on()
+        ax.set_xlim(-PLOT_WINDOW_SECONDS, 0)
+        ax.set_ylim(0, 1023)
+        plt.tight_layout()
+        self.background = None
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
 
-    start_time = time_queue[0]
-    relative_time = [t - start_time for t in time_queue]
-
-    ax.clear()
-    ax.plot(relative_time, data_queue, 'o-', color='b', markersize=4, label='FSR Reading')
-    
-    # --- Scientific Plot Styling ---
-    ax.set_title("Real-Time FSR Sensor Readings", fontsize=16, fontweight='bold')
-    ax.set_xlabel("Time Elapsed (s)", fontsize=12)
-    ax.set_ylabel("FSR Reading (Analog Value)", fontsize=12)
-    ax.grid(True, which='both', linestyle='--', linewidth=0.5)
-    ax.legend(loc='upper left')
-    ax.minorticks_on()
-    
-    if data_queue:
-        min_val = min(data_queue)
-        max_val = max(data_queue)
-        ax.set_ylim(max(0, min_val - 50), min(1023, max_val + 50))
-    
-    if relative_time:
-        ax.set_xlim(min(relative_time), max(relative_time) + 1)
-
-    plt.tight_layout()
+    def _on_draw(self, event):
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+
+    def update(self, times, values):
+        canvas = self.fig.canvas
+        if len(times):
+            visible = times >= times[-1] - PLOT_WINDOW_SECONDS
+            x, y = times[visible] - time.perf_counter(), values[visible]
+            self.line.set_data(x, y)
+            low, high = self.ax.get_ylim()
+            if y.min() < low or y.max() > high or (y.max() - y.min()) + 100 < 0.5 * (high - low):
+                self.ax.set_ylim(max(0, y.min() - 50), min(1023, y.max() + 50))
+                self.background = None
+        if self.background is None:
+            canvas.draw()  # Triggers _on_draw, which re-captures the background
+        canvas.restore_region(self.background)
+        self.ax.draw_artist(self.line)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
 
 def main():
     """Main function to run the data acquisition and visualization."""
@@ -111,8 +207,8 @@ def main():
 
     # --- Matplotlib Setup ---
     plt.ion()
-    fig, ax = plt.subplots(figsize=(12, 6))
-    plt.show()
+    plot = BlittedPlot()
+    plt.show(block=False)
 
     # ** THE FIX IS HERE **
     # Clear the input buffer to discard any stale data that
@@ -121,26 +217,31 @@ def main():
     ser.reset_input_buffer()
     console.print("Buffer cleared. Starting live acquisition.", style="italic blue")
 
-    # Reset the timer right before the loop starts for accurate delay measurement
-    global last_time
-    last_time = time.perf_counter()
+    buffer = FSRRingBuffer()
+    stop_event = threading.Event()
+    log_file = open(LOG_PATH, "w") if LOG_PATH else None
+    if log_file:
+        log_file.write("timestamp_ns,value\n")
+    reader = threading.Thread(target=acquisition_thread, args=(buffer, stop_event, log_file), daemon=True)
+    reader.start()
 
-    with Live(table, refresh_per_second=10, screen=True) as live:
+    with Live(build_table([], buffer), refresh_per_second=DISPLAY_FPS, screen=True) as live:
         live.console.print("🚀 Starting data acquisition... Press Ctrl+C or close the plot window to stop.", style="bold cyan")
-        
-        while True:
+        next_frame = time.perf_counter()
+        next_analysis = next_frame + ANALYSIS_INTERVAL_SECONDS
+        analysis = ""
+        while not stop_event.is_set():
             try:
                 if not plt.get_fignums():
                     break
-
-                timestamp, fsr_reading, delay = read_serial_data()
-                if timestamp is not None:
-                    if len(table.rows) > 15:
-                        table.rows.pop(0)
-                    table.add_row(f"{timestamp:.4f}", str(fsr_reading), f"{delay:.2f}", style="green")
-                
-                update_plot(ax)
-                plt.pause(0.05)
+                times, values, rows = buffer.snapshot()
+                if time.perf_counter() >= next_analysis:
+                    analysis = live_analysis(times, values)
+                    next_analysis += ANALYSIS_INTERVAL_SECONDS
+                live.update(build_table(rows, buffer, analysis))
+                plot.update(times, values)
+                next_frame += 1.0 / DISPLAY_FPS
+                time.sleep(max(0.0, next_frame - time.perf_counter()))
 
             except KeyboardInterrupt:
                 console.print("\n🛑 Stopping data acquisition.", style="bold yellow")
@@ -149,24 +250,30 @@ def main():
                 console.print(f"An unexpected error occurred: {e}", style="bold red")
                 break
 
+    stop_event.set()
+    reader.join(timeout=2)
+    if log_file:
+        log_file.close()
+        console.print(f"💾 Readings logged to {LOG_PATH}", style="bold blue")
     if ser and ser.is_open:
         ser.close()
         console.print("🔌 Serial port closed.", style="bold blue")
 
-    # --- Final Analysis ---
-    if len(delays) > 1:
-        delays.popleft()
-        avg_delay = np.mean(list(delays))
-        max_delay = np.max(list(delays))
-        min_delay = np.min(list(delays))
-        std_dev = np.std(list(delays))
-        
+    # --- Final Analysis (over every reading, not just the plotted window) ---
+    stats = buffer.delay_stats
+    if stats.count:
         console.print("\n--- Delay Analysis ---", style="bold magenta")
-        console.print(f"Average Delay: {avg_delay:.2f} ms")
-        console.print(f"Max Delay:     {max_delay:.2f} ms")
-        console.print(f"Min Delay:     {min_delay:.2f} ms")
-        console.print(f"Std Deviation: {std_dev:.2f} ms")
-    
+        console.print(f"Readings:      {buffer.count}")
+        console.print(f"Average Delay: {stats.mean:.2f} ms")
+        console.print(f"Max Delay:     {stats.max:.2f} ms")
+        console.print(f"Min Delay:     {stats.min:.2f} ms")
+        console.print(f"Std Deviation: {stats.std:.2f} ms")
+
+    # Histogram, jitter, drift and Kalman delay over the last MAX_DATA_POINTS readings;
+    # run fsr_latency_analysis.py on LOG_PATH for the whole session.
+    times, values, _ = buffer.snapshot()
+    print_report(times, values, q_values=sorted({KALMAN_Q, 1e-4, 1e-2}))
+
     console.print("👋 Program finished.")
 
 
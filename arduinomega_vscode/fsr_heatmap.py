@@ -0,0 +1,99 @@
+# File: fsr_heatmap.py
+# Continuous pressure-field rendering for one gripper jaw. The 4 pad values
+# are splatted with precomputed Gaussian kernels (one weighted sum in numpy),
+# quantized to colormap indices and written to an 8-bit jaw surface with a
+# single pygame.surfarray call. The colormap LUT is that surface's palette,
+# so SDL applies it while blitting instead of numpy gathering RGB per pixel.
+
+import numpy as np
+import pygame
+
+# Kernel width as a fraction of the distance between neighbouring pads.
+SIGMA_PER_PAD_SPACING = 0.45
+LUT_SIZE = 256
+# Palette entry 0 is a color the scale never produces; it is the colorkey
+# for the pixels outside the rounded jaw outline.
+_OUTSIDE_KEY = (255, 0, 255)
+
+
+def glow_color(value, max_value=1023):
+    """The pads' blue -> green -> red color scale, shared by all FSR views."""
+    ratio = min(value / max_value, 1.0)
+    if ratio < 0.5: return (0, int(510 * ratio), 255)
+    return (int(510 * (ratio - 0.5)), int(255 * (1 - (ratio - 0.5) * 2)), 0)
+
+
+def build_colormap(background, fade=0.25):
+    """
+    LUT_SIZE x 3 uint8 colormap: entry 0 is the outside key, and the remaining
+    entries fade from the jaw background into the glow scale over the first
+    `fade` of the range, so unloaded areas stay the jaw color.
+    """
+    lut = np.zeros((LUT_SIZE, 3), dtype=np.uint8)
+    lut[0] = _OUTSIDE_KEY
+    bg = np.array(background, dtype=np.float32)
+    for i in range(1, LUT_SIZE):
+        level = (i - 1) / (LUT_SIZE - 2)
+        alpha = min(level / fade, 1.0)
+        lut[i] = np.round(bg + alpha * (np.array(glow_color(level * 1023), dtype=np.float32) - bg))
+    return lut
+
+
+class JawHeatmap:
+    """
+    Renders one jaw's pressure field. Everything that does not depend on the
+    pad values (kernels, outline mask, colormap, target surface) is built once.
+    pad_positions are pixel offsets inside a jaw of `size` = (width, height).
+    """
+    def __init__(self, size, pad_positions, background, border_radius=15):
+        self.width, self.height = size
+        pads = np.asarray(pad_positions, dtype=np.float32)
+        spacing = float(np.min(np.diff(pads[:, 1]))) if len(pads) > 1 else min(size) / 2
+        sigma = SIGMA_PER_PAD_SPACING * spacing
+        # surfarray indexes pixels as [x, y], so everything is laid out (width, height).
+        xs = np.arange(self.width, dtype=np.float32)[:, None]
+        ys = np.arange(self.height, dtype=np.float32)[None, :]
+        kernels = [np.exp(-((xs - px) ** 2 + (ys - py) ** 2) / (2 * sigma ** 2)) for px, py in pads]
+        # Scaled so a full-scale (1023) pad maps to the top LUT entry; shape (pads, width * height).
+        self.kernels = (np.stack(kernels).reshape(len(pads), -1) * ((LUT_SIZE - 2) / 1023.0)).astype(np.float32)
+
+        outline = pygame.Surface(size)
+        outline.fill((0, 0, 0))
+        pygame.draw.rect(outline, (255, 255, 255), outline.get_rect(), border_radius=border_radius)
+        self.inside = (pygame.surfarray.array2d(outline) != 0).reshape(-1).astype(np.uint8)
+
+        self.lut = build_colormap(background)
+        self.surface = pygame.Surface(size, depth=8)
+        self.surface.set_palette([tuple(int(c) for c in color) for color in self.lut])
+        self.surface.set_colorkey(0)
+        self._field = np.empty(self.width * self.height, dtype=np.float32)
+        self._index = np.empty(self.width * self.height, dtype=np.uint8)
+        self._index_2d = self._index.reshape(self.width, self.height)
+
+    def render(self, values):
+        """Returns the jaw surface for these 4 pad values (the same Surface object every call)."""
+        np.dot(np.asarray(values, dtype=np.float32), self.kernels, out=self._field)
+        np.clip(self._field, 0, LUT_SIZE - 2, out=self._field)
+        self._field += 1
+        index = self._index
+        index[:] = self._field
+        index *= self.inside
+        pygame.surfarray.blit_array(self.surface, self._index_2d)
+        return self.surface
+
+
+if __name__ == "__main__":
+    # Render-time check for both jaws of fsr_visualization's layout.
+    import os
+    import time
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    screen = pygame.display.set_mode((800, 450))
+    jaws = [JawHeatmap((150, 360), [(75, 60 + i * 80) for i in range(4)], (40, 50, 65)) for _ in range(2)]
+    rng = np.random.default_rng(0)
+    samples = rng.integers(0, 1024, size=(600, 8))
+    start = time.perf_counter()
+    for values in samples:
+        screen.blit(jaws[0].render(values[:4]), (100, 80))
+        screen.blit(jaws[1].render(values[4:]), (550, 80))
+    print(f"Heatmap: {1000 * (time.perf_counter() - start) / len(samples):.3f} ms per frame (both jaws, incl. blit)")
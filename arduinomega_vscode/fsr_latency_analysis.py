@@ -0,0 +1,217 @@
+# File: fsr_latency_analysis.py
+# Timing and filter-latency analysis for FSR streams.
+#   - inter-arrival histogram, percentile jitter and clock drift from arrival timestamps
+#   - the group delay a scalar Kalman filter with a given Q/R adds to the raw signal,
+#     measured by regressing the tracking error on the filter's slope and checked
+#     against the steady-state theory
+# (python fsr_latency_analysis.py --check verifies the estimate on synthetic signals.)
+# fsr.py calls this live on its ring buffer; run this file on a recorded log
+# to analyse it offline:
+#   python fsr_latency_analysis.py fsr_arrivals.csv
+#   python fsr_latency_analysis.py ../matlab/gripper_kalman_log_1.csv FSR3 MeasuredForce
+
+import sys
+import numpy as np
+
+# --- Configuration ---
+# Q values to compare (R fixed), e.g. the ones tried in the MATLAB tuner scripts.
+KALMAN_Q_VALUES = [1e-5, 1e-4, 1e-3, 1e-2, 1e-1]
+KALMAN_R = 0.1  # Same as data_analysis/kalman_filter.py
+HISTOGRAM_BINS = 20
+JITTER_PERCENTILES = [50, 90, 99, 99.9]
+
+
+def inter_arrival_stats(timestamps, nominal_period=None):
+    """
+    Timing statistics for arrival timestamps in seconds.
+    Drift is the least-squares sample period against the nominal one (the
+    median period if not given), in ppm, plus the accumulated offset over the run.
+    """
+    t = np.asarray(timestamps, dtype=np.float64)
+    if len(t) < 3:
+        return None
+    intervals_ms = np.diff(t) * 1000
+    nominal_ms = 1000 * nominal_period if nominal_period else float(np.median(intervals_ms))
+    fitted_ms = 1000 * np.polyfit(np.arange(len(t)), t, 1)[0]
+    counts, edges = np.histogram(intervals_ms, bins=HISTOGRAM_BINS)
+    return {
+        "samples": len(t),
+        "mean_ms": float(intervals_ms.mean()),
+        "std_ms": float(intervals_ms.std()),
+        "min_ms": float(intervals_ms.min()),
+        "max_ms": float(intervals_ms.max()),
+        "percentiles_ms": dict(zip(JITTER_PERCENTILES, np.percentile(intervals_ms, JITTER_PERCENTILES).tolist())),
+        "jitter_p99_ms": float(np.percentile(np.abs(intervals_ms - nominal_ms), 99)),
+        "nominal_ms": nominal_ms,
+        "fitted_period_ms": fitted_ms,
+        "drift_ppm": 1e6 * (fitted_ms - nominal_ms) / nominal_ms,
+        "accumulated_offset_ms": float(1000 * (t[-1] - t[0]) - nominal_ms * (len(t) - 1)),
+        "histogram": (counts, edges),
+    }
+
+
+def kalman_filter(raw, q, r, p_initial=1.0):
+    """
+    The scalar random-walk Kalman filter of data_analysis/kalman_filter.py with
+    the given Q and R, over a whole array. The gain sequence does not depend on
+    the data, so it is computed first; the state update is then one pass.
+    The estimate starts at the first sample instead of 0 to skip the start-up ramp.
+    """
+    raw = np.asarray(raw, dtype=np.float64)
+    gains = np.empty(len(raw))
+    p = p_initial
+    for i in range(len(raw)):
+        p_minus = p + q
+        gains[i] = p_minus / (p_minus + r)
+        p = (1 - gains[i]) * p_minus
+    filtered = np.empty(len(raw))
+    x = raw[0] if len(raw) else 0.0
+    for i, (k, z) in enumerate(zip(gains.tolist(), raw.tolist())):
+        x += k * (z - x)
+        filtered[i] = x
+    return filtered
+
+
+def steady_state_gain(q, r):
+    """Converged Kalman gain of the scalar random-walk filter."""
+    p_minus = (q + np.sqrt(q * q + 4 * q * r)) / 2
+    return p_minus / (p_minus + r)
+
+
+def theoretical_group_delay(q, r):
+    """Low-frequency group delay in samples of x += K (z - x) at the steady-state gain: (1 - K) / K."""
+    k = steady_state_gain(q, r)
+    return (1 - k) / k
+
+
+def group_delay(raw, filtered):
+    """
+    Delay in samples of `filtered` behind `raw`: the least-squares fit of the
+    tracking error to the filter's slope, sum((raw - filtered) * d_filtered) /
+    sum(d_filtered^2), as StreamingMetrics computes it live. A delay of d
+    samples makes raw(t) ~ filtered(t + d) ~ filtered(t) + d * slope. For a
+    first-order filter x += K (z - x) it is exactly (1 - K) / K on any signal,
+    where the peak of the cross-correlation would sit at lag 0 (the impulse
+    response of such a filter peaks there). Returns None if the filter output
+    does not move.
+    """
+    raw = np.asarray(raw, dtype=np.float64)
+    filtered = np.asarray(filtered, dtype=np.float64)
+    slope = np.diff(filtered)
+    power = float(slope @ slope)
+    if not power:
+        return None
+    return float((raw[1:] - filtered[1:]) @ slope / power)
+
+
+def check_group_delay(samples=20000, q_values=KALMAN_Q_VALUES, r=KALMAN_R, tolerance=0.05):
+    """
+    Runs steady-state first-order filters over a random walk and white noise and
+    checks that group_delay() recovers (1 - K) / K to within `tolerance` (relative).
+    Returns the list of failures (empty if all pass).
+    """
+    rng = np.random.default_rng(0)
+    signals = {"random walk": np.cumsum(rng.normal(size=samples)), "white noise": rng.normal(size=samples)}
+    failures = []
+    for q in q_values:
+        k = steady_state_gain(q, r)
+        expected = (1 - k) / k
+        for name, z in signals.items():
+            filtered = np.empty(samples)
+            x = z[0]
+            for i, value in enumerate(z.tolist()):
+                x += k * (value - x)
+                filtered[i] = x
+            measured = group_delay(z, filtered)
+            status = "ok" if abs(measured - expected) <= tolerance * expected else "FAIL"
+            print(f"  Q={q:<8g} {name:<12} K={k:.4f}  delay {measured:8.3f}  expected {expected:8.3f}  {status}")
+            if status != "ok":
+                failures.append((q, name, measured, expected))
+    return failures
+
+
+def noise_reduction(raw, filtered):
+    """Ratio of sample-to-sample variation, raw / filtered (higher = smoother)."""
+    raw_step = np.std(np.diff(raw))
+    filtered_step = np.std(np.diff(filtered))
+    return float(raw_step / filtered_step) if filtered_step else float("inf")
+
+
+def kalman_latency_table(values, period_ms, q_values=KALMAN_Q_VALUES, r=KALMAN_R):
+    """One row per Q: steady-state gain, measured and theoretical delay, noise reduction."""
+    rows = []
+    for q in q_values:
+        filtered = kalman_filter(values, q, r)
+        lag = group_delay(values, filtered)
+        rows.append({
+            "q": q, "r": r, "gain": float(steady_state_gain(q, r)),
+            "delay_samples": lag, "delay_ms": None if lag is None else lag * period_ms,
+            "theory_samples": float(theoretical_group_delay(q, r)),
+            "noise_reduction": noise_reduction(values, filtered),
+        })
+    return rows
+
+
+def format_timing(stats):
+    p = stats["percentiles_ms"]
+    return (f"period {stats['mean_ms']:.2f}±{stats['std_ms']:.2f} ms | "
+            + " ".join(f"p{k:g} {v:.2f}" for k, v in p.items())
+            + f" | jitter p99 {stats['jitter_p99_ms']:.2f} ms | drift {stats['drift_ppm']:+.0f} ppm")
+
+
+def print_report(timestamps, values, filtered=None, q_values=KALMAN_Q_VALUES, r=KALMAN_R):
+    stats = inter_arrival_stats(timestamps)
+    if stats is None:
+        print("Not enough samples to analyse.")
+        return
+    print("\n--- Inter-Arrival Timing ---")
+    print(f"Samples:            {stats['samples']}")
+    print(f"Mean / std:         {stats['mean_ms']:.3f} / {stats['std_ms']:.3f} ms (min {stats['min_ms']:.3f}, max {stats['max_ms']:.3f})")
+    print("Percentiles:        " + "  ".join(f"p{k:g} {v:.3f} ms" for k, v in stats['percentiles_ms'].items()))
+    print(f"Jitter (p99 |dev|): {stats['jitter_p99_ms']:.3f} ms around nominal {stats['nominal_ms']:.3f} ms")
+    print(f"Drift:              {stats['drift_ppm']:+.1f} ppm (fitted period {stats['fitted_period_ms']:.4f} ms), "
+          f"{stats['accumulated_offset_ms']:+.1f} ms accumulated")
+    counts, edges = stats["histogram"]
+    peak = counts.max()
+    for count, low, high in zip(counts, edges[:-1], edges[1:]):
+        print(f"  {low:8.2f}-{high:8.2f} ms |{'#' * int(40 * count / peak):<40}| {count}")
+
+    period_ms = stats["fitted_period_ms"]
+    print(f"\n--- Kalman Group Delay (R = {r:g}) ---")
+    print(f"{'Q':>10}{'gain':>10}{'measured':>16}{'theory':>12}{'noise red.':>12}")
+    for row in kalman_latency_table(values, period_ms, q_values, r):
+        measured = "n/a" if row["delay_samples"] is None else f"{row['delay_samples']:.1f} ({row['delay_ms']:.0f} ms)"
+        print(f"{row['q']:>10g}{row['gain']:>10.4f}{measured:>16}{row['theory_samples']:>12.1f}{row['noise_reduction']:>12.2f}")
+    if filtered is not None:
+        lag = group_delay(values, filtered)
+        if lag is not None:
+            print(f"Recorded filter output: {lag:.1f} samples ({lag * period_ms:.0f} ms) behind the raw signal")
+    print("----------------------------\n")
+
+
+def load_log(path, value_column=None, filtered_column=None):
+    """
+    Reads (timestamps in s, values, filtered or None) from a CSV log: either
+    fsr.py's timestamp_ns,value or the MATLAB logs' Time,...,FSR1..FSR8.
+    """
+    data = np.genfromtxt(path, delimiter=",", names=True)
+    names = data.dtype.names
+    if "timestamp_ns" in names:
+        timestamps = data["timestamp_ns"] * 1e-9
+    else:
+        timestamps = data["Time"]
+    value_column = value_column or ("value" if "value" in names else "FSR1")
+    filtered = data[filtered_column] if filtered_column else None
+    return timestamps, data[value_column], filtered
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python fsr_latency_analysis.py <log.csv> [value_column] [filtered_column] | --check")
+        sys.exit(1)
+    if sys.argv[1] == "--check":
+        print(f"Checking group_delay() on first-order filters (R = {KALMAN_R:g})")
+        sys.exit(1 if check_group_delay() else 0)
+    timestamps, values, filtered = load_log(*sys.argv[1:4])
+    print(f"Analysing {sys.argv[1]} ({len(values)} samples)")
+    print_report(timestamps, values, filtered)
@@ -2,13 +2,16 @@
 # Defines the class for the standalone FSR monitoring window.
 
 import pygame
+from fsr_heatmap import JawHeatmap, glow_color
 
 class FSRVisualizer:
     """
     Manages the Pygame window for displaying detailed FSR data.
     It does NOT run its own loop. It is updated by an external main script.
+    mode="pads" draws each pad as a glowing circle; mode="heatmap" draws a
+    continuous pressure field per jaw (see fsr_heatmap.py).
     """
-    def __init__(self):
+    def __init__(self, mode="pads"):
         # --- Window Settings ---
         self.width, self.height = 800, 450
         # Create a second, separate display surface.
@@ -32,11 +35,10 @@ class FSRVisualizer:
         self.left_pad_coords = [(self.left_jaw_rect.x + x, self.left_jaw_rect.y + y) for x, y in pad_positions]
         self.right_pad_coords = [(self.right_jaw_rect.x + x, self.right_jaw_rect.y + y) for x, y in pad_positions]
 
-    def _get_glow_color(self, value, max_value=1023):
-        ratio = min(value / max_value, 1.0)
-        if ratio < 0.5: r, g, b = 0, int(510 * ratio), 255
-        else: r, g, b = int(510 * (ratio - 0.5)), int(255 * (1 - (ratio - 0.5) * 2)), 0
-        return (r, g, b)
+        self.mode = mode
+        if mode == "heatmap":
+            self.left_heatmap = JawHeatmap((jaw_width, jaw_height), pad_positions, self.JAW_COLOR)
+            self.right_heatmap = JawHeatmap((jaw_width, jaw_height), pad_positions, self.JAW_COLOR)
 
     def _calculate_cof(self, pad_coords, fsr_values):
         total_force = sum(fsr_values)
@@ -61,27 +63,39 @@ class FSRVisualizer:
         ]
 
         for name, jaw_rect, pad_coords, values in jaws_data:
-            pygame.draw.rect(self.screen, self.JAW_COLOR, jaw_rect, border_radius=15)
             label_surf = self.label_font.render(name, True, self.TEXT_COLOR)
             self.screen.blit(label_surf, label_surf.get_rect(center=(jaw_rect.centerx, jaw_rect.top - 20)))
 
+            if self.mode == "heatmap":
+                heatmap = self.left_heatmap if jaw_rect is self.left_jaw_rect else self.right_heatmap
+                self.screen.blit(heatmap.render(values), jaw_rect)
+                for pos, value in zip(pad_coords, values):
+                    value_surf = self.value_font.render(str(value), True, self.TEXT_COLOR)
+                    self.screen.blit(value_surf, value_surf.get_rect(center=pos))
+                self._draw_cof(pad_coords, values)
+                continue
+
+            pygame.draw.rect(self.screen, self.JAW_COLOR, jaw_rect, border_radius=15)
             for i, value in enumerate(values):
                 pos = pad_coords[i]
                 base_radius = 20
                 dynamic_radius = int((value / 1023) * 30)
                 if dynamic_radius > 1:
-                    glow_color = self._get_glow_color(value)
+                    color = glow_color(value)
                     s = pygame.Surface((dynamic_radius*2, dynamic_radius*2), pygame.SRCALPHA)
                     alpha = 150 - (i / dynamic_radius) * 150 if dynamic_radius > 0 else 150
-                    pygame.draw.circle(s, (*glow_color, int(alpha)), (dynamic_radius, dynamic_radius), dynamic_radius)
+                    pygame.draw.circle(s, (*color, int(alpha)), (dynamic_radius, dynamic_radius), dynamic_radius)
                     self.screen.blit(s, (pos[0]-dynamic_radius, pos[1]-dynamic_radius))
 
                 pygame.draw.circle(self.screen, (200, 200, 220), pos, base_radius)
                 value_surf = self.value_font.render(str(value), True, self.BG_COLOR)
                 self.screen.blit(value_surf, value_surf.get_rect(center=pos))
 
-            cof = self._calculate_cof(pad_coords, values)
-            if cof:
-                cof_x, cof_y = int(cof[0]), int(cof[1])
-                pygame.draw.line(self.screen, self.COF_COLOR, (cof_x-12, cof_y), (cof_x+12, cof_y), 2)
-                pygame.draw.line(self.screen, self.COF_COLOR, (cof_x, cof_y-12), (cof_x, cof_y+12), 2)
+            self._draw_cof(pad_coords, values)
+
+    def _draw_cof(self, pad_coords, values):
+        cof = self._calculate_cof(pad_coords, values)
+        if cof:
+            cof_x, cof_y = int(cof[0]), int(cof[1])
+            pygame.draw.line(self.screen, self.COF_COLOR, (cof_x-12, cof_y), (cof_x+12, cof_y), 2)
+            pygame.draw.line(self.screen, self.COF_COLOR, (cof_x, cof_y-12), (cof_x, cof_y+12), 2)
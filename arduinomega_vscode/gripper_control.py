@@ -1,6 +1,9 @@
 # File: gripper_control.py
 # This version has more robust grab detection logic AND dynamic grab speed.
+# Motion is driven by elapsed monotonic time, so the closing speed in degrees
+# per second no longer depends on how often update() is called.
 
+import time
 from enum import Enum, auto
 
 class GripperState(Enum):
@@ -14,22 +17,29 @@ class GripperState(Enum):
 class GripperController:
     """
     Implements a state machine with robust grab detection and dynamic grab speed.
+    Speeds are in degrees per second; the angle step of each update() is
+    speed * (time since the previous update).
     """
     def __init__(self):
         self.GRAB_THRESHOLD = 200 # The pressure at which a grab is considered successful
         self.EMERGENCY_PRESSURE = 700 # The pressure for an emergency release
-        self.RELEASE_SPEED = 2 # The speed for releasing the object
-        
-        # --- NEW: Parameters for Dynamic Grab Speed ---
-        self.MAX_GRAB_SPEED = 0.2         # Speed when no force is detected
-        self.MIN_GRAB_SPEED = 0.001        # Speed when force is high (just before grabbing)
+        self.RELEASE_SPEED = 200.0 # Release speed in deg/s (was 2 deg per update at ~100 updates/s)
+
+        # --- Grab speed profile: (max FSR value, closing speed in deg/s), linearly interpolated ---
+        # Full speed until FORCE_SENSITIVITY_START, slowing to the minimum at FORCE_SENSITIVITY_END.
+        self.MAX_GRAB_SPEED = 20.0        # deg/s when no force is detected
+        self.MIN_GRAB_SPEED = 0.1         # deg/s when force is high (just before grabbing)
         self.FORCE_SENSITIVITY_START = 30 # FSR value at which to start slowing down
         self.FORCE_SENSITIVITY_END = 180  # FSR value at which speed is at its minimum
-        # --- END NEW ---
+        self.GRAB_SPEED_PROFILE = [(self.FORCE_SENSITIVITY_START, self.MAX_GRAB_SPEED),
+                                   (self.FORCE_SENSITIVITY_END, self.MIN_GRAB_SPEED)]
+        # A stalled caller must not make the jaws jump: longer gaps are clamped to this.
+        self.MAX_STEP_SECONDS = 0.05
 
         self.state = GripperState.IDLE # The initial state is IDLE
         self.target_angle = 0.0 # The initial target angle is 0.0
         self.object_detected = False # Initially, no object is detected
+        self._last_update_time = None # Monotonic time of the previous update()
 
     def _check_emergency(self, fsr_values):
         if any(v > self.EMERGENCY_PRESSURE for v in fsr_values): # Checks if any FSR value exceeds the emergency pressure
@@ -62,6 +72,16 @@ class GripperController:
             
         return False
 
+    def grab_speed(self, max_force):
+        """Closing speed in deg/s for the current peak FSR value, from GRAB_SPEED_PROFILE."""
+        profile = self.GRAB_SPEED_PROFILE
+        if max_force <= profile[0][0]:
+            return profile[0][1]
+        for (f0, v0), (f1, v1) in zip(profile, profile[1:]):
+            if max_force <= f1:
+                return v0 + (v1 - v0) * (max_force - f0) / (f1 - f0)
+        return profile[-1][1]
+
     def handle_command(self, command):
         if command == "grab" and self.state in [GripperState.IDLE, GripperState.FAILED_GRAB]: # A "grab" command starts the grab sequence
             self.state = GripperState.GRABBING
@@ -77,10 +97,14 @@ class GripperController:
             self.state = GripperState.EMERGENCY_RELEASE
             print("Command: EMERGENCY. Releasing immediately.")
             
-    def update(self, fsr_values, actual_angle):
+    def update(self, fsr_values, actual_angle, now=None):
         """
         Runs the state machine, using the actual_angle for decisions.
+        `now` is a time.monotonic() timestamp (taken here if omitted).
         """
+        now = time.monotonic() if now is None else now
+        dt = 0.0 if self._last_update_time is None else min(max(now - self._last_update_time, 0.0), self.MAX_STEP_SECONDS)
+        self._last_update_time = now
         if not fsr_values:
             return int(self.target_angle)
 
@@ -91,22 +115,9 @@ class GripperController:
         if self.state == GripperState.GRABBING:
             if not self._check_grab_success(fsr_values, actual_angle):
                 
-                # --- MODIFIED: Dynamic Speed Calculation ---
+                # --- Dynamic speed: slows down as force builds up ---
                 max_force = max(fsr_values) if fsr_values else 0
-                
-                dynamic_speed = self.MAX_GRAB_SPEED
-
-                if max_force > self.FORCE_SENSITIVITY_START:
-                    # Calculate how far the force is into the sensitivity range (0.0 to 1.0)
-                    force_progress = (max_force - self.FORCE_SENSITIVITY_START) / (self.FORCE_SENSITIVITY_END - self.FORCE_SENSITIVITY_START)
-                    clamped_progress = max(0.0, min(1.0, force_progress))
-                    
-                    # Linearly interpolate the speed based on the force progress
-                    # As progress goes from 0 to 1, speed goes from MAX to MIN
-                    dynamic_speed = self.MAX_GRAB_SPEED - (self.MAX_GRAB_SPEED - self.MIN_GRAB_SPEED) * clamped_progress
-                
-                self.target_angle += dynamic_speed
-                # --- END MODIFIED ---
+                self.target_angle += self.grab_speed(max_force) * dt
 
                 if actual_angle >= 99: # Checks if the gripper has reached its physical limit
                     self.state = GripperState.FAILED_GRAB
@@ -116,7 +127,7 @@ class GripperController:
             pass
 
         elif self.state in [GripperState.RELEASING, GripperState.EMERGENCY_RELEASE, GripperState.FAILED_GRAB]:
-            self.target_angle -= self.RELEASE_SPEED # The target angle is decreased during release
+            self.target_angle -= self.RELEASE_SPEED * dt # The target angle is decreased during release
             if actual_angle <= 1: # When the gripper is fully open, the state becomes IDLE
                 self.state = GripperState.IDLE
                 self.object_detected = False
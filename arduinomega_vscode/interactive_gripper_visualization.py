@@ -1,14 +1,23 @@
 # File: interactive_gripper_visualization.py
 # A unified, high-performance visualization class for real-time control.
+# Everything that never changes is drawn once into a background surface,
+# text and glow sprites are rendered once and cached, and update() only
+# repaints (and returns) the regions whose inputs changed.
+
+import time
+from collections import deque
 
 import pygame
+from fsr_heatmap import JawHeatmap, glow_color
 
 class InteractiveGripperVisualizer:
     """
     Manages a single, combined Pygame window with interactive controls and a detailed FSR monitor.
-    Optimized for high-speed, real-time updates.
+    Optimized for high-speed, real-time updates: update() returns the dirty rects,
+    so pass them to pygame.display.update().
+    fsr_mode="pads" draws glowing pad circles, "heatmap" a continuous pressure field per jaw.
     """
-    def __init__(self):
+    def __init__(self, fsr_mode="pads"):
         # --- Window Settings (Increased height for the combined view) ---
         self.width, self.height = 1000, 850
         self.screen = pygame.display.set_mode((self.width, self.height))
@@ -28,57 +37,134 @@ class InteractiveGripperVisualizer:
         # --- Button Definitions ---
         self.buttons = {'grab':pygame.Rect(50,500,150,60),'release':pygame.Rect(220,500,150,60),'emergency':pygame.Rect(self.width-200,500,150,60)}
 
-    def _get_glow_color(self, v, max_v=1023):
-        r=min(v/max_v,1.0); return (0,int(510*r),255) if r<0.5 else (int(510*(r-0.5)),int(255*(1-(r-0.5)*2)),0)
-    
+        # --- Layout of the dynamic regions ---
+        self.jaw_w,self.jaw_h,self.jaw_depth,self.open_offset,self.closed_offset=120,250,20,80,10
+        self.gripper_rect=pygame.Rect(0,0,2*(self.jaw_w+self.open_offset),80+self.jaw_h+self.jaw_depth+2); self.gripper_rect.midtop=(self.width/2,80-self.jaw_depth)
+        self.status_rect=pygame.Rect(0,430,self.width//2,40); self.status_rect.centerx=self.width//2
+        self.angle_rect=pygame.Rect(0,475,200,30); self.angle_rect.centerx=self.width//2
+        fw,fh=150,180
+        self.fsr_jaws=[("Left",pygame.Rect(250,660,fw,fh),slice(0,4)),("Right",pygame.Rect(self.width-250-fw,660,fw,fh),slice(4,8))]
+        self.pad_offsets=[(fw//2,30+i*40) for i in range(4)]
+        self.max_glow_radius=25
+
+        # --- Pre-rendered layers and caches ---
+        self.background=self._render_background()
+        self.value_glyphs=[self.fsr_value_font.render(str(v),True,self.colors['bg']) for v in range(1024)]
+        self.glow_sprites={}
+        # A label can be wider than its button ("EMERGENCY"), so a button's area covers both.
+        self.button_areas={n:r.union(self.button_font.render(n.upper(),True,self.colors['text']).get_rect(center=r.center)) for n,r in self.buttons.items()}
+        self.button_sprites={(n,h):self._render_button(n,h) for n in self.buttons for h in (False,True)}
+        self.text_cache={}
+        self.fsr_mode=fsr_mode
+        if fsr_mode=="heatmap":
+            self.heatmaps={n:JawHeatmap(jr.size,self.pad_offsets,self.colors['fsr_jaw_bg']) for n,jr,_ in self.fsr_jaws}
+            self.light_value_glyphs=[self.fsr_value_font.render(str(v),True,self.colors['text']) for v in range(1024)]
+
+        # --- What is currently on screen (None forces a redraw) ---
+        self._shown={}
+        self.frame_times=deque(maxlen=600)
+
+    # --- One-time rendering ---
+    def _glow_sprite(self, val):
+        """Glow sprite for a pad value, cached per radius and glow color."""
+        dr=int((val/1023)*self.max_glow_radius)
+        if dr<=1: return None
+        key=(dr,glow_color(val))
+        if key not in self.glow_sprites:
+            s=pygame.Surface((dr*2,dr*2),pygame.SRCALPHA); pygame.draw.circle(s,(*key[1],100),(dr,dr),dr); self.glow_sprites[key]=s
+        return self.glow_sprites[key]
+
+    def _render_button(self, name, hover):
+        ck=f'btn_{name}_hover' if hover and name=='emergency' else 'btn_hover' if hover else f'btn_{name}' if name=='emergency' else 'btn_normal'
+        r,a=self.buttons[name],self.button_areas[name]; s=self.background.subsurface(a).copy()
+        pygame.draw.rect(s,self.colors[ck],r.move(-a.x,-a.y),border_radius=10)
+        t=self.button_font.render(name.upper(),True,self.colors['text']); s.blit(t,t.get_rect(center=(r.centerx-a.x,r.centery-a.y))); return s
+
+    def _render_background(self):
+        bg=pygame.Surface((self.width,self.height)); bg.fill(self.colors['bg'])
+        self._draw_text("Robotic Gripper Control",self.title_font,self.colors['text'],center_pos=(self.width/2,40),target=bg)
+        pygame.draw.line(bg,self.colors['gripper_base'],(50,580),(self.width-50,580),3)
+        self._draw_text("Force Sensor Monitor",self.title_font,self.colors['text'],center_pos=(self.width/2,620),target=bg)
+        for n,jr,_ in self.fsr_jaws:
+            pygame.draw.rect(bg,self.colors['fsr_jaw_bg'],jr,border_radius=15)
+            self._draw_text(n+" Jaw",self.fsr_label_font,self.colors['text'],center_pos=(jr.centerx,jr.top-15),target=bg)
+        return bg
+
+    # --- Helpers ---
     def _calculate_cof(self, coords, values):
         tf=sum(values); return None if tf==0 else (sum(c[0]*f for c,f in zip(coords,values))/tf,sum(c[1]*f for c,f in zip(coords,values))/tf)
 
-    def _draw_text(self, text, font, color, center_pos):
-        s=font.render(text,True,color); r=s.get_rect(center=center_pos); self.screen.blit(s,r)
+    def _draw_text(self, text, font, color, center_pos, target=None):
+        s=font.render(text,True,color); r=s.get_rect(center=center_pos); (target or self.screen).blit(s,r)
+
+    def _cached_text(self, text, font, color):
+        key=(text,id(font),color)
+        if key not in self.text_cache: self.text_cache[key]=font.render(text,True,color)
+        return self.text_cache[key]
+
+    def _restore(self, rect):
+        self.screen.blit(self.background,rect,rect)
 
+    def _changed(self, key, value):
+        if self._shown.get(key)==value: return False
+        self._shown[key]=value; return True
+
+    # --- Dynamic regions ---
     def _draw_gripper(self, angle):
+        self._restore(self.gripper_rect)
         br=pygame.Rect(0,0,150,80); br.center=(self.width/2,120); pygame.draw.rect(self.screen,self.colors['gripper_base'],br,border_radius=10)
-        jw,jh,jd=120,250,20; oo,co=80,10; cofs=oo-((angle/100.0)*(oo-co))
+        jw,jh,jd=self.jaw_w,self.jaw_h,self.jaw_depth; oo,co=self.open_offset,self.closed_offset; cofs=oo-((angle/100.0)*(oo-co))
         for s in ['left','right']:
             jx=(self.width/2)-jw-cofs if s=='left' else (self.width/2)+cofs; jy=br.bottom
             pygame.draw.rect(self.screen,self.colors['gripper_jaw'],(jx,jy,jw,jh),border_radius=8)
             p=[(jx,jy),(jx+jd,jy-jd),(jx+jd,jy+jh-jd),(jx,jy+jh)] if s=='left' else [(jx+jw,jy),(jx+jw-jd,jy-jd),(jx+jw-jd,jy+jh-jd),(jx+jw,jy+jh)]
             pygame.draw.polygon(self.screen,self.colors['gripper_jaw_face'],p)
+        return self.gripper_rect
 
-    def _draw_fsr_details(self, fsr_values):
-        self._draw_text("Force Sensor Monitor",self.title_font,self.colors['text'],center_pos=(self.width/2,620))
-        jw,jh=150,180; ljr=pygame.Rect(250,660,jw,jh); rjr=pygame.Rect(self.width-250-jw,660,jw,jh)
-        pp=[(jw/2,30+i*40) for i in range(4)]
-        jd=[("Left",ljr,fsr_values[0:4]),("Right",rjr,fsr_values[4:8])]
-        for n,jr,v in jd:
-            pygame.draw.rect(self.screen,self.colors['fsr_jaw_bg'],jr,border_radius=15)
-            self._draw_text(n+" Jaw",self.fsr_label_font,self.colors['text'],center_pos=(jr.centerx,jr.top-15))
-            pc=[(jr.x+x,jr.y+y) for x,y in pp]
-            for i,val in enumerate(v):
-                pos=pc[i]; br=20; dr=int((val/1023)*25)
-                if dr>1: gc=self._get_glow_color(val); s=pygame.Surface((dr*2,dr*2),pygame.SRCALPHA); pygame.draw.circle(s,(*gc,100),(dr,dr),dr); self.screen.blit(s,(pos[0]-dr,pos[1]-dr))
+    def _draw_jaw(self, name, jaw_rect, values):
+        self._restore(jaw_rect)
+        pc=[(jaw_rect.x+x,jaw_rect.y+y) for x,y in self.pad_offsets]
+        if self.fsr_mode=="heatmap":
+            self.screen.blit(self.heatmaps[name].render(values),jaw_rect)
+            for pos,val in zip(pc,values): g=self.light_value_glyphs[max(0,min(1023,int(val)))]; self.screen.blit(g,g.get_rect(center=pos))
+        else:
+            for pos,val in zip(pc,values):
+                val=max(0,min(1023,int(val))); glow=self._glow_sprite(val)
+                if glow: self.screen.blit(glow,glow.get_rect(center=pos))
                 pygame.draw.circle(self.screen,self.colors['text'],pos,15)
-                self._draw_text(str(val),self.fsr_value_font,self.colors['bg'],center_pos=pos)
-            cof=self._calculate_cof(pc,v)
-            if cof: x,y=int(cof[0]),int(cof[1]); pygame.draw.line(self.screen,self.colors['cof_color'],(x-10,y),(x+10,y),2); pygame.draw.line(self.screen,self.colors['cof_color'],(x,y-10),(x,y+10),2)
+                g=self.value_glyphs[val]; self.screen.blit(g,g.get_rect(center=pos))
+        cof=self._calculate_cof(pc,values)
+        if cof: x,y=int(cof[0]),int(cof[1]); pygame.draw.line(self.screen,self.colors['cof_color'],(x-10,y),(x+10,y),2); pygame.draw.line(self.screen,self.colors['cof_color'],(x,y-10),(x,y+10),2)
+        return jaw_rect
+
+    def _draw_centered(self, rect, surface):
+        self._restore(rect); self.screen.blit(surface,surface.get_rect(center=rect.center)); return rect
 
     def update(self, angle, state, fsr_values, object_detected):
-        self.screen.fill(self.colors['bg'])
-        self._draw_gripper(angle)
-        self._draw_text("Robotic Gripper Control",self.title_font,self.colors['text'],center_pos=(self.width/2,40))
-        sc=self.colors['status_ok'];
-        if "GRABBING" in state or "RELEASING" in state: sc=self.colors['status_active']
-        elif "FAIL" in state or "EMERGENCY" in state: sc=self.colors['status_fail']
-        self._draw_text(f"Status: {state}",self.status_font,sc,center_pos=(self.width/2,450))
-        self._draw_text(f"Angle: {angle}°",self.info_font,self.colors['text'],center_pos=(self.width/2,490))
+        """Redraws whatever changed since the last call and returns the dirty rects."""
+        start=time.perf_counter(); dirty=[]
+        if self._changed('background',True):
+            self.screen.blit(self.background,(0,0)); self._shown={'background':True}; dirty.append(self.screen.get_rect())
+        if self._changed('angle',angle):
+            dirty.append(self._draw_gripper(angle))
+            dirty.append(self._draw_centered(self.angle_rect,self._cached_text(f"Angle: {angle}°",self.info_font,self.colors['text'])))
+        if self._changed('state',state):
+            sc=self.colors['status_ok']
+            if "GRABBING" in state or "RELEASING" in state: sc=self.colors['status_active']
+            elif "FAIL" in state or "EMERGENCY" in state: sc=self.colors['status_fail']
+            dirty.append(self._draw_centered(self.status_rect,self._cached_text(f"Status: {state}",self.status_font,sc)))
         mp=pygame.mouse.get_pos()
         for n,r in self.buttons.items():
-            h=r.collidepoint(mp); ck=f'btn_{n}_hover' if h and n=='emergency' else 'btn_hover' if h else f'btn_{n}' if n=='emergency' else 'btn_normal'
-            pygame.draw.rect(self.screen,self.colors[ck],r,border_radius=10)
-            self._draw_text(n.upper(),self.button_font,self.colors['text'],center_pos=r.center)
-        pygame.draw.line(self.screen,self.colors['gripper_base'],(50,580),(self.width-50,580),3)
-        self._draw_fsr_details(fsr_values)
+            h=r.collidepoint(mp)
+            if self._changed(('button',n),h): a=self.button_areas[n]; self.screen.blit(self.button_sprites[(n,h)],a); dirty.append(a)
+        for n,jr,sl in self.fsr_jaws:
+            v=tuple(fsr_values[sl])
+            if self._changed(('jaw',n),v): dirty.append(self._draw_jaw(n,jr,v))
+        self.frame_times.append(time.perf_counter()-start)
+        return dirty
+
+    def average_frame_ms(self):
+        return 1000*sum(self.frame_times)/len(self.frame_times) if self.frame_times else 0.0
 
     def check_events(self, events):
         for event in events:
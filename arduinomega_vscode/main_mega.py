@@ -6,15 +6,27 @@ import time
 import sys
 import pygame
 import socket
+import threading
 
 from arduinomega_vscode.interactive_gripper_visualization import InteractiveGripperVisualizer
 from gripper_control import GripperController 
+from serial_frames import SerialFrameParser
+from serial_io import SerialReader, AngleWriter, ControlLoop, print_jitter_report
 
 # --- CONFIGURATION ---
 ARDUINO_PORT = 'COM5'
 BAUD_RATE = 115200
 UDP_IP = "127.0.0.1"
 UDP_PORT = 5005
+# "text" for the default S...E packets, "binary" if BINARY_FRAMES is set in arduino_mega_code.ino.
+FRAME_FORMAT = "text"
+# The controller runs on its own fixed-rate thread. GripperController moves
+# by elapsed time (deg/s), so this sets control resolution, not speed.
+CONTROL_RATE_HZ = 100
+# The window only needs to refresh this often; rendering no longer delays control.
+DISPLAY_FPS = 60
+# "pads" shows each FSR as a glowing circle, "heatmap" a continuous pressure field per jaw.
+FSR_DISPLAY_MODE = "pads"
 
 def main():
     print("--- Robotic Gripper Control System: Fully Synchronized ---")
@@ -31,58 +43,60 @@ def main():
         print(f"FATAL: Could not open serial port {ARDUINO_PORT}. Details: {e}")
         sys.exit(1)
 
-    visualizer = InteractiveGripperVisualizer()
+    visualizer = InteractiveGripperVisualizer(fsr_mode=FSR_DISPLAY_MODE)
     controller = GripperController()
 
-    last_known_angle = 0
-    last_known_fsr_data = [0] * 8
-    serial_buffer = ""
+    parser = SerialFrameParser(binary=(FRAME_FORMAT == "binary"))
+    controller_lock = threading.Lock()
+
+    # Every complete packet is logged; only the newest one drives control.
+    def log_frame(frame, arrival_ns):
+        sock.sendto(','.join(map(str, frame)).encode('utf-8'), (UDP_IP, UDP_PORT))
+
+    reader = SerialReader(arduino, parser, on_frame=log_frame)
+    writer = AngleWriter(arduino)
+
+    def control_step():
+        latest = reader.latest()
+        if latest is None:
+            return
+        frame, arrival_ns, _ = latest
+        with controller_lock:
+            target_angle = controller.update(frame[1:], frame[0], now=time.monotonic())
+        writer.write(target_angle, arrival_ns)
+
+    control_loop = ControlLoop(control_step, CONTROL_RATE_HZ)
+    clock = pygame.time.Clock()
 
     running = True
     try:
-        # --- STABLE & FAST CLOSED-LOOP ARCHITECTURE ---
+        # --- Serial reads and control run on their own threads; this loop only handles the UI ---
+        reader.start()
+        control_loop.start()
         while running:
-            # 1. Read the latest state from the hardware
-            if arduino.in_waiting > 0:
-                serial_buffer += arduino.read(arduino.in_waiting).decode('utf-8', errors='ignore')
-
-            start_index = serial_buffer.find('S')
-            end_index = serial_buffer.find('E')
-
-            if start_index != -1 and end_index != -1 and start_index < end_index:
-                packet_str = serial_buffer[start_index + 1 : end_index]
-                serial_buffer = serial_buffer[end_index + 1:]
-                try:
-                    parsed_data = [int(val) for val in packet_str.split(',')]
-                    if len(parsed_data) == 9:
-                        last_known_angle = parsed_data[0]
-                        last_known_fsr_data = parsed_data[1:]
-                        sock.sendto(packet_str.encode('utf-8'), (UDP_IP, UDP_PORT))
-                except (ValueError):
-                    pass
-            
-            # 2. Decide on the next action based on user input and the real state
             command = visualizer.check_events(pygame.event.get())
             if command == "quit": running = False; continue
-            if command: controller.handle_command(command)
-            
-            target_angle = controller.update(last_known_fsr_data, last_known_angle)
-
-            # 3. Act by sending the new command to the hardware
-            arduino.write(bytes([target_angle]))
-
-            # 4. Visualize the real state that was read in step 1
-            visualizer.update(last_known_angle, controller.state.name, last_known_fsr_data, controller.object_detected)
-            pygame.display.update()
-            
-            # Minimal delay to keep the loop fast without maxing out the CPU
-            time.sleep(0.002)
+            if command:
+                with controller_lock:
+                    controller.handle_command(command)
 
+            latest = reader.latest()
+            frame = latest[0] if latest is not None else [0] * 9
+            # Only the regions that changed are redrawn and pushed to the window.
+            pygame.display.update(visualizer.update(frame[0], controller.state.name, frame[1:], controller.object_detected))
+            clock.tick(DISPLAY_FPS)
 
     except KeyboardInterrupt:
         print("\nProgram interrupted by user.")
     finally:
         print("Shutting down...")
+        control_loop.stop()
+        reader.stop()
+        print_jitter_report(control_loop, writer)
+        print(f"Display: {visualizer.average_frame_ms():.2f} ms average render time per frame")
+        stats = parser.stats()
+        print(f"Serial: {stats['bytes']} bytes, {stats['frames']} frames, {stats['crc_errors']} CRC errors, "
+              f"{stats['malformed']} malformed, {stats['bytes_discarded']} bytes discarded")
         if 'arduino' in locals() and arduino.is_open:
             arduino.write(bytes([0]))
             time.sleep(0.5)
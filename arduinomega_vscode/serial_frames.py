@@ -0,0 +1,134 @@
+# File: serial_frames.py
+# Streaming parser for the Mega's sensor packets. Bytes from the serial port
+# go into one bytearray and every complete packet is cut out per read, so
+# the buffer never grows when the Mega sends faster than we loop.
+#
+# Text frames (the default firmware format):  S<angle>,<fsr0>,...,<fsr7>E\r\n
+# Binary frames (BINARY_FRAMES in arduino_mega_code.ino):
+#   0xAA 0x55 <length> <payload: 9 x uint16 little-endian> <CRC-8 of length + payload>
+
+SYNC = b'\xaa\x55'
+VALUES_PER_FRAME = 9  # servo angle + 8 FSRs
+BINARY_PAYLOAD_LENGTH = 2 * VALUES_PER_FRAME
+# A text frame is at most "S100," + 8 * "1023," = 45 bytes; anything longer without an 'E' is garbage.
+MAX_TEXT_FRAME = 64
+
+
+def _make_crc8_table(poly=0x07):
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return table
+
+_CRC8_TABLE = _make_crc8_table()
+
+
+def crc8(data):
+    """CRC-8 (polynomial 0x07, init 0), the same as crc8() in arduino_mega_code.ino."""
+    crc = 0
+    for byte in data:
+        crc = _CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+class SerialFrameParser:
+    """
+    Turns raw serial bytes into frames of VALUES_PER_FRAME ints.
+    feed() returns every frame completed by the new bytes, oldest first; the
+    caller logs all of them and controls on the last one.
+    """
+    def __init__(self, binary=False):
+        self.binary = binary
+        self._buffer = bytearray()
+        # --- Counters ---
+        self.bytes_received = 0
+        self.frames = 0
+        self.crc_errors = 0
+        self.malformed = 0
+        self.bytes_discarded = 0
+
+    def feed(self, data):
+        self.bytes_received += len(data)
+        self._buffer += data
+        if self.binary:
+            return self._drain_binary()
+        return self._drain_text()
+
+    def _discard(self, count):
+        self.bytes_discarded += count
+        del self._buffer[:count]
+
+    def _drain_text(self):
+        buffer = self._buffer
+        frames = []
+        position = 0
+        while True:
+            start = buffer.find(b'S', position)
+            if start < 0:
+                start = len(buffer)
+            # Bytes between frames should only be the "\r\n" from println().
+            self.bytes_discarded += len(bytes(buffer[position:start]).strip())
+            position = start
+            if start == len(buffer):
+                break
+            end = buffer.find(b'E', start + 1)
+            if end < 0:
+                if len(buffer) - start > MAX_TEXT_FRAME:
+                    # Lost an 'E': drop this 'S' and resync on the next one.
+                    self.malformed += 1
+                    self.bytes_discarded += 1
+                    position = start + 1
+                    continue
+                break
+            try:
+                values = [int(v) for v in bytes(buffer[start + 1:end]).split(b',')]
+            except ValueError:
+                values = None
+            if values is not None and len(values) == VALUES_PER_FRAME:
+                frames.append(values)
+                self.frames += 1
+            else:
+                self.malformed += 1
+                self.bytes_discarded += end + 1 - start
+            position = end + 1
+        del buffer[:position]
+        return frames
+
+    def _drain_binary(self):
+        buffer = self._buffer
+        frames = []
+        while True:
+            start = buffer.find(SYNC)
+            if start < 0:
+                # Keep a trailing 0xAA, it may be the first half of the next sync.
+                keep = 1 if buffer[-1:] == SYNC[:1] else 0
+                self._discard(len(buffer) - keep)
+                return frames
+            if start:
+                self._discard(start)
+            if len(buffer) < 3:
+                return frames
+            length = buffer[2]
+            if length != BINARY_PAYLOAD_LENGTH:
+                self.malformed += 1
+                self._discard(1)
+                continue
+            frame_end = 3 + length + 1
+            if len(buffer) < frame_end:
+                return frames
+            if crc8(buffer[2:3 + length]) != buffer[3 + length]:
+                # Probably a false sync inside another frame's payload: skip one byte and resync.
+                self.crc_errors += 1
+                self._discard(1)
+                continue
+            payload = buffer[3:3 + length]
+            frames.append([payload[i] | (payload[i + 1] << 8) for i in range(0, length, 2)])
+            self.frames += 1
+            del buffer[:frame_end]
+
+    def stats(self):
+        return {"bytes": self.bytes_received, "frames": self.frames, "crc_errors": self.crc_errors,
+                "malformed": self.malformed, "bytes_discarded": self.bytes_discarded}
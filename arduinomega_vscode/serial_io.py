@@ -0,0 +1,167 @@
+# File: serial_io.py
+# Serial I/O for main_mega.py, kept off the pygame loop:
+#   SerialReader  - blocking reader thread, timestamps each frame on arrival
+#   AngleWriter   - sends a target angle only when it changes
+#   ControlLoop   - runs a step function at a fixed rate on its own thread
+# plus a jitter report for the read-to-write latency.
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Number of latency / period samples kept for the jitter report.
+STATS_WINDOW = 20000
+
+
+class SerialReader:
+    """
+    Reads the port on its own thread. Each frame completed by a read gets that
+    read's perf_counter_ns() timestamp, is passed to on_frame (for logging)
+    and becomes the newest frame returned by latest().
+    """
+    def __init__(self, arduino, parser, on_frame=None):
+        self.arduino = arduino
+        self.parser = parser
+        self.on_frame = on_frame
+        self._lock = threading.Lock()
+        self._latest = None  # (frame, arrival_ns, sequence number)
+        self._sequence = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._thread.start()
+
+    def _read_loop(self):
+        while self._running:
+            # Blocks for the first byte (up to the port timeout), then takes whatever else is waiting.
+            data = self.arduino.read(max(1, self.arduino.in_waiting))
+            if not data:
+                continue
+            arrival_ns = time.perf_counter_ns()
+            frames = self.parser.feed(data)
+            if not frames:
+                continue
+            if self.on_frame:
+                for frame in frames:
+                    self.on_frame(frame, arrival_ns)
+            with self._lock:
+                self._sequence += len(frames)
+                self._latest = (frames[-1], arrival_ns, self._sequence)
+
+    def latest(self):
+        """The newest (frame, arrival_ns, sequence) or None before the first frame."""
+        with self._lock:
+            return self._latest
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+
+class AngleWriter:
+    """
+    Writes target angles as single bytes, skipping repeats. For every write the
+    time since the frame that produced it arrived is recorded.
+    """
+    def __init__(self, arduino):
+        self.arduino = arduino
+        self.last_angle = None
+        self.writes = 0
+        self.skipped = 0
+        self.latencies_ns = deque(maxlen=STATS_WINDOW)
+
+    def write(self, angle, source_arrival_ns=None):
+        if angle == self.last_angle:
+            self.skipped += 1
+            return False
+        self.arduino.write(bytes([angle]))
+        if source_arrival_ns is not None:
+            self.latencies_ns.append(time.perf_counter_ns() - source_arrival_ns)
+        self.last_angle = angle
+        self.writes += 1
+        return True
+
+
+class ControlLoop:
+    """
+    Calls step() every 1/rate_hz seconds on a thread, on absolute deadlines so
+    errors do not accumulate. A deadline is missed when step() is still running
+    when the next tick is due; the lost ticks are skipped, not bunched up.
+    """
+    def __init__(self, step, rate_hz):
+        self.step = step
+        self.period_ns = int(1e9 / rate_hz)
+        self.ticks = 0
+        self.missed_deadlines = 0
+        self.skipped_ticks = 0
+        self.worst_overrun_ns = 0
+        self.period_errors_ns = deque(maxlen=STATS_WINDOW)
+        self.lateness_ns = deque(maxlen=STATS_WINDOW)  # tick start - its deadline
+        self.step_ns = deque(maxlen=STATS_WINDOW)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        next_tick = time.perf_counter_ns()
+        last_tick = None
+        while not self._stop.is_set():
+            now = time.perf_counter_ns()
+            self.lateness_ns.append(now - next_tick)
+            if last_tick is not None:
+                self.period_errors_ns.append(now - last_tick - self.period_ns)
+            last_tick = now
+            self.step()
+            done = time.perf_counter_ns()
+            self.step_ns.append(done - now)
+            self.ticks += 1
+            next_tick += self.period_ns
+            remaining = next_tick - done
+            if remaining < 0:
+                # Overran: skip the lost ticks instead of bursting to catch up.
+                self.missed_deadlines += 1
+                self.worst_overrun_ns = max(self.worst_overrun_ns, -remaining)
+                lost = -remaining // self.period_ns + 1
+                self.skipped_ticks += lost
+                next_tick += lost * self.period_ns
+                remaining = next_tick - done
+            self._stop.wait(remaining / 1e9)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+
+def _percentiles_ms(samples_ns):
+    values = np.asarray(samples_ns, dtype=np.float64) / 1e6
+    return np.percentile(values, [50, 95, 99]).tolist() + [values.max()]
+
+
+def print_jitter_report(loop, writer):
+    print("\n--- Serial Timing Report ---")
+    print(f"Control loop: {loop.ticks} ticks at {1e9 / loop.period_ns:.0f} Hz, {loop.missed_deadlines} missed deadlines "
+          f"({100 * loop.missed_deadlines / max(loop.ticks, 1):.2f}%), {loop.skipped_ticks} ticks skipped, "
+          f"worst overrun {loop.worst_overrun_ns / 1e6:.3f} ms")
+    if loop.period_errors_ns:
+        p50, p95, p99, worst = _percentiles_ms(np.abs(loop.period_errors_ns))
+        print(f"  period jitter   p50 {p50:.3f}  p95 {p95:.3f}  p99 {p99:.3f}  max {worst:.3f} ms")
+    if loop.lateness_ns:
+        p50, p95, p99, worst = _percentiles_ms(np.maximum(loop.lateness_ns, 0))
+        print(f"  tick lateness   p50 {p50:.3f}  p95 {p95:.3f}  p99 {p99:.3f}  max {worst:.3f} ms")
+        p50, p95, p99, worst = _percentiles_ms(loop.step_ns)
+        print(f"  step duration   p50 {p50:.3f}  p95 {p95:.3f}  p99 {p99:.3f}  max {worst:.3f} ms")
+    print(f"Writer: {writer.writes} angle writes, {writer.skipped} unchanged angles not sent")
+    if writer.latencies_ns:
+        p50, p95, p99, worst = _percentiles_ms(writer.latencies_ns)
+        print(f"  read-to-write   p50 {p50:.3f}  p95 {p95:.3f}  p99 {p99:.3f}  max {worst:.3f} ms")
+    print("----------------------------\n")
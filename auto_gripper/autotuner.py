@@ -0,0 +1,380 @@
+# filename: autotuner.py
+# Autotuner for main_controller's grasp PID.
+# Drives the gripper through server.py with PULSE1: commands (using data_logger's
+# network client and ForceMeasurement path), or a local stand-in plant that
+# speaks the same protocol. It then:
+#   1. runs a relay (Astrom-Hagglund) or step experiment around the target force,
+#   2. identifies the ultimate gain/period (relay) or a first-order-plus-dead-time
+#      model (step),
+#   3. derives PI gains that settle without overshoot (Tyreus-Luyben from Ku/Pu,
+#      SIMC with Ti = tau from FOPDT) and converts them to main_controller's KP/KI/KD,
+#   4. runs one grasp from open with those gains through main_controller's own
+#      GraspStateMachine (approach, contact hand-over, force PID, HOLDING test)
+#      on the live packets, and reports the time to HOLDING and the overshoot.
+# Usage: place an object in the gripper, start server.py (unless PLANT is
+# "simulator"), then run: python autotuner.py
+
+import asyncio
+import math
+import queue
+import threading
+import time
+import numpy as np
+import data_logger as logger
+from data_logger import ForceMeasurement
+from main_controller import (GraspStateMachine, GripperState, TARGET_FORCES,
+                             SERVO_OPEN_PULSE, SERVO_MAX_CLOSE_PULSE, SERVO_STEP_SIZE)
+
+# --- CONFIGURATION ---
+PLANT = "gripper"  # "gripper" talks to server.py; "simulator" runs SimulatedGripper locally
+TUNE_METHOD = "relay"  # "relay" or "step"
+TARGET_OBJECT = "default"  # Key of TARGET_FORCES to tune around
+SAMPLE_PERIOD = 0.02  # One control step per ESP32 packet, as in main_controller
+
+# Approach: close fast until contact, then in small steps, each only once the
+# force has stopped rising, until APPROACH_FRACTION of the target.
+CONTACT_FORCE = 50
+APPROACH_FAST_STEP = 1.0  # Pulses per sample before contact
+APPROACH_SLOW_STEP = 1.0  # Pulses per step after contact
+APPROACH_SETTLE_WINDOW = 0.5  # Seconds over which the force must have risen less than...
+APPROACH_SETTLED_RISE = 20  # ...this many force units before the next step
+APPROACH_FRACTION = 0.6
+OPEN_TIMEOUT = 10.0
+
+# Relay experiment
+RELAY_AMPLITUDE = 15  # Pulses above / below the bias
+RELAY_HYSTERESIS = 20  # Force units around the target
+RELAY_CYCLES = 4  # Cycles measured after the bias has settled
+RELAY_STUCK_SECONDS = 3.0  # No switch for this long moves the bias by RELAY_AMPLITUDE
+RELAY_TIMEOUT = 60.0
+
+# Step experiment
+STEP_PULSES = 20
+STEP_SETTLE_SECONDS = 5.0
+STEP_RECORD_SECONDS = 10.0
+
+MIN_CLOSED_LOOP_TC = 0.2  # Seconds; SIMC closed-loop time constant = max(dead time, this)
+GRASP_TIMEOUT = 40.0  # Free travel to contact is slow with integral-only closing
+HOLD_CHECK_SECONDS = 3.0  # Keep measuring after HOLDING to catch overshoot
+
+# Stand-in plant: the 'firm' fit printed by pid_tuner.py
+SIM_PLANT = {"contact_pulse": 1680, "stiffness": 193, "exponent": 0.5, "tau": 1.61, "dead_time": 0.0}
+SIM_NOISE = 15.0  # Std of each simulated FSR reading
+SIM_REST_NOISE = 1.0  # ...and while nothing touches the claws (the logs show 0-2 at rest)
+
+
+class AutotuneAborted(Exception):
+    pass
+
+
+class SimulatedGripper:
+    """
+    Local stand-in for the ESP32 + servo + object: applies PULSE1: commands
+    from the outgoing queue to the pid_tuner plant model and puts ESP32-style
+    packets ("pot1,pot2,fsr1..fsr8") on the incoming queue every packet period.
+    start() paces it in real time; replay_harness.py calls step() itself on
+    a virtual clock instead.
+    """
+    def __init__(self, out_q, in_q, plant=SIM_PLANT, noise=SIM_NOISE, rest_noise=SIM_REST_NOISE, period=SAMPLE_PERIOD, seed=None):
+        self.out_q = out_q
+        self.in_q = in_q
+        self.plant = plant
+        self.noise = noise
+        self.rest_noise = rest_noise
+        self.period = period
+        self.rng = np.random.default_rng(seed)
+        self._commands = [(-math.inf, float(SERVO_OPEN_PULSE))]  # (time, pulse) history for the dead time
+        self._state = 0.0
+        self._last = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        while not self._stop.wait(self.period):
+            self.step(time.monotonic())
+
+    def step(self, now):
+        """Applies the commands sent so far, moves the plant on to `now` and sends one packet; returns the force."""
+        plant = self.plant
+        while True:
+            try:
+                command = self.out_q.get_nowait()
+            except queue.Empty:
+                break
+            if command.startswith("PULSE1:"):
+                self._commands.append((now, float(command.split(':')[1])))
+        # The pulse acting now is the newest one older than the dead time.
+        while len(self._commands) > 1 and self._commands[1][0] <= now - plant["dead_time"]:
+            self._commands.pop(0)
+        drive = max(0.0, self._commands[0][1] - plant["contact_pulse"]) ** plant["exponent"]
+        if self._last is not None:
+            decay = math.exp(-(now - self._last) / plant["tau"])
+            self._state = decay * self._state + (1 - decay) * drive
+        self._last = now
+        force = plant["stiffness"] * self._state
+        noise = self.noise if force > 1.0 else self.rest_noise
+        fsr = np.clip(np.round(force + self.rng.normal(0, noise, 8)), 0, 4095).astype(int)
+        self.in_q.put("0,0," + ",".join(map(str, fsr)))
+        return force
+
+
+class Experiment:
+    """Sends pulses and samples the force once per SAMPLE_PERIOD, recording both."""
+    def __init__(self, out_q, measurement, stop_event):
+        self.out_q = out_q
+        self.measurement = measurement
+        self.stop_event = stop_event
+        self.pulse = float(SERVO_OPEN_PULSE)
+        self.force = 0.0
+        self.times, self.pulses, self.forces = [], [], []
+        self._next = time.monotonic()
+
+    def send(self, pulse):
+        self.pulse = max(SERVO_OPEN_PULSE, min(SERVO_MAX_CLOSE_PULSE, pulse))
+        self.out_q.put(f"PULSE1:{int(self.pulse)}")
+
+    def sample(self):
+        """Waits for the next sample time and returns the newest force (the last one if no packet came)."""
+        if self.stop_event.is_set():
+            raise AutotuneAborted("Connection closed.")
+        self._next += SAMPLE_PERIOD
+        time.sleep(max(0.0, self._next - time.monotonic()))
+        reading = self.measurement.read()
+        if reading:
+            self.force = reading[0]
+        if self.force > logger.LOGGING_MAX_FORCE:
+            self.send(SERVO_OPEN_PULSE)
+            raise AutotuneAborted(f"Safety limit reached ({self.force:.0f} > {logger.LOGGING_MAX_FORCE}).")
+        self.times.append(time.monotonic())
+        self.pulses.append(self.pulse)
+        self.forces.append(self.force)
+        return self.force
+
+    def approach(self, force_goal):
+        """Closes until the force reaches force_goal."""
+        window = int(APPROACH_SETTLE_WINDOW / SAMPLE_PERIOD)
+        last_step = len(self.forces)
+        while self.sample() < force_goal:
+            if self.pulse >= SERVO_MAX_CLOSE_PULSE:
+                raise AutotuneAborted("Gripper fully closed without reaching the force. Is an object in place?")
+            if self.force <= CONTACT_FORCE:
+                self.send(self.pulse + APPROACH_FAST_STEP)
+                last_step = len(self.forces)
+            elif (len(self.forces) - last_step >= window
+                  and self.forces[-1] - self.forces[-window] < APPROACH_SETTLED_RISE):
+                self.send(self.pulse + APPROACH_SLOW_STEP)
+                last_step = len(self.forces)
+
+    def open(self, settle=1.0):
+        """Opens and waits at least `settle` seconds and until the force is back below CONTACT_FORCE."""
+        self.send(SERVO_OPEN_PULSE)
+        start = time.monotonic()
+        while True:
+            force = self.sample()
+            elapsed = time.monotonic() - start
+            if elapsed >= settle and force <= CONTACT_FORCE:
+                return
+            if elapsed > OPEN_TIMEOUT:
+                raise AutotuneAborted("Force did not drop after opening.")
+
+
+def relay_experiment(exp, target):
+    """
+    Relay with hysteresis around the target force. The relay bias starts at the
+    approach pulse and is re-centred every cycle from the high/low durations,
+    so the oscillation ends up centred on the target. Returns the ultimate
+    gain (pulses per force unit) and period from the last RELAY_CYCLES cycles.
+    """
+    exp.approach(APPROACH_FRACTION * target)
+    bias = exp.pulse
+    high = True
+    switches = []  # Times of low -> high switches
+    last_switch = time.monotonic()
+    start = time.monotonic()
+    while len(switches) < RELAY_CYCLES + 3:
+        if time.monotonic() - start > RELAY_TIMEOUT:
+            raise AutotuneAborted("Relay did not oscillate. Try a larger RELAY_AMPLITUDE.")
+        error = target - exp.sample()
+        if time.monotonic() - last_switch > RELAY_STUCK_SECONDS:
+            # Both relay levels are on the same side of the target: move the bias toward it.
+            bias += RELAY_AMPLITUDE if high else -RELAY_AMPLITUDE
+            last_switch = time.monotonic()
+            switches.clear()
+        if high and error < -RELAY_HYSTERESIS:
+            high = False
+            high_time = time.monotonic() - last_switch
+            last_switch = time.monotonic()
+        elif not high and error > RELAY_HYSTERESIS:
+            high = True
+            now = time.monotonic()
+            low_time = now - last_switch
+            last_switch = now
+            if switches:
+                # Re-centre: more time high than low means the bias is too low.
+                bias += RELAY_AMPLITUDE * (high_time - low_time) / (high_time + low_time)
+            switches.append((now, len(exp.forces)))
+        exp.send(bias + (RELAY_AMPLITUDE if high else -RELAY_AMPLITUDE))
+    # Measure on the last RELAY_CYCLES cycles only.
+    (t0, i0), (t1, i1) = switches[-RELAY_CYCLES - 1], switches[-1]
+    period = (t1 - t0) / RELAY_CYCLES
+    forces = np.array(exp.forces[i0:i1])
+    amplitude = (forces.max() - forces.min()) / 2
+    # Describing function of a relay with hysteresis.
+    ultimate_gain = 4 * RELAY_AMPLITUDE / (math.pi * math.sqrt(max(amplitude ** 2 - RELAY_HYSTERESIS ** 2, 1e-6)))
+    return {"ultimate_gain": ultimate_gain, "ultimate_period": period, "amplitude": amplitude, "operating_pulse": bias}
+
+
+def step_experiment(exp, target):
+    """Settles at APPROACH_FRACTION of the target, steps the pulse by STEP_PULSES and fits FOPDT (two-point method)."""
+    exp.approach(APPROACH_FRACTION * target)
+    base_pulse = exp.pulse
+    for _ in range(int(STEP_SETTLE_SECONDS / SAMPLE_PERIOD)):
+        exp.sample()
+    tail = int(1.0 / SAMPLE_PERIOD)
+    baseline = float(np.mean(exp.forces[-tail:]))
+    exp.send(base_pulse + STEP_PULSES)
+    start, first = time.monotonic(), len(exp.forces)
+    for _ in range(int(STEP_RECORD_SECONDS / SAMPLE_PERIOD)):
+        exp.sample()
+    times = np.array(exp.times[first:]) - start
+    response = (np.array(exp.forces[first:]) - baseline)
+    final = float(np.mean(response[-tail:]))
+    if final <= 0:
+        raise AutotuneAborted("No force change after the step. Try a larger STEP_PULSES.")
+    normalized = response / final
+    t28 = times[np.argmax(normalized >= 0.283)]
+    t63 = times[np.argmax(normalized >= 0.632)]
+    tau = 1.5 * (t63 - t28)
+    return {"gain": final / STEP_PULSES, "tau": tau, "dead_time": max(0.0, t63 - tau),
+            "operating_pulse": base_pulse}
+
+
+def controller_gains(model, sample_period=SAMPLE_PERIOD):
+    """
+    PI on the servo pulse: Tyreus-Luyben (Kc = Ku / 3.2, Ti = 2.2 Pu) for a
+    relay result, SIMC with Ti = tau (first-order closed loop, so no setpoint
+    overshoot; Kc = tau / (K (tc + theta))) for an FOPDT model.
+    main_controller integrates the PID output into the pulse
+    (pulse += output * SERVO_STEP_SIZE per sample), so a PI on the pulse is
+    KD = Kc * Ts / STEP (proportional part) and KP = KD / Ti (integral part).
+    """
+    if "ultimate_gain" in model:
+        kc = model["ultimate_gain"] / 3.2
+        ti = 2.2 * model["ultimate_period"]
+    else:
+        closed_loop_tc = max(model["dead_time"], MIN_CLOSED_LOOP_TC)
+        kc = model["tau"] / (model["gain"] * (closed_loop_tc + model["dead_time"]))
+        ti = max(model["tau"], sample_period)
+    kd = kc * sample_period / SERVO_STEP_SIZE
+    return {"Kp": kd / ti, "Ki": 0.0, "Kd": kd, "Kc": kc, "Ti": ti}
+
+
+def validation_grasp(exp, obj, gains):
+    """
+    One grasp of `obj` from open with the tuned gains, run by main_controller's
+    GraspStateMachine on every live packet (its PULSE1: commands go to the
+    gripper, the rest is dropped). Overshoot is the peak of the engine's own
+    overall force (its DATA: messages) above the target, up to HOLD_CHECK_SECONDS
+    after HOLDING. Returns (time to HOLDING, overshoot).
+    """
+    exp.open()
+    forces = []
+
+    def send(message):
+        if message.startswith("PULSE1:"):
+            exp.send(float(message.split(':')[1]))
+        elif message.startswith("DATA:"):
+            forces.append(float(message.split(',')[-1]))
+
+    engine = GraspStateMachine(send=send, log=lambda message: None)
+    engine.pid.Kp, engine.pid.Ki, engine.pid.Kd = gains["Kp"], gains["Ki"], gains["Kd"]
+    engine.start()
+    engine.handle(f"OBJECT:{obj}")
+    engine.handle("CMD:GRASP")
+    start = time.monotonic()
+    time_to_holding = None
+    try:
+        while time.monotonic() - start < GRASP_TIMEOUT + HOLD_CHECK_SECONDS:
+            if exp.stop_event.is_set():
+                raise AutotuneAborted("Connection closed.")
+            try:
+                packet = exp.measurement.in_q.get(timeout=SAMPLE_PERIOD)
+            except queue.Empty:
+                engine.advance()
+                continue
+            engine.handle(packet, time.monotonic())
+            if forces and forces[-1] > logger.LOGGING_MAX_FORCE:
+                raise AutotuneAborted(f"Safety limit reached ({forces[-1]:.0f} > {logger.LOGGING_MAX_FORCE}).")
+            if time_to_holding is None and engine.gripper_state == GripperState.HOLDING:
+                time_to_holding = time.monotonic() - start
+            if time_to_holding is None and time.monotonic() - start > GRASP_TIMEOUT:
+                break
+            if time_to_holding is not None and time.monotonic() - start > time_to_holding + HOLD_CHECK_SECONDS:
+                break
+    finally:
+        engine.handle("CMD:RELEASE")
+    exp.open()
+    return time_to_holding, max(forces, default=0.0) - engine.target_force
+
+
+def autotune(target):
+    measurement = ForceMeasurement(logger.incoming_queue)
+    exp = Experiment(logger.outgoing_queue, measurement, logger.shutdown_event)
+    start = time.monotonic()
+    exp.open()
+    model = relay_experiment(exp, target) if TUNE_METHOD == "relay" else step_experiment(exp, target)
+    experiment_time = time.monotonic() - start
+    gains = controller_gains(model)
+    exp.open()
+
+    print(f"\n--- Autotune ({TUNE_METHOD}, target {target}) ---")
+    if "ultimate_gain" in model:
+        print(f"Relay:   Ku = {model['ultimate_gain']:.4g} pulse/force, Pu = {model['ultimate_period']:.2f} s, "
+              f"amplitude {model['amplitude']:.0f} (around pulse {model['operating_pulse']:.0f})")
+    else:
+        print(f"FOPDT:   K = {model['gain']:.3g} force/pulse, tau = {model['tau']:.2f} s, "
+              f"dead time = {model['dead_time']:.2f} s (around pulse {model['operating_pulse']:.0f})")
+    print(f"PI:      Kc = {gains['Kc']:.4g} pulse/force, Ti = {gains['Ti']:.2f} s")
+    print(f"Gains:   KP = {gains['Kp']:.4g}, KI = {gains['Ki']:.4g}, KD = {gains['Kd']:.4g}")
+    print(f"Runtime: {experiment_time:.1f} s of experiment ({len(exp.forces)} samples)")
+
+    time_to_holding, overshoot = validation_grasp(exp, TARGET_OBJECT, gains)
+    if time_to_holding is None:
+        print(f"Check:   HOLDING not reached within {GRASP_TIMEOUT:.0f} s")
+    else:
+        print(f"Check:   HOLDING after {time_to_holding:.2f} s, peak {overshoot:+.0f} vs. target")
+    print(f"Total:   {time.monotonic() - start:.1f} s")
+    print("---------------------------------------\n")
+    return gains
+
+
+if __name__ == "__main__":
+    target = TARGET_FORCES.get(TARGET_OBJECT, TARGET_FORCES["default"])
+    if PLANT == "simulator":
+        plant = SimulatedGripper(logger.outgoing_queue, logger.incoming_queue)
+        plant.start()
+    else:
+        print("\n[Autotuner] Place the object in the gripper.")
+        input("[Autotuner] Press Enter to start...")
+        network = threading.Thread(target=lambda: asyncio.run(logger.websocket_client_thread()), daemon=True)
+        network.start()
+        time.sleep(1)
+    try:
+        autotune(target)
+    except AutotuneAborted as e:
+        print(f"[Autotuner] Aborted: {e}")
+        logger.outgoing_queue.put(f"PULSE1:{SERVO_OPEN_PULSE}")
+    except KeyboardInterrupt:
+        print("\n[Autotuner] Stopped by user.")
+        logger.outgoing_queue.put(f"PULSE1:{SERVO_OPEN_PULSE}")
+    time.sleep(0.5)  # Let the last command go out
+    logger.shutdown_event.set()
+    if PLANT == "simulator":
+        plant.stop()
@@ -0,0 +1,154 @@
+# filename: camera_snapshot.py
+# On-demand camera client: instead of holding the /stream open (which keeps
+# the ESP32-CAM pushing frames over Wi-Fi all the time), it fetches a single
+# JPEG from /capture whenever a recognition is actually wanted.
+import http.client
+import time
+import urllib.parse
+import numpy as np
+from mjpeg_stream import decode_jpeg
+
+# --- CONFIGURATION ---
+# /capture and /control live on the camera's main web server (port 80);
+# /stream is on port 81.
+ESP32_CAMERA_BASE_URL = "http://192.168.1.200"
+REQUEST_TIMEOUT = 3.0
+
+# framesize_t values from esp32-camera's sensor.h and their resolutions.
+FRAMESIZE_DIMENSIONS = {
+    0: (96, 96), 1: (160, 120), 2: (176, 144), 3: (240, 176), 4: (240, 240),
+    5: (320, 240), 6: (400, 296), 7: (480, 320), 8: (640, 480), 9: (800, 600),
+    10: (1024, 768), 11: (1280, 720), 12: (1280, 1024), 13: (1600, 1200),
+}
+
+
+def smallest_framesize(min_size, aspect_ratio=4 / 3):
+    """
+    Returns the framesize_t with the fewest pixels that still covers
+    min_size=(w, h). Only sizes with the training images' 4:3 aspect ratio are
+    considered, because the square and widescreen modes crop the sensor and
+    show the model a different field of view.
+    """
+    fitting = [(w * h, value) for value, (w, h) in FRAMESIZE_DIMENSIONS.items()
+               if w >= min_size[0] and h >= min_size[1] and abs(w / h - aspect_ratio) < 0.02]
+    return min(fitting)[1] if fitting else max(FRAMESIZE_DIMENSIONS)
+
+
+class SnapshotCamera:
+    """
+    Fetches single JPEGs from the ESP32-CAM's /capture endpoint over one
+    persistent HTTP/1.1 connection, reconnecting once if the camera dropped it.
+    On start() the sensor is switched to the smallest frame size that still
+    covers `min_size`, so every snapshot is as small as it can be.
+    """
+    def __init__(self, base_url=ESP32_CAMERA_BASE_URL, min_size=(224, 224), timeout=REQUEST_TIMEOUT):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.min_size = min_size
+        self.timeout = timeout
+        self.framesize = smallest_framesize(min_size)
+        self._connection = None
+        self._opened = False
+        # Statistics
+        self.requests = 0
+        self.reconnects = 0
+        self.bytes_received = 0
+        self.latencies = []
+        self.frames_decoded = 0
+        self.decode_seconds = 0.0
+
+    def _request(self, path):
+        """GET over the kept-alive connection. Returns (status, body)."""
+        for attempt in range(2):
+            if self._connection is None:
+                self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                if self.requests:
+                    self.reconnects += 1
+            try:
+                self._connection.request("GET", path, headers={"Connection": "keep-alive"})
+                response = self._connection.getresponse()
+                body = response.read()
+                self.requests += 1
+                if response.getheader("Connection", "").lower() == "close":
+                    self._connection.close()
+                    self._connection = None
+                return response.status, body
+            except (OSError, http.client.HTTPException):
+                self._connection.close()
+                self._connection = None
+                if attempt:
+                    raise
+
+    def start(self):
+        """Connects and sets the frame size. Returns False if the camera is unreachable."""
+        try:
+            status, _ = self._request(f"/control?var=framesize&val={self.framesize}")
+        except (OSError, http.client.HTTPException) as e:
+            print(f"[Snapshot] Could not reach camera at {self.host}:{self.port}: {e}")
+            return False
+        if status != 200:
+            print(f"[Snapshot] Camera refused framesize {self.framesize} (HTTP {status}).")
+            return False
+        width, height = FRAMESIZE_DIMENSIONS[self.framesize]
+        print(f"[Snapshot] Camera set to {width}x{height} (framesize {self.framesize}).")
+        self._opened = True
+        return True
+
+    def isOpened(self):
+        return self._opened
+
+    def read_jpeg(self):
+        """Fetches one fresh JPEG. Returns the bytes or None on failure."""
+        start = time.perf_counter()
+        try:
+            status, body = self._request("/capture")
+        except (OSError, http.client.HTTPException) as e:
+            print(f"[Snapshot] Capture failed: {e}")
+            return None
+        if status != 200 or body[:2] != b"\xff\xd8":
+            print(f"[Snapshot] Capture failed (HTTP {status}).")
+            return None
+        self.latencies.append(time.perf_counter() - start)
+        self.bytes_received += len(body)
+        return body
+
+    def read(self, min_size=None):
+        """cv2.VideoCapture-style (ok, frame) read of a fresh snapshot."""
+        jpeg = self.read_jpeg()
+        if jpeg is None:
+            return False, None
+        start = time.perf_counter()
+        frame = decode_jpeg(jpeg, min_size or self.min_size)
+        self.decode_seconds += time.perf_counter() - start
+        self.frames_decoded += 1
+        return frame is not None, frame
+
+    def print_stats(self):
+        if not self.latencies:
+            print("[Snapshot] No snapshots taken.")
+            return
+        latencies_ms = 1000 * np.array(self.latencies)
+        print(f"[Snapshot] {len(latencies_ms)} snapshots, {self.bytes_received / len(latencies_ms) / 1024:.1f} KiB each, "
+              f"latency mean {latencies_ms.mean():.1f} ms / p95 {np.percentile(latencies_ms, 95):.1f} ms, "
+              f"decode {1000 * self.decode_seconds / max(self.frames_decoded, 1):.2f} ms, "
+              f"{self.reconnects} reconnects")
+
+    def release(self):
+        self._opened = False
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+if __name__ == "__main__":
+    # Snapshot latency benchmark. Point it at fake_camera_server.py to run offline:
+    #   python fake_camera_server.py   (in another terminal)
+    #   python camera_snapshot.py http://localhost:8080
+    import sys
+    camera = SnapshotCamera(sys.argv[1] if len(sys.argv) > 1 else ESP32_CAMERA_BASE_URL)
+    if camera.start():
+        for _ in range(100):
+            camera.read()
+        camera.print_stats()
+        camera.release()
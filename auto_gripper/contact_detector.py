@@ -0,0 +1,71 @@
+# filename: contact_detector.py
+# First-contact detection for one claw, from its MultivariateKalmanFilter.
+import numpy as np
+
+
+class ContactDetector:
+    """
+    Watches one claw's Kalman filter while the gripper closes through free
+    space and reports the first sample at which the claw touches the object.
+    Contact is declared when, for `confirm` samples in a row, either
+      - "derivative": the filtered force rises faster than `rate` per second, or
+      - "innovation": the readings sit above the filter's prediction by more
+        than `innovation_sigma` predicted standard deviations (the mean
+        innovation over the claw's sensors, normalised by sqrt(1' S 1) / n),
+    or, as a fallback, when the filtered force rises through `force`.
+
+    The innovation reacts on the first raw sample that departs from the
+    prediction, before the filtered force (and so its derivative) has
+    moved; the derivative catches slow contacts whose individual samples
+    stay within the noise.
+    """
+    def __init__(self, rate=250.0, innovation_sigma=6.0, force=50.0, confirm=2):
+        """
+        Args:
+            rate (float): Force rise per second that counts as contact.
+            innovation_sigma (float): Innovation threshold in predicted standard deviations.
+            force (float): Filtered force that counts as contact on its own.
+            confirm (int): Consecutive samples a rate or innovation condition must hold.
+        """
+        self.rate = rate
+        self.innovation_sigma = innovation_sigma
+        self.force = force
+        self.confirm = confirm
+        self._last_force = None
+        self._last_time = None
+        self.reset()
+
+    def reset(self):
+        """Starts watching for a new contact; keeps the last sample so the derivative continues."""
+        self._rising = 0
+        self._surprised = 0
+        self._armed = False
+
+    def update(self, kf, timestamp):
+        """
+        Call after every kf.update(). Returns "derivative", "innovation" or
+        "force" on a contact sample, otherwise None.
+        """
+        force = float(kf.x_hat[0, 0])
+        rate = 0.0
+        if self._last_time is not None and timestamp > self._last_time:
+            rate = (force - self._last_force) / (timestamp - self._last_time)
+        self._last_force = force
+        self._last_time = timestamp
+
+        n = kf.innovation.shape[0]
+        mean_innovation = float(kf.innovation.sum()) / n
+        predicted_std = np.sqrt(float(kf.innovation_cov.sum())) / n
+        self._rising = self._rising + 1 if rate > self.rate else 0
+        self._surprised = self._surprised + 1 if mean_innovation > self.innovation_sigma * predicted_std else 0
+
+        # The force fallback needs a crossing from below, so force left over from the last grasp does not count.
+        if force <= self.force:
+            self._armed = True
+        if self._surprised >= self.confirm:
+            return "innovation"
+        if self._rising >= self.confirm:
+            return "derivative"
+        if self._armed and force > self.force:
+            return "force"
+        return None
@@ -105,6 +105,10 @@ class DashboardApp:
     def _update_ui_state(self, status_msg):
         parts = status_msg.split(':')
         state = parts[1]
+        if state == "SLIP":
+            # An event while holding: the locked object and the buttons stay as they are.
+            self.status_label.configure(text="Slip detected - regripping")
+            return
         self.egg_btn.configure(style='TButton')
         self.pbox_btn.configure(style='TButton')
         self.pbank_btn.configure(style='TButton')
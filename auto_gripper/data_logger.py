@@ -31,6 +31,60 @@ incoming_queue = queue.Queue()
 outgoing_queue = queue.Queue()
 shutdown_event = threading.Event()
 
+class ForceMeasurement:
+    """
+    The logger's measurement path: the newest sensor packet in a queue, run
+    through one Kalman filter per claw, gives the overall (max) claw force.
+    Shared with autotuner.py so both measure force the same way.
+    """
+    def __init__(self, in_q):
+        self.in_q = in_q
+        # --- KALMAN FILTER SETUP (Copied from main_controller.py) ---
+        A = np.array([[1]])
+        H = np.array([[1], [1], [1], [1]])
+        x_hat_initial = np.array([[0]])
+        P_initial = np.array([[100]])
+        Q = np.array([[0.0001]])
+        R = np.diag([0.5, 0.05, 0.05, 0.5])
+        self.kf_left_claw = MultivariateKalmanFilter(A, H, Q, R, x_hat_initial, P_initial)
+        self.kf_right_claw = MultivariateKalmanFilter(A, H, Q, R, x_hat_initial, P_initial)
+        self.is_first_reading = True
+
+    def read(self):
+        """
+        Returns (overall_force, fsr_values) from the most recent packet, or
+        None if no valid packet arrived since the last call.
+        """
+        # Get the latest message, clearing out any old ones
+        raw_packet = ""
+        while not self.in_q.empty():
+            raw_packet = self.in_q.get_nowait()
+        try:
+            all_readings = [int(val) for val in raw_packet.strip().split(',')]
+        except ValueError:
+            return None
+        if len(all_readings) != 10:
+            return None
+
+        # --- MODIFIED: Capture the 8 raw FSR values ---
+        # The FSR readings start from the 3rd element (index 2)
+        fsr_values = all_readings[2:]
+
+        left_z = np.array([[all_readings[i]] for i in LEFT_CLAW_INDICES])
+        right_z = np.array([[all_readings[i]] for i in RIGHT_CLAW_INDICES])
+
+        if self.is_first_reading:
+            left_raw_avg = np.mean([all_readings[i] for i in LEFT_CLAW_INDICES])
+            right_raw_avg = np.mean([all_readings[i] for i in RIGHT_CLAW_INDICES])
+            self.kf_left_claw.x_hat = np.array([[left_raw_avg]])
+            self.kf_right_claw.x_hat = np.array([[right_raw_avg]])
+            self.is_first_reading = False
+
+        left_force = self.kf_left_claw.update(left_z)[0, 0]
+        right_force = self.kf_right_claw.update(right_z)[0, 0]
+        return max(left_force, right_force), fsr_values
+
+
 def logging_controller_thread():
     """
     This thread now actively controls the gripper to perform a step test
@@ -40,16 +94,7 @@ def logging_controller_thread():
     input("[Controller] Press Enter to begin the data logging process...")
     print("[Controller] Starting test...")
 
-    # --- KALMAN FILTER SETUP (Copied from main_controller.py) ---
-    A = np.array([[1]])
-    H = np.array([[1], [1], [1], [1]])
-    x_hat_initial = np.array([[0]])
-    P_initial = np.array([[100]])
-    Q = np.array([[0.0001]])
-    R = np.diag([0.5, 0.05, 0.05, 0.5])
-    kf_left_claw = MultivariateKalmanFilter(A, H, Q, R, x_hat_initial, P_initial)
-    kf_right_claw = MultivariateKalmanFilter(A, H, Q, R, x_hat_initial, P_initial)
-    is_first_reading = True
+    measurement = ForceMeasurement(incoming_queue)
     
     start_time = time.time()
     servo_pulse = 1000
@@ -66,40 +111,9 @@ def logging_controller_thread():
             time.sleep(LOGGING_DELAY)
             
             # 3. Process the most recent sensor reading
-            overall_force = 0
-            # --- MODIFIED: Default fsr_values to a list of 8 zeros ---
-            fsr_values = [0] * 8
-            
-            try:
-                # Get the latest message, clearing out any old ones
-                raw_packet = ""
-                while not incoming_queue.empty():
-                    raw_packet = incoming_queue.get_nowait()
-                
-                all_readings = [int(val) for val in raw_packet.strip().split(',')]
-                
-                if len(all_readings) == 10:
-                    # --- MODIFIED: Capture the 8 raw FSR values ---
-                    # The FSR readings start from the 3rd element (index 2)
-                    fsr_values = all_readings[2:]
-
-                    left_z = np.array([[all_readings[i]] for i in LEFT_CLAW_INDICES])
-                    right_z = np.array([[all_readings[i]] for i in RIGHT_CLAW_INDICES])
-
-                    if is_first_reading:
-                        left_raw_avg = np.mean([all_readings[i] for i in LEFT_CLAW_INDICES])
-                        right_raw_avg = np.mean([all_readings[i] for i in RIGHT_CLAW_INDICES])
-                        kf_left_claw.x_hat = np.array([[left_raw_avg]])
-                        kf_right_claw.x_hat = np.array([[right_raw_avg]])
-                        is_first_reading = False
-
-                    left_force = kf_left_claw.update(left_z)[0, 0]
-                    right_force = kf_right_claw.update(right_z)[0, 0]
-                    overall_force = max(left_force, right_force)
-
-            except (queue.Empty, ValueError, IndexError):
-                # If no data is available or it's malformed, the defaults (0) will be used
-                pass
+            reading = measurement.read()
+            # If no data is available or it's malformed, the defaults (0) will be used
+            overall_force, fsr_values = reading if reading else (0, [0] * 8)
 
             # 4. Log the data point
             current_time = time.time() - start_time
@@ -0,0 +1,232 @@
+# filename: fake_camera_server.py
+# A local stand-in for the ESP32-CAM web server so the camera clients can be
+# tested and benchmarked without the hardware. It serves images from
+# smart_gripper/dataset/<class> (or the frames of a video file) and mimics
+# the firmware's /stream, /capture, /control and /status endpoints
+# (see esp32_cam_code/app_httpd.cpp). The real camera serves /stream on
+# port 81; here everything shares one port.
+import http.server
+import json
+import os
+import threading
+import time
+import urllib.parse
+import cv2
+from camera_snapshot import FRAMESIZE_DIMENSIONS
+
+# --- CONFIGURATION ---
+DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "smart_gripper", "dataset")
+FAKE_CAMERA_PORT = 8080
+FAKE_CAMERA_CLASS = "egg"
+# The firmware switches the sensor to QVGA right after init.
+DEFAULT_FRAMESIZE = 5
+JPEG_QUALITY = 85
+# Frames per second pushed to each /stream client.
+FAKE_CAMERA_FPS = 10.0
+# Play this video (looped) instead of the dataset images, e.g. "gripper_run.mp4".
+FAKE_VIDEO_PATH = None
+# Optional scripted scene: (start_second, class) pairs, e.g.
+# [(0, "background"), (5, "egg"), (15, "paper_box")]. The last class stays on
+# once the script ends. With a video the schedule only labels the frames.
+FAKE_CLASS_SCHEDULE = []
+
+# Multipart framing copied from app_httpd.cpp.
+PART_BOUNDARY = "123456789000000000000987654321"
+_STREAM_CONTENT_TYPE = f"multipart/x-mixed-replace;boundary={PART_BOUNDARY}"
+_STREAM_BOUNDARY = f"\r\n--{PART_BOUNDARY}\r\n".encode()
+_STREAM_PART = "Content-Type: image/jpeg\r\nContent-Length: {}\r\nX-Timestamp: {:.6f}\r\n\r\n"
+
+
+class FakeCamera:
+    """Image source and sensor settings shared by all request handlers."""
+    def __init__(self, dataset_path=DATASET_PATH, object_class=FAKE_CAMERA_CLASS, framesize=DEFAULT_FRAMESIZE,
+                 fps=FAKE_CAMERA_FPS, video_path=FAKE_VIDEO_PATH, schedule=FAKE_CLASS_SCHEDULE):
+        self.dataset_path = dataset_path
+        self.framesize = framesize
+        self.object_class = object_class
+        self.fps = fps
+        self.schedule = sorted(schedule)
+        self.frames_served = 0
+        self._lock = threading.Lock()
+        self._frame_index = 0
+        self._encoded_cache = {}
+        self._schedule_start = time.perf_counter()
+        self._video = None
+        if video_path:
+            self._video = cv2.VideoCapture(video_path)
+            if not self._video.isOpened():
+                raise ValueError(f"Could not open video {video_path}")
+        self.images = {}
+        if os.path.isdir(dataset_path):
+            for class_name in sorted(os.listdir(dataset_path)):
+                class_dir = os.path.join(dataset_path, class_name)
+                if os.path.isdir(class_dir):
+                    self.images[class_name] = sorted(
+                        os.path.join(class_dir, f) for f in os.listdir(class_dir) if f.lower().endswith(".jpg"))
+        if self._video is None:
+            for class_name in [object_class] + [c for _, c in self.schedule]:
+                if not self.images.get(class_name):
+                    raise ValueError(f"No '{class_name}' images in {dataset_path}")
+        if self.schedule:
+            self.object_class = self.schedule[0][1]
+
+    def set_class(self, object_class):
+        with self._lock:
+            self.object_class = object_class
+            self._frame_index = 0
+
+    def set_framesize(self, framesize):
+        if framesize not in FRAMESIZE_DIMENSIONS:
+            return False
+        with self._lock:
+            self.framesize = framesize
+        return True
+
+    def start_schedule(self):
+        """Restarts the scripted class schedule from second 0."""
+        self._schedule_start = time.perf_counter()
+
+    def elapsed(self):
+        """Seconds since the schedule (re)started."""
+        return time.perf_counter() - self._schedule_start
+
+    def class_at(self, seconds):
+        """The scheduled class at `seconds` into the schedule (current class if there is none)."""
+        current = self.object_class if not self.schedule else self.schedule[0][1]
+        for start, class_name in self.schedule:
+            if seconds < start:
+                break
+            current = class_name
+        return current
+
+    def _encode(self, image_path, size):
+        """Resizes and JPEG-encodes one dataset image, cached per (file, size)."""
+        key = (image_path, size)
+        if key not in self._encoded_cache:
+            image = cv2.resize(cv2.imread(image_path), size, interpolation=cv2.INTER_AREA)
+            self._encoded_cache[key] = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])[1].tobytes()
+        return self._encoded_cache[key]
+
+    def _next_video_jpeg(self, size):
+        """Next frame of the video, rewinding at the end. Called with the lock held."""
+        ok, image = self._video.read()
+        if not ok:
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, image = self._video.read()
+            if not ok:
+                return None
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])[1].tobytes()
+
+    def next_jpeg(self):
+        """The next image of the current class (or video frame) at the current frame size."""
+        with self._lock:
+            if self.schedule:
+                scheduled = self.class_at(self.elapsed())
+                if scheduled != self.object_class:
+                    self.object_class = scheduled
+                    self._frame_index = 0
+            self.frames_served += 1
+            size = FRAMESIZE_DIMENSIONS[self.framesize]
+            if self._video is not None:
+                return self._next_video_jpeg(size)
+            paths = self.images[self.object_class]
+            image_path = paths[self._frame_index % len(paths)]
+            self._frame_index += 1
+        return self._encode(image_path, size)
+
+    def status(self):
+        with self._lock:
+            return {"framesize": self.framesize, "quality": JPEG_QUALITY, "fps": self.fps,
+                    "fake_class": self.object_class, "frames_served": self.frames_served}
+
+
+def make_handler(camera):
+    class FakeCameraHandler(http.server.BaseHTTPRequestHandler):
+        # HTTP/1.1 with Content-Length keeps connections alive like the real camera.
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without this Nagle's
+        # algorithm adds ~40 ms to every keep-alive request.
+        disable_nagle_algorithm = True
+
+        def _send(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_chunk(self, data):
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+        def _stream(self):
+            """Chunked multipart stream at camera.fps until the client goes away."""
+            self.send_response(200)
+            self.send_header("Content-Type", _STREAM_CONTENT_TYPE)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("X-Framerate", str(int(camera.fps)))
+            self.end_headers()
+            self.close_connection = True
+            next_frame_time = time.perf_counter()
+            try:
+                while True:
+                    jpeg = camera.next_jpeg()
+                    if jpeg is None:
+                        break
+                    # Three chunks per frame, like httpd_resp_send_chunk() on the camera.
+                    self._send_chunk(_STREAM_BOUNDARY)
+                    self._send_chunk(_STREAM_PART.format(len(jpeg), time.time()).encode())
+                    self._send_chunk(jpeg)
+                    next_frame_time += 1.0 / camera.fps
+                    time.sleep(max(0.0, next_frame_time - time.perf_counter()))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            query = dict(urllib.parse.parse_qsl(url.query))
+            if url.path == "/stream":
+                self._stream()
+            elif url.path == "/capture":
+                jpeg = camera.next_jpeg()
+                if jpeg is None:
+                    self._send(500, b"", "text/plain")
+                else:
+                    self._send(200, jpeg, "image/jpeg")
+            elif url.path == "/control":
+                ok = False
+                if query.get("var") == "framesize" and query.get("val", "").isdigit():
+                    ok = camera.set_framesize(int(query["val"]))
+                self._send(200 if ok else 500, b"", "text/plain")
+            elif url.path == "/status":
+                self._send(200, json.dumps(camera.status()).encode(), "application/json")
+            else:
+                self._send(404, b"Not Found", "text/plain")
+
+        def log_message(self, format, *args):
+            pass  # Keep the console quiet; benchmarks hammer these endpoints.
+
+    return FakeCameraHandler
+
+
+def start_server(camera, port=FAKE_CAMERA_PORT):
+    """Starts the server on a daemon thread and returns it (call shutdown() to stop)."""
+    server = http.server.ThreadingHTTPServer(("0.0.0.0", port), make_handler(camera))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    camera = FakeCamera()
+    server = start_server(camera)
+    source = FAKE_VIDEO_PATH or f"'{camera.object_class}' images"
+    print(f"[Fake Camera] Serving {source} on http://localhost:{FAKE_CAMERA_PORT} "
+          f"(/stream at {camera.fps:g} FPS, /capture, /control, /status). Ctrl+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        print("[Fake Camera] Shut down.")
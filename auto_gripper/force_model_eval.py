@@ -0,0 +1,106 @@
+# filename: force_model_eval.py
+# Compares main_controller's claw force models on the sponge:
+#   1. Measures the pipeline latency the predictor has to cover: the pulse -> force
+#      dead time pid_tuner.fit_plant finds in the sponge logs. (The ESP32 packets
+#      carry no timestamp, so the network leg cannot be measured on its own.)
+#   2. Open loop, on the recorded sponge logs: each model's force estimate per
+#      claw against a zero-phase reference (centred moving average of the claw's
+#      mean reading): RMSE, mean error while the force rises (the lag) and the
+#      sample-to-sample roughness.
+#   3. Closed loop, on the sponge plant and on the object's own plant
+#      (replay_harness.OBJECT_PLANTS) through replay_harness: overshoot (peak
+#      true force above the target until HOLDING, i.e. while the PID acts on it),
+#      settle time (from CMD:GRASP until the true force stays within
+#      ACCEPTABLE_ERROR_MARGIN of where it ends up; HOLDING freezes the pulse, so
+#      that need not be the target) and, separately, the final error (true force
+#      at the release minus the target, i.e. what the frozen pulse drifts to), per
+#      model and prediction horizon.
+# Usage: python force_model_eval.py
+
+import os
+import numpy as np
+from main_controller import (make_claw_filter, GripperState, TARGET_FORCES, ACCEPTABLE_ERROR_MARGIN, FORCE_MODELS,
+                             PREDICTION_LATENCY_SECONDS, R_left, R_right, Q_left, Q_right)
+from pid_tuner import PLANT_LOGS, LOG_DIR, load_log, fit_plant
+from replay_harness import run_scenario, SEEDS, OBJECT_PLANTS
+
+# --- CONFIGURATION ---
+SPONGE_LOGS = PLANT_LOGS["sponge"]
+REFERENCE_WINDOW = 5  # Samples in the centred moving average the estimates are scored against
+RISING_RATE = 50.0  # Reference force rise per second that counts as a ramp
+OBJECTS = ["paper_box", "egg"]  # Targets grasped on the sponge plant and on their own
+SETTLE_WINDOW = 6.0  # Seconds a grasp is held (and watched) before the release
+HORIZONS = [0.0, 0.1, 0.25, 0.75]  # Prediction horizons tried besides the measured latency
+
+
+def claw_estimates(model, t, z, Q, R):
+    """Force estimates of one claw's filter over a log (z: samples x 4)."""
+    kf = make_claw_filter(model, Q, R)
+    estimates = np.empty(len(t))
+    for i in range(len(t)):
+        estimates[i] = kf.update(z[i][:, None], t[i] - t[i - 1] if i else None)[0, 0]
+    return estimates
+
+
+def open_loop(model):
+    """RMSE, rising-force bias and roughness over both claws of every sponge log."""
+    errors, rising_errors, roughness = [], [], []
+    inner = slice(REFERENCE_WINDOW, -REFERENCE_WINDOW)
+    for log in SPONGE_LOGS:
+        data = np.genfromtxt(os.path.join(LOG_DIR, log), delimiter=",", names=True)
+        t = data["Time"]
+        for columns, Q, R in ((range(1, 5), Q_left, R_left), (range(5, 9), Q_right, R_right)):
+            z = np.column_stack([data[f"FSR{i}"] for i in columns])
+            reference = np.convolve(z.mean(1), np.ones(REFERENCE_WINDOW) / REFERENCE_WINDOW, "same")
+            estimates = claw_estimates(model, t, z, Q, R)[inner]
+            error = estimates - reference[inner]
+            errors.append(error)
+            rising_errors.append(error[np.gradient(reference, t)[inner] > RISING_RATE])
+            roughness.append(np.diff(estimates, 2))
+    return (float(np.sqrt(np.mean(np.concatenate(errors) ** 2))), float(np.mean(np.concatenate(rising_errors))),
+            float(np.std(np.concatenate(roughness))))
+
+
+def closed_loop(obj, plant, model, horizon, seed):
+    """Overshoot until HOLDING, settle time and final error of one grasp on `plant`."""
+    target = TARGET_FORCES[obj]
+    result = run_scenario({"name": f"{obj}/{plant}/{model}/{horizon}/{seed}", "source": "plant", "plant": plant, "seed": seed,
+                           "script": [(0.2, f"OBJECT:{obj}"), (0.5, "CMD:GRASP")],
+                           "on_holding": [[(SETTLE_WINDOW, "CMD:RELEASE")]], "duration": 40.0,
+                           "statuses": [], "force_models": {"left": model, "right": model},
+                           "prediction_latency": horizon})
+    released = next((e[1] for e in result["trace"] if e[2] == "CMD:RELEASE"), result["virtual_seconds"])
+    holding = next((e[1] for e in result["trace"] if e[4] == GripperState.HOLDING), released)
+    t, force = np.array([f for f in result["forces"] if 0.5 <= f[0] < released]).T
+    outside = np.nonzero(np.abs(force - force[-1]) >= ACCEPTABLE_ERROR_MARGIN)[0]
+    settled = (t[outside[-1] + 1] if len(outside) else t[0]) - 0.5
+    return force[t <= holding].max() - target, settled, force[-1] - target
+
+
+def main():
+    print("[Eval] Measuring the pipeline latency on the sponge logs...")
+    plant = fit_plant([load_log(os.path.join(LOG_DIR, f)) for f in SPONGE_LOGS])
+    latency = plant["dead_time"]
+    print(f"  pulse -> force dead time {latency:.1f} s (tau {plant['tau']:.2f} s); "
+          f"main_controller predicts {PREDICTION_LATENCY_SECONDS} s ahead (other objects: {FORCE_MODELS})")
+
+    print("\n--- Open loop: estimate vs. centred reference on the sponge logs ---")
+    for model in ("random_walk", "constant_velocity"):
+        rmse, rising_bias, roughness = open_loop(model)
+        print(f"  {model:<18} RMSE {rmse:6.1f}  rising bias {rising_bias:+7.1f}  roughness {roughness:6.1f}")
+
+    print(f"\n--- Closed loop ({SEEDS} seeds, mean / max; overshoot until HOLDING, "
+          f"settled = within +/-{ACCEPTABLE_ERROR_MARGIN} of the final force, final = at the release) ---")
+    variants = [("random_walk", 0.0)] + [("constant_velocity", h) for h in sorted(set(HORIZONS + [latency]))]
+    for obj in OBJECTS:
+        for plant in dict.fromkeys(["sponge", OBJECT_PLANTS[obj]]):
+            print(f"  {obj} on the {plant} plant (target {TARGET_FORCES[obj]})")
+            for model, horizon in variants:
+                runs = np.array([closed_loop(obj, plant, model, horizon, seed) for seed in range(SEEDS)])
+                overshoot, settle, final = runs.T
+                print(f"    {model:<18} horizon {horizon:4.2f} s  overshoot {overshoot.mean():+6.0f} / {overshoot.max():+6.0f}  "
+                      f"settle {settle.mean():5.2f} / {settle.max():5.2f} s  final {final.mean():+6.0f} / {final.max():+6.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# filename: grasp_cache.py
+# Per-object grasp memory for main_controller's feed-forward slew.
+import json
+import os
+import time
+from collections import OrderedDict
+
+
+class GraspCache:
+    """
+    Remembers, per object class, the servo pulse at which the claws touched
+    the object and the pulse at which the grasp reached HOLDING, as moving
+    averages over completed grasps.
+
+    Entries are kept in least-recently-used order: past `capacity` the least
+    recently used one is evicted, and an entry that has not been refreshed
+    for `max_age` seconds is dropped on lookup, since the object behind a
+    class name can change. With a `path` the cache is loaded from and saved
+    to a JSON file, so it carries over between runs.
+    """
+    def __init__(self, path=None, capacity=16, max_age=7 * 24 * 3600, alpha=0.3, clock=time.time):
+        """
+        Args:
+            path (str): JSON file to persist to, or None to keep the cache in memory.
+            capacity (int): Maximum number of object classes kept.
+            max_age (float): Seconds after its last update at which an entry expires.
+            alpha (float): Weight of the newest grasp in the moving averages.
+            clock (callable): Wall-clock time in seconds, stored with each entry for ageing.
+        """
+        self.path = path
+        self.capacity = capacity
+        self.max_age = max_age
+        self.alpha = alpha
+        self.clock = clock
+        self.entries = OrderedDict()
+        if path and os.path.exists(path):
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as cache_file:
+                stored = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            print(f"[Grasp Cache] Could not read {self.path}: {e}")
+            return
+        self.entries = OrderedDict(sorted(stored.items(), key=lambda item: item[1]["used"]))
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "w") as cache_file:
+                json.dump(self.entries, cache_file, indent=2)
+        except OSError as e:
+            print(f"[Grasp Cache] Could not write {self.path}: {e}")
+
+    def lookup(self, name):
+        """Returns a copy of the entry for `name` (contact_pulse, hold_pulse, ...) or None if unknown or expired."""
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        now = self.clock()
+        if now - entry["updated"] > self.max_age:
+            del self.entries[name]
+            self.save()
+            return None
+        entry["used"] = now
+        self.entries.move_to_end(name)
+        return dict(entry)
+
+    def record(self, name, contact_pulse, hold_pulse, time_to_holding):
+        """
+        Folds one completed grasp into the entry for `name`.
+        Args:
+            contact_pulse (float): Pulse at which contact was detected, or None if it was not seen.
+            hold_pulse (float): Pulse at which the grasp reached HOLDING.
+            time_to_holding (float): Seconds from CMD:GRASP to HOLDING.
+        """
+        now = self.clock()
+        entry = self.entries.pop(name, None)
+        if entry is None or now - entry["updated"] > self.max_age:
+            entry = {"contact_pulse": contact_pulse, "hold_pulse": hold_pulse,
+                     "time_to_holding": time_to_holding, "grasps": 0}
+        else:
+            for key, value in (("contact_pulse", contact_pulse), ("hold_pulse", hold_pulse),
+                               ("time_to_holding", time_to_holding)):
+                if value is not None:
+                    entry[key] = value if entry[key] is None else entry[key] + self.alpha * (value - entry[key])
+        entry["grasps"] += 1
+        entry["updated"] = entry["used"] = now
+        self.entries[name] = entry
+        while len(self.entries) > self.capacity:
+            evicted, _ = self.entries.popitem(last=False)
+            print(f"[Grasp Cache] Evicted '{evicted}' (least recently used).")
+        self.save()
@@ -26,13 +26,17 @@ class MultivariateKalmanFilter:
         
         self.x_hat = x_hat_initial  # Estimated state vector
         self.P = P_initial          # Estimate covariance matrix
+        self.innovation = None      # z - H * x_hat_minus of the last update
+        self.innovation_cov = None  # Its predicted covariance, H * P_minus * H_transpose + R
 
-    def update(self, z):
+    def update(self, z, dt=None):
         """
         Performs one full prediction and update cycle of the filter.
 
         Args:
             z (np.ndarray): The measurement vector (e.g., from 4 FSRs).
+            dt (float): Seconds since the previous update. Unused here (A and Q are
+                        fixed); models that depend on it rebuild them from it.
 
         Returns:
             np.ndarray: The updated state estimate vector.
@@ -51,7 +55,9 @@ class MultivariateKalmanFilter:
         K = P_minus @ self.H.T @ np.linalg.inv(innovation_cov)
 
         # Update the state estimate with the measurement z: x_hat = x_hat_minus + K * (z - H * x_hat_minus)
-        self.x_hat = x_hat_minus + K @ (z - self.H @ x_hat_minus)
+        self.innovation = z - self.H @ x_hat_minus
+        self.innovation_cov = innovation_cov
+        self.x_hat = x_hat_minus + K @ self.innovation
 
         # Update the estimate covariance: P = (I - K * H) * P_minus
         # Where I is the identity matrix of the same size as P
@@ -59,3 +65,55 @@ class MultivariateKalmanFilter:
         self.P = (I - K @ self.H) @ P_minus
 
         return self.x_hat
+
+    def predict(self, horizon):
+        """
+        The first state (the force) extrapolated `horizon` seconds ahead. With
+        A = [[1]] (a random walk) the best guess is the current estimate.
+        """
+        return float(self.x_hat[0, 0])
+
+
+class ConstantVelocityKalmanFilter(MultivariateKalmanFilter):
+    """
+    Two-state variant for one claw: x = [force, force rate], with a
+    constant-velocity model A = [[1, dt], [0, 1]] and white force-acceleration
+    process noise of intensity q, both rebuilt from the time since the last
+    sample. A random walk (A = [[1]]) trails a rising force by (1 - K) / K
+    samples; this model follows a ramp without that lag and can extrapolate
+    the force over a known latency with predict().
+    """
+    def __init__(self, n_sensors, q, R, period=0.02, P_initial=None):
+        """
+        Args:
+            n_sensors (int): Number of sensors all measuring the force (H = [1, 0] for each).
+            q (float): Process noise intensity, (force / s^2)^2 per second.
+            R (np.ndarray): Measurement Noise Covariance Matrix.
+            period (float): dt assumed when update() gets none.
+            P_initial (np.ndarray): Initial estimate covariance matrix.
+        """
+        self.q = q
+        self.period = period
+        H = np.hstack([np.ones((n_sensors, 1)), np.zeros((n_sensors, 1))])
+        if P_initial is None:
+            P_initial = np.diag([100.0, 1e4])
+        super().__init__(self._transition(period), H, self._process_noise(period), R, np.zeros((2, 1)), P_initial)
+
+    def _transition(self, dt):
+        return np.array([[1.0, dt], [0.0, 1.0]])
+
+    def _process_noise(self, dt):
+        return self.q * np.array([[dt ** 3 / 3, dt ** 2 / 2], [dt ** 2 / 2, dt]])
+
+    def update(self, z, dt=None):
+        if dt is not None and dt > 0 and dt != self.period:
+            self.A = self._transition(dt)
+            self.Q = self._process_noise(dt)
+        elif self.A[0, 1] != self.period:
+            self.A = self._transition(self.period)
+            self.Q = self._process_noise(self.period)
+        return super().update(z)
+
+    def predict(self, horizon):
+        """The force extrapolated `horizon` seconds ahead along the estimated rate."""
+        return float(self.x_hat[0, 0] + self.x_hat[1, 0] * horizon)
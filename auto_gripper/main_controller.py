@@ -1,4 +1,6 @@
 # filename: main_controller.py
+import os
+import sys
 import threading
 import queue
 import asyncio
@@ -6,8 +8,14 @@ import time
 import websockets
 from enum import Enum
 import numpy as np
-from kalman_filter import MultivariateKalmanFilter
+from kalman_filter import MultivariateKalmanFilter, ConstantVelocityKalmanFilter
 from pid_controller import PIDController
+from grasp_cache import GraspCache
+from contact_detector import ContactDetector
+from slip_detector import SlipDetector
+# The streaming filter metrics live with the other analysis code in data_analysis/.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from data_analysis.streaming_metrics import StreamingMetrics
 
 # --- SYSTEM STATE ---
 class SystemState(Enum):
@@ -18,8 +26,9 @@ class SystemState(Enum):
 
 class GripperState(Enum):
     OPEN = 1
-    CLOSING = 2
-    HOLDING = 3
+    APPROACHING = 2
+    CLOSING = 3
+    HOLDING = 4
 
 # --- CONFIGURATION & TUNING ---
 TARGET_FORCES = {
@@ -47,117 +56,396 @@ Q_left = np.array([[0.09]])
 R_left = np.diag([3.1623, 3.1623, 3.1623, 3.1623])
 Q_right = np.array([[0.09]])
 R_right = np.diag([3.9811, 3.9811, 3.9811, 10.6606])
+# Force model per claw: "random_walk" (A = [[1]], Q_left/Q_right) or "constant_velocity"
+# (force and force rate), whose force the PID and the HOLDING test see predicted
+# PREDICTION_LATENCY_SECONDS ahead. Objects with a latency use PREDICTIVE_FORCE_MODELS,
+# the rest FORCE_MODELS (a random walk cannot predict). See force_model_eval.py for the comparison.
+FORCE_MODELS = {"left": "random_walk", "right": "random_walk"}
+PREDICTIVE_FORCE_MODELS = {"left": "constant_velocity", "right": "constant_velocity"}
+FORCE_RATE_Q = 100.0  # Constant-velocity process noise, (force / s^2)^2 per second, fitted on the sponge logs
+# How far ahead the force is predicted, per object. The paper box behaves like the
+# sponge, whose pulse-to-force dead time is 0.5 s (pid_tuner.fit_plant). The egg's
+# firm fit has no dead time, but its 1.6 s lag keeps the force rising once HOLDING
+# freezes the pulse; predicting it over the same 0.5 s cuts that overshoot on the
+# firm plant from about +1590 to +950 (force_model_eval.py).
+PREDICTION_LATENCY_SECONDS = {
+    "paper_box": 0.5,
+    "egg": 0.5
+}
+METRICS_WINDOW = 200  # Samples the live claw-filter metrics average over
+RELEASE_SETTLE_SECONDS = 1.0  # After PULSE1 opens the claw, before PULSE2 moves the camera servo back
+RECOGNITION_DELAY_SECONDS = 1.0  # After PULSE2 has moved, before identification restarts
+
+# Feed-forward: a grasp of a known object slews straight to just short of its
+# cached contact pulse and lets the PID take over from there.
+GRASP_CACHE_FILE = "grasp_cache.json"
+GRASP_CACHE_CAPACITY = 16  # Object classes remembered
+GRASP_CACHE_MAX_AGE = 7 * 24 * 3600  # Seconds before an unrefreshed entry is forgotten
+GRASP_CACHE_ALPHA = 0.3  # Weight of the newest grasp in the cached pulses
+FEEDFORWARD_MARGIN = 60  # Pulses short of the cached contact (and hold) pulse where the slew stops
+
+# Approach: until a claw touches the object the servo slews instead of
+# running the force PID (which barely moves at zero force), then the PID
+# takes over from the contact pulse. The slew is fast up to
+# APPROACH_FAST_LIMIT, below every contact pulse seen in the logs
+# (1625-1870), and slower from there so the overshoot past contact stays small.
+APPROACH_FAST_RATE = 2000.0  # Pulses per second up to APPROACH_FAST_LIMIT
+APPROACH_FAST_LIMIT = 1550
+APPROACH_SLEW_RATE = 150.0  # Pulses per second from there until contact, unless the PID closes faster
+APPROACH_MAX_STEP_SECONDS = 0.1  # A longer packet gap only advances the slew this far
+CONTACT_FORCE = 50  # Filtered claw force that counts as touching the object
+CONTACT_RATE = 250.0  # Filtered claw force rise per second that counts as contact
+CONTACT_INNOVATION_SIGMA = 6.0  # Readings this many predicted std devs above the Kalman prediction count as contact
+CONTACT_CONFIRM_SAMPLES = 2  # Consecutive packets a rate/innovation contact must last
+# Slip detection while HOLDING (slip_detector.py), per jaw on the raw FSRs; see slip_eval.py.
+FSR_POSITIONS = [-1.5, -0.5, 0.5, 1.5]  # Along the jaw, in sensor pitches, in the order of LEFT/RIGHT_CLAW_INDICES
+SLIP_WINDOW = 3  # Packets in the short (detection) window
+SLIP_BASELINE_WINDOW = 50  # Packets in the slow baseline window
+SLIP_RATIO = 6.0  # Variance / high-pass energy this many times the baseline counts as slip...
+SLIP_VARIANCE_FLOOR = 3000.0  # ...plus this much (jaw total, squared reading units)
+SLIP_HIGHPASS_FLOOR = 6000.0
+SLIP_COP_SHIFT = 0.2  # Centre-of-pressure movement (sensor pitches) that counts as slip
+SLIP_WARMUP_SAMPLES = 25  # Packets after HOLDING (or a regrip) before slip is reported
+SLIP_CONFIRM_SAMPLES = 1
+# A regrip closes at once, on the slip packet, by a step sized from the grasp's own
+# force per pulse (peak force over the contact-to-hold span), so it adds a bounded
+# force however firm the object: the smallest of
+REGRIP_STEP = 40  # pulses,
+REGRIP_FORCE_FRACTION = 0.25  # this fraction of the target force, and
+REGRIP_FORCE_LIMIT = MAX_CLAW_FORCE - ACCEPTABLE_ERROR_MARGIN  # the room left below this force.
+REGRIP_MAX_COUNT = 3  # Regrips per grasp; later slips are only reported
 
 incoming_queue = queue.Queue()
 outgoing_queue = queue.Queue()
 shutdown_event = threading.Event()
 
 
-def data_processing_thread():
-    current_system_state = SystemState.IDENTIFYING
-    current_gripper_state = GripperState.OPEN
-    locked_object = None
-    global OVERALL_TARGET_FORCE
-
+def make_claw_filter(model, Q, R):
+    """The Kalman filter for one claw's four FSRs: "random_walk" (Q is its 1x1 process noise) or "constant_velocity"."""
+    if model == "constant_velocity":
+        return ConstantVelocityKalmanFilter(n_sensors=4, q=FORCE_RATE_Q, R=R)
+    if model != "random_walk":
+        raise ValueError(f"Unknown force model '{model}'")
     A = np.array([[1]])
     H = np.array([[1], [1], [1], [1]])
     x_hat_initial = np.array([[0]])
     P_initial = np.array([[100]])
-    kf_left_claw = MultivariateKalmanFilter(A, H, Q_left, R_left, x_hat_initial, P_initial)
-    kf_right_claw = MultivariateKalmanFilter(A, H, Q_right, R_right, x_hat_initial, P_initial)
+    return MultivariateKalmanFilter(A, H, Q, R, x_hat_initial, P_initial)
 
-    pid = PIDController(Kp=KP, Ki=KI, Kd=KD, setpoint=OVERALL_TARGET_FORCE)
-    servo_pulse = float(SERVO_OPEN_PULSE)
-    outgoing_queue.put(f"PULSE1:{int(servo_pulse)}")
-    outgoing_queue.put("STATUS:IDENTIFYING")
-    
-    outgoing_queue.put("PULSE2:2300")
 
-    print("[Controller] System initialized in IDENTIFYING mode.")
+def make_slip_detector():
+    """A SlipDetector for one jaw with the SLIP_* settings."""
+    return SlipDetector(FSR_POSITIONS, window=SLIP_WINDOW, baseline_window=SLIP_BASELINE_WINDOW, ratio=SLIP_RATIO,
+                        variance_floor=SLIP_VARIANCE_FLOOR, highpass_floor=SLIP_HIGHPASS_FLOOR, cop_shift=SLIP_COP_SHIFT,
+                        min_force=MIN_FORCE_PER_CLAW, warmup=SLIP_WARMUP_SAMPLES, confirm=SLIP_CONFIRM_SAMPLES)
 
-    while not shutdown_event.is_set():
+
+class GraspStateMachine:
+    """
+    The controller's state machine (IDENTIFYING -> READY_TO_GRASP ->
+    EXECUTING_GRASP -> RELEASING), stepped one message at a time.
+
+    It never blocks or reads the wall clock itself: each step gets the time
+    the message arrived (or asks `clock`), and commands go out through `send`.
+    The pauses while releasing are deadlines that advance() checks, so the
+    same engine runs live in data_processing_thread() and on a virtual clock
+    in replay_harness.py.
+    """
+    def __init__(self, send=outgoing_queue.put, clock=time.monotonic, log=print, cache=None,
+                 force_models=None, prediction_latency=None):
+        """
+        Args:
+            send (callable): Called with every outgoing message (PULSE1:, PULSE2:, STATUS:, DATA:).
+            clock (callable): Current time in seconds, used when a step gets no timestamp.
+            log (callable): Called with the console messages.
+            cache (GraspCache): Per-object contact/hold pulses for the feed-forward slew; None = always close from open.
+            force_models (dict): "random_walk" or "constant_velocity" for the "left" and "right" claw;
+                None = PREDICTIVE_FORCE_MODELS for an object with a PREDICTION_LATENCY_SECONDS entry, else FORCE_MODELS.
+            prediction_latency (float): Seconds ahead the force is predicted for the PID and the HOLDING test;
+                None = the locked object's PREDICTION_LATENCY_SECONDS (0 without an entry).
+        """
+        self.send = send
+        self.clock = clock
+        self.log = log
+        self.cache = cache
+        self.system_state = SystemState.IDENTIFYING
+        self.gripper_state = GripperState.OPEN
+        self.locked_object = None
+        self.target_force = OVERALL_TARGET_FORCE
+        self.servo_pulse = float(SERVO_OPEN_PULSE)
+
+        self._force_models_override = force_models
+        self._prediction_latency_override = prediction_latency
+        self._select_force_models()
+        self.pid = PIDController(Kp=KP, Ki=KI, Kd=KD, setpoint=self.target_force, clock=clock)
+        # Mean raw claw reading vs. Kalman force, per claw; printed when a grasp reaches HOLDING.
+        self.claw_metrics = StreamingMetrics(channels=2, window=METRICS_WINDOW)
+
+        self._release_started = None
+        self._camera_servo_moved = False
+        self.contact_detectors = [ContactDetector(rate=CONTACT_RATE, innovation_sigma=CONTACT_INNOVATION_SIGMA,
+                                                  force=CONTACT_FORCE, confirm=CONTACT_CONFIRM_SAMPLES)
+                                  for _ in range(2)]
+        self.slip_detectors = [make_slip_detector() for _ in range(2)]
+        self._regrips = 0
+        # Per object: grasps, mean/max approach time (s) and mean/max overshoot above the target force.
+        self.grasp_stats = {}
+
+        self._last_packet_time = None
+        self._grasp_started = None
+        self._start_pulse = None
+        self._contact_pulse = None
+        self._approach_time = None
+        self._peak_force = None
+
+    def start(self):
+        """Opens the gripper and starts identification."""
+        self.send(f"PULSE1:{int(self.servo_pulse)}")
+        self.send("STATUS:IDENTIFYING")
+        self.send("PULSE2:2300")
+        self.log("[Controller] System initialized in IDENTIFYING mode.")
+
+    def handle(self, packet, timestamp=None):
+        """
+        Processes one message from the network.
+        Args:
+            packet (str): An OBJECT:/CMD: message or a sensor packet of 10 integers.
+            timestamp (float): When it arrived, in the clock's time base (default: now).
+        """
+        now = self.clock() if timestamp is None else timestamp
+        self.advance(now)
+        data_packet = packet.strip()
+
+        # --- Handle State-Specific Messages (OBJECT, CMD) ---
+        if self.system_state == SystemState.IDENTIFYING and data_packet.startswith("OBJECT:"):
+            detected = data_packet.split(':')[1]
+
+            if detected != "None":
+                self.locked_object = detected.lower()
+                self.target_force = TARGET_FORCES.get(self.locked_object, TARGET_FORCES["default"])
+                self.pid.set_setpoint(self.target_force)
+                self._select_force_models()
+                self.system_state = SystemState.READY_TO_GRASP
+
+                self.send("PULSE2:1600")
+
+                self.log(f"[Controller] Object locked: {self.locked_object}. Target force set to: {self.target_force}")
+                self.send(f"STATUS:LOCKED:{self.locked_object.upper()}")
+
+        elif self.system_state == SystemState.READY_TO_GRASP and data_packet.startswith("CMD:"):
+            command = data_packet.split(':')[1]
+            if command == "GRASP":
+                self.system_state = SystemState.EXECUTING_GRASP
+                self.gripper_state = GripperState.APPROACHING
+                self.pid.reset(timestamp=now)
+                self._begin_grasp(now)
+            elif command == "RESET":
+                self._begin_release(now)
+
+        elif self.system_state == SystemState.EXECUTING_GRASP and data_packet.startswith("CMD:"):
+            command = data_packet.split(':')[1]
+            if command in ("RELEASE", "EMERGENCY", "RESET"):
+                self._begin_release(now)
+
+        # --- Always Process Sensor Data ---
         try:
-            raw_packet = incoming_queue.get(timeout=0.1)
-            data_packet = raw_packet.strip()
-
-            # --- Handle State-Specific Messages (OBJECT, CMD) ---
-            if current_system_state == SystemState.IDENTIFYING and data_packet.startswith("OBJECT:"):
-                detected = data_packet.split(':')[1]
-                
-                if detected != "None":
-                    locked_object = detected.lower()
-                    OVERALL_TARGET_FORCE = TARGET_FORCES.get(locked_object, TARGET_FORCES["default"])
-                    pid.set_setpoint(OVERALL_TARGET_FORCE)
-                    current_system_state = SystemState.READY_TO_GRASP
-                    
-                    outgoing_queue.put("PULSE2:1600")
-                    
-                    print(f"[Controller] Object locked: {locked_object}. Target force set to: {OVERALL_TARGET_FORCE}")
-                    outgoing_queue.put(f"STATUS:LOCKED:{locked_object.upper()}")
-
-            elif current_system_state == SystemState.READY_TO_GRASP and data_packet.startswith("CMD:"):
-                command = data_packet.split(':')[1]
-                if command == "GRASP":
-                    current_system_state = SystemState.EXECUTING_GRASP
-                    current_gripper_state = GripperState.CLOSING
-                    pid.reset()
-                elif command == "RESET":
-                    current_system_state = SystemState.RELEASING
-
-            elif current_system_state == SystemState.EXECUTING_GRASP and data_packet.startswith("CMD:"):
-                command = data_packet.split(':')[1]
-                if command in ("RELEASE", "EMERGENCY", "RESET"):
-                    current_system_state = SystemState.RELEASING
-
-            # --- Always Process Sensor Data ---
-            try:
-                all_readings = [int(val) for val in data_packet.split(',')]
-                if len(all_readings) == 10:
-                    left_raw_readings = [all_readings[i] for i in LEFT_CLAW_INDICES]
-                    right_raw_readings = [all_readings[i] for i in RIGHT_CLAW_INDICES]
-                    left_z = np.array([[r] for r in left_raw_readings])
-                    right_z = np.array([[r] for r in right_raw_readings])
-
-                    left_force = kf_left_claw.update(left_z)[0, 0]
-                    right_force = kf_right_claw.update(right_z)[0, 0]
-                    overall_force = max(left_force, right_force)
-
-                    data_to_send = f"DATA:{np.mean(left_raw_readings)},{left_force},{np.mean(right_raw_readings)},{right_force},{overall_force}"
-                    outgoing_queue.put(data_to_send)
-
-                    if current_system_state == SystemState.EXECUTING_GRASP and current_gripper_state == GripperState.CLOSING:
-                        pid_output = pid.update(overall_force)
-                        servo_pulse += pid_output * SERVO_STEP_SIZE
-                        servo_pulse = max(SERVO_OPEN_PULSE, min(SERVO_MAX_CLOSE_PULSE, servo_pulse))
-                        outgoing_queue.put(f"PULSE1:{int(servo_pulse)}")
-
-                        error = OVERALL_TARGET_FORCE - overall_force
-                        if abs(error) < ACCEPTABLE_ERROR_MARGIN and left_force > MIN_FORCE_PER_CLAW and right_force > MIN_FORCE_PER_CLAW:
-                            current_gripper_state = GripperState.HOLDING
-                            print(f"[State Change] Target force of {OVERALL_TARGET_FORCE} achieved. State: HOLDING")
-
-            except (ValueError, IndexError):
-                pass
-
-            # --- Handle Releasing State Action ---
-            if current_system_state == SystemState.RELEASING:
-                servo_pulse = float(SERVO_OPEN_PULSE)
-                outgoing_queue.put(f"PULSE1:{int(servo_pulse)}")
-                
-                time.sleep(1)
-                outgoing_queue.put("PULSE2:2300")
-                
-                # Wait 1 second AFTER servo moves before starting recognition.
-                time.sleep(1)
-
-                current_system_state = SystemState.IDENTIFYING
-                current_gripper_state = GripperState.OPEN
-                locked_object = None
-                print("[Controller] Release complete. Returning to identification mode.")
-                outgoing_queue.put("STATUS:IDENTIFYING")
+            all_readings = [int(val) for val in data_packet.split(',')]
+        except ValueError:
+            return
+        if len(all_readings) == 10:
+            self._handle_readings(all_readings, now)
 
+    def advance(self, timestamp=None):
+        """Runs the release steps that are due by `timestamp`; call it when no message has come in for a while."""
+        if self.system_state != SystemState.RELEASING:
+            return
+        elapsed = (self.clock() if timestamp is None else timestamp) - self._release_started
+        if not self._camera_servo_moved and elapsed >= RELEASE_SETTLE_SECONDS:
+            self.send("PULSE2:2300")
+            self._camera_servo_moved = True
+        # Wait AFTER the camera servo moves before starting recognition.
+        if self._camera_servo_moved and elapsed >= RELEASE_SETTLE_SECONDS + RECOGNITION_DELAY_SECONDS:
+            self.system_state = SystemState.IDENTIFYING
+            self.gripper_state = GripperState.OPEN
+            self.locked_object = None
+            self.log("[Controller] Release complete. Returning to identification mode.")
+            self.send("STATUS:IDENTIFYING")
+
+    def _select_force_models(self):
+        """Claw filters and prediction horizon for the locked object (fresh filters: the claws are open)."""
+        latency = PREDICTION_LATENCY_SECONDS.get(self.locked_object)
+        models = self._force_models_override or (PREDICTIVE_FORCE_MODELS if latency else FORCE_MODELS)
+        self.prediction_latency = self._prediction_latency_override if self._prediction_latency_override is not None else latency or 0.0
+        self.kf_left_claw = make_claw_filter(models["left"], Q_left, R_left)
+        self.kf_right_claw = make_claw_filter(models["right"], Q_right, R_right)
+
+    def _begin_release(self, now):
+        if self.system_state == SystemState.EXECUTING_GRASP and self._approach_time is not None:
+            self._record_grasp_stats()
+        self.system_state = SystemState.RELEASING
+        self.servo_pulse = float(SERVO_OPEN_PULSE)
+        self.send(f"PULSE1:{int(self.servo_pulse)}")
+        self._release_started = now
+        self._camera_servo_moved = False
+
+    def _begin_grasp(self, now):
+        self._grasp_started = now
+        self._contact_pulse = None
+        self._approach_time = None
+        self._peak_force = None
+        for detector in self.contact_detectors:
+            detector.reset()
+        entry = self.cache.lookup(self.locked_object) if self.cache else None
+        if entry:
+            cached = min(p for p in (entry["contact_pulse"], entry["hold_pulse"]) if p is not None)
+            self.servo_pulse = max(SERVO_OPEN_PULSE, min(SERVO_MAX_CLOSE_PULSE, cached - FEEDFORWARD_MARGIN))
+            self.send(f"PULSE1:{int(self.servo_pulse)}")
+            self.log(f"[Controller] Feed-forward: slewing to {self.servo_pulse:.0f} "
+                     f"(cached contact {entry['contact_pulse'] or float('nan'):.0f}, hold {entry['hold_pulse']:.0f}, "
+                     f"{entry['grasps']} grasps).")
+        self._start_pulse = self.servo_pulse
+
+    def _reach_holding(self, now):
+        time_to_holding = now - self._grasp_started
+        feedforward = "feed-forward" if self._start_pulse > SERVO_OPEN_PULSE else "from open"
+        self.log(f"[Grasp] {self.locked_object}: HOLDING after {time_to_holding:.2f} s ({feedforward}, "
+                 f"start {self._start_pulse:.0f}, contact {self._contact_pulse or float('nan'):.0f}, "
+                 f"hold {self.servo_pulse:.0f}).")
+        if self.cache:
+            self.cache.record(self.locked_object, self._contact_pulse, self.servo_pulse, time_to_holding)
+        self._regrips = 0
+        for detector in self.slip_detectors:
+            detector.reset()
+
+    def _regrip(self, feature, now):
+        """
+        A jaw slipped: report it and, up to REGRIP_MAX_COUNT times per grasp, close at once by
+        the REGRIP_STEP / REGRIP_FORCE_FRACTION / REGRIP_FORCE_LIMIT bounded step.
+        """
+        self.send("STATUS:SLIP")
+        step = 0.0
+        span = self.servo_pulse - (self._contact_pulse or SERVO_MAX_CLOSE_PULSE)
+        if self._regrips < REGRIP_MAX_COUNT and span > 0 and self._peak_force > 0:
+            # The force is concave in the pulse, so the contact-to-hold secant overstates the
+            # force per pulse at the hold and the step stays within the force it is sized for.
+            force_per_pulse = self._peak_force / span
+            room = min(REGRIP_FORCE_FRACTION * self.target_force, REGRIP_FORCE_LIMIT - self._peak_force)
+            step = min(REGRIP_STEP, room / force_per_pulse, SERVO_MAX_CLOSE_PULSE - self.servo_pulse)
+        elapsed = now - self._grasp_started
+        if step >= 1:
+            self._regrips += 1
+            self.servo_pulse += step
+            self.send(f"PULSE1:{int(self.servo_pulse)}")
+            self.log(f"[Grasp] {self.locked_object}: slip ({feature}) after {elapsed:.2f} s, "
+                     f"regrip {self._regrips}/{REGRIP_MAX_COUNT} by {step:.0f} to {self.servo_pulse:.0f}.")
+        else:
+            self.log(f"[Grasp] {self.locked_object}: slip ({feature}) after {elapsed:.2f} s, not regripped "
+                     f"({self._regrips}/{REGRIP_MAX_COUNT} used, force {self._peak_force:.0f}).")
+        # A fresh baseline, so the regrip's own force change is not taken for another slip.
+        for detector in self.slip_detectors:
+            detector.reset()
+
+    def _approach(self, overall_force, contact, now):
+        """One free-space step: slew on, or hand over to the force PID once a claw touches."""
+        if contact or self.servo_pulse >= SERVO_MAX_CLOSE_PULSE:
+            self._contact_pulse = self.servo_pulse if contact else None
+            self._approach_time = now - self._grasp_started
+            self._peak_force = 0.0
+            self.gripper_state = GripperState.CLOSING
+            # Bumpless transfer: the pulse stays where the slew left it and the PID starts from this sample.
+            self.pid.reset(timestamp=now, current_value=overall_force)
+            where = f"contact at {self.servo_pulse:.0f} ({contact})" if contact else "no contact before fully closed"
+            self.log(f"[Grasp] {self.locked_object}: {where} after {self._approach_time:.2f} s. Force control.")
+            return
+        dt = min(now - self._last_packet_time, APPROACH_MAX_STEP_SECONDS) if self._last_packet_time is not None else 0.0
+        rate = APPROACH_FAST_RATE if self.servo_pulse < APPROACH_FAST_LIMIT else APPROACH_SLEW_RATE
+        # Never slower than the PID alone would close (it scales with the target force).
+        pid_step = self.pid.update(overall_force, timestamp=now) * SERVO_STEP_SIZE
+        self.servo_pulse = min(SERVO_MAX_CLOSE_PULSE, self.servo_pulse + max(rate * max(dt, 0.0), pid_step))
+        self.send(f"PULSE1:{int(self.servo_pulse)}")
+
+    def _record_grasp_stats(self):
+        overshoot = self._peak_force - self.target_force
+        stats = self.grasp_stats.setdefault(self.locked_object, {"grasps": 0, "approach_time": 0.0, "approach_time_max": 0.0,
+                                                                 "overshoot": 0.0, "overshoot_max": -float("inf")})
+        stats["grasps"] += 1
+        stats["approach_time"] += (self._approach_time - stats["approach_time"]) / stats["grasps"]
+        stats["approach_time_max"] = max(stats["approach_time_max"], self._approach_time)
+        stats["overshoot"] += (overshoot - stats["overshoot"]) / stats["grasps"]
+        stats["overshoot_max"] = max(stats["overshoot_max"], overshoot)
+        self.log(f"[Grasp] {self.locked_object}: approach {self._approach_time:.2f} s, overshoot {overshoot:+.0f} "
+                 f"(mean over {stats['grasps']} grasps: approach {stats['approach_time']:.2f} s, "
+                 f"overshoot {stats['overshoot']:+.0f}, max {stats['overshoot_max']:+.0f}).")
+
+    def _handle_readings(self, all_readings, now):
+        left_raw_readings = [all_readings[i] for i in LEFT_CLAW_INDICES]
+        right_raw_readings = [all_readings[i] for i in RIGHT_CLAW_INDICES]
+        left_z = np.array([[r] for r in left_raw_readings])
+        right_z = np.array([[r] for r in right_raw_readings])
+
+        dt = now - self._last_packet_time if self._last_packet_time is not None else None
+        left_force = self.kf_left_claw.update(left_z, dt)[0, 0]
+        right_force = self.kf_right_claw.update(right_z, dt)[0, 0]
+        overall_force = max(left_force, right_force)
+        # What the claws will feel once a command sent now takes effect. Both jaws squeeze the
+        # same object, so the predicting (constant-velocity) claws' mean trend applies to both;
+        # with no predicting claw (random walks) that is the estimate itself.
+        leads = [kf.predict(self.prediction_latency) - force for kf, force in
+                 ((self.kf_left_claw, left_force), (self.kf_right_claw, right_force))
+                 if isinstance(kf, ConstantVelocityKalmanFilter)]
+        lead = float(np.mean(leads)) if leads else 0.0
+        left_predicted = left_force + lead
+        right_predicted = right_force + lead
+        overall_predicted = max(left_predicted, right_predicted)
+        left_mean = np.mean(left_raw_readings)
+        right_mean = np.mean(right_raw_readings)
+        self.claw_metrics.update([left_mean, right_mean], [left_force, right_force], now)
+
+        self.send(f"DATA:{left_mean},{left_force},{right_mean},{right_force},{overall_force}")
+
+        contacts = [detector.update(kf, now) for detector, kf in
+                    zip(self.contact_detectors, (self.kf_left_claw, self.kf_right_claw))]
+
+        if self.system_state == SystemState.EXECUTING_GRASP and self.gripper_state == GripperState.APPROACHING:
+            self._approach(overall_predicted, next((c for c in contacts if c), None), now)
+
+        elif self.system_state == SystemState.EXECUTING_GRASP and self.gripper_state == GripperState.CLOSING:
+            pid_output = self.pid.update(overall_predicted, timestamp=now)
+            self.servo_pulse += pid_output * SERVO_STEP_SIZE
+            self.servo_pulse = max(SERVO_OPEN_PULSE, min(SERVO_MAX_CLOSE_PULSE, self.servo_pulse))
+            self.send(f"PULSE1:{int(self.servo_pulse)}")
+
+            error = self.target_force - overall_predicted
+            if abs(error) < ACCEPTABLE_ERROR_MARGIN and left_predicted > MIN_FORCE_PER_CLAW and right_predicted > MIN_FORCE_PER_CLAW:
+                self.gripper_state = GripperState.HOLDING
+                self.log(f"[State Change] Target force of {self.target_force} achieved. State: HOLDING")
+                self.log(f"[Metrics] {self.claw_metrics.summary(['Left claw', 'Right claw'])}")
+                self._reach_holding(now)
+
+        elif self.system_state == SystemState.EXECUTING_GRASP and self.gripper_state == GripperState.HOLDING:
+            slips = [detector.update(readings) for detector, readings in
+                     zip(self.slip_detectors, (left_raw_readings, right_raw_readings))]
+            slip = next((s for s in slips if s), None)
+            if slip:
+                self._regrip(slip, now)
+        if self._peak_force is not None:
+            self._peak_force = max(self._peak_force, overall_force)
+        self._last_packet_time = now
+
+
+def data_processing_thread():
+    cache = GraspCache(GRASP_CACHE_FILE, capacity=GRASP_CACHE_CAPACITY, max_age=GRASP_CACHE_MAX_AGE, alpha=GRASP_CACHE_ALPHA)
+    controller = GraspStateMachine(cache=cache)
+    controller.start()
+
+    while not shutdown_event.is_set():
+        try:
+            # Packets are stamped on arrival, so the PID sees when the sample came in, not when this thread ran.
+            arrival_time, raw_packet = incoming_queue.get(timeout=0.1)
         except queue.Empty:
+            controller.advance()
             continue
+        controller.handle(raw_packet, timestamp=arrival_time)
     print("[Controller] Processing thread has been shut down.")
 
 
@@ -173,7 +461,7 @@ def websocket_client_thread(out_q, in_q, stop_event):
         while not stop_event.is_set():
             try:
                 message = await websocket.recv()
-                in_q.put(message)
+                in_q.put((time.monotonic(), message))
             except websockets.exceptions.ConnectionClosed:
                 break
     async def client_handler():
@@ -0,0 +1,226 @@
+# filename: mjpeg_stream.py
+# A small pure-Python client for the ESP32-CAM's multipart/x-mixed-replace
+# /stream endpoint. It hands out the raw JPEG bytes of the newest frame and
+# only decodes the frames that are actually used, at the smallest JPEG
+# scale (1/1, 1/2, 1/4, 1/8) that still covers the requested size.
+import http.client
+import threading
+import time
+import urllib.parse
+import cv2
+import numpy as np
+
+# --- CONFIGURATION ---
+ESP32_CAMERA_URL = "http://192.168.1.200:81/stream"
+CONNECT_TIMEOUT = 5.0
+READ_CHUNK_SIZE = 32 * 1024
+
+# Start-of-frame markers that carry the image size (baseline, progressive, ...).
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_REDUCED_DECODE_FLAGS = [
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+    (1, cv2.IMREAD_COLOR),
+]
+
+
+def jpeg_dimensions(jpeg):
+    """Reads (width, height) from the JPEG header without decoding. None if not found."""
+    i = 2
+    while i + 9 < len(jpeg):
+        if jpeg[i] != 0xFF:
+            return None
+        marker = jpeg[i + 1]
+        if marker in _SOF_MARKERS:
+            height = int.from_bytes(jpeg[i + 5:i + 7], "big")
+            width = int.from_bytes(jpeg[i + 7:i + 9], "big")
+            return width, height
+        i += 2 + int.from_bytes(jpeg[i + 2:i + 4], "big")
+    return None
+
+
+def reduced_decode_flag(jpeg, min_size):
+    """Picks the IMREAD_REDUCED_* flag that keeps the image at least min_size=(w, h)."""
+    dims = jpeg_dimensions(jpeg) if min_size else None
+    if not dims:
+        return cv2.IMREAD_COLOR
+    for factor, flag in _REDUCED_DECODE_FLAGS:
+        if dims[0] // factor >= min_size[0] and dims[1] // factor >= min_size[1]:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def decode_jpeg(jpeg, min_size=None):
+    """Decodes JPEG bytes to a BGR image, scaled down in the decoder when min_size allows."""
+    return cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), reduced_decode_flag(jpeg, min_size))
+
+
+class MJPEGStreamReader:
+    """
+    Reads an MJPEG stream on a background thread and keeps only the newest
+    JPEG, so a slow consumer never works through a backlog of stale frames.
+    Incoming data goes into one reusable bytearray; complete frames are cut
+    out using each part's Content-Length (or the next boundary if absent).
+    """
+    def __init__(self, url=ESP32_CAMERA_URL, timeout=CONNECT_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+        self._connection = None
+        self._response = None
+        self._boundary = b"--"
+        self._thread = None
+        self._running = False
+        self._condition = threading.Condition()
+        self._latest_jpeg = None
+        self._latest_seq = 0
+        self._read_seq = 0
+        self._start_time = None
+        # Statistics
+        self.bytes_received = 0
+        self.frames_received = 0
+        self.frames_skipped = 0
+        self.frames_decoded = 0
+        self.decode_seconds = 0.0
+        self.decode_cpu_seconds = 0.0
+
+    def start(self):
+        """Connects and starts the reader thread. Returns False if the stream cannot be opened."""
+        parsed = urllib.parse.urlsplit(self.url)
+        try:
+            self._connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=self.timeout)
+            self._connection.request("GET", parsed.path or "/")
+            self._response = self._connection.getresponse()
+        except OSError as e:
+            print(f"[Stream] Could not connect to {self.url}: {e}")
+            return False
+        if self._response.status != 200:
+            print(f"[Stream] {self.url} answered HTTP {self._response.status}.")
+            return False
+
+        content_type = self._response.getheader("Content-Type", "")
+        if "boundary=" in content_type:
+            self._boundary = b"--" + content_type.split("boundary=", 1)[1].strip().strip('"').encode()
+        self._running = True
+        self._start_time = time.perf_counter()
+        self._thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._thread.start()
+        return True
+
+    def isOpened(self):
+        return self._running
+
+    def _read_loop(self):
+        buffer = bytearray()
+        try:
+            while self._running:
+                chunk = self._response.read1(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.bytes_received += len(chunk)
+                buffer += chunk
+                self._extract_frames(buffer)
+        except (OSError, http.client.HTTPException, AttributeError) as e:
+            # AttributeError: release() closed the response under read1().
+            if self._running:
+                print(f"[Stream] Connection lost: {e}")
+        finally:
+            self._running = False
+            with self._condition:
+                self._condition.notify_all()
+
+    def _extract_frames(self, buffer):
+        while True:
+            header_end = buffer.find(b"\r\n\r\n")
+            if header_end < 0:
+                return
+            headers = bytes(buffer[:header_end]).lower()
+            body_start = header_end + 4
+            length_at = headers.find(b"content-length:")
+            if length_at >= 0:
+                line_end = headers.find(b"\r\n", length_at)
+                length = int(headers[length_at + 15:line_end if line_end >= 0 else None])
+                body_end = body_start + length
+                if len(buffer) < body_end:
+                    return
+            else:
+                body_end = buffer.find(self._boundary, body_start)
+                if body_end < 0:
+                    return
+            if buffer[body_start:body_start + 2] == b"\xff\xd8":
+                self._publish(bytes(buffer[body_start:body_end]))
+            del buffer[:body_end]
+
+    def _publish(self, jpeg):
+        with self._condition:
+            if self._latest_seq > self._read_seq:
+                self.frames_skipped += 1
+            self._latest_jpeg = jpeg
+            self._latest_seq += 1
+            self.frames_received += 1
+            self._condition.notify_all()
+
+    def read_jpeg(self, timeout=2.0):
+        """Waits for a frame newer than the last one returned. Returns JPEG bytes or None."""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._latest_seq > self._read_seq or not self._running, timeout):
+                return None
+            if self._latest_seq <= self._read_seq:
+                return None
+            self._read_seq = self._latest_seq
+            return self._latest_jpeg
+
+    def decode(self, jpeg, min_size=None):
+        """Decodes one frame and accounts its wall and CPU time."""
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        frame = decode_jpeg(jpeg, min_size)
+        self.decode_seconds += time.perf_counter() - wall_start
+        self.decode_cpu_seconds += time.thread_time() - cpu_start
+        self.frames_decoded += 1
+        return frame
+
+    def read(self, min_size=None):
+        """cv2.VideoCapture-style (ok, frame) read of the newest frame."""
+        jpeg = self.read_jpeg()
+        if jpeg is None:
+            return False, None
+        frame = self.decode(jpeg, min_size)
+        return frame is not None, frame
+
+    def stats(self):
+        elapsed = max(time.perf_counter() - self._start_time, 1e-9) if self._start_time else 0.0
+        decoded = max(self.frames_decoded, 1)
+        return {
+            "seconds": elapsed,
+            "bytes_per_second": self.bytes_received / elapsed if elapsed else 0.0,
+            "frames_received": self.frames_received,
+            "frames_skipped": self.frames_skipped,
+            "frames_decoded": self.frames_decoded,
+            "decode_ms_per_frame": 1000 * self.decode_seconds / decoded,
+            "decode_cpu_ms_per_frame": 1000 * self.decode_cpu_seconds / decoded,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"[Stream] {s['frames_received']} frames in {s['seconds']:.1f}s "
+              f"({s['bytes_per_second'] / 1024:.1f} KiB/s), {s['frames_decoded']} decoded, "
+              f"{s['frames_skipped']} skipped unread | decode {s['decode_ms_per_frame']:.2f} ms/frame "
+              f"({s['decode_cpu_ms_per_frame']:.2f} ms CPU)")
+
+    def release(self):
+        self._running = False
+        if self._connection is not None:
+            self._connection.close()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+
+if __name__ == "__main__":
+    # Quick bandwidth / decode-cost check against the camera.
+    reader = MJPEGStreamReader()
+    if reader.start():
+        end_time = time.time() + 10
+        while time.time() < end_time and reader.isOpened():
+            reader.read(min_size=(224, 224))
+        reader.print_stats()
+        reader.release()
@@ -6,39 +6,241 @@ import websockets
 import threading
 import queue
 import time
-import tensorflow as tf
+import json
+import os
+import glob
+import hashlib
+from mjpeg_stream import MJPEGStreamReader
+from camera_snapshot import SnapshotCamera
 
-ESP32_CAMERA_URL = "http://192.168.1.200:81/stream" 
+ESP32_CAMERA_URL = "http://192.168.1.200:81/stream"
+ESP32_CAMERA_BASE_URL = "http://192.168.1.200"
 WEBSOCKET_URI = "ws://localhost:8765"
+MODEL_PATH = 'my_object_model.h5'
 CLASS_NAMES = ["background", "egg", "paper_box", "power_bank"]
-CONFIDENCE_THRESHOLD = 75.0 
+CONFIDENCE_THRESHOLD = 75.0
+INPUT_SIZE = (224, 224)
+# Convert the .h5 once to TFLite and keep it next to it as
+# my_object_model.<hash>.tflite. Later starts load that file instead, and if
+# the small tflite_runtime package is installed TensorFlow is never imported.
+USE_TFLITE_CACHE = True
+# "mjpeg" reads the stream with mjpeg_stream.MJPEGStreamReader, which only
+# decodes the frames we classify, at a reduced JPEG scale. "opencv" is the
+# old cv2.VideoCapture path that decodes every frame at full size.
+# "snapshot" leaves /stream alone and fetches single JPEGs from /capture,
+# and only while the controller is identifying (no frames once it has
+# sent STATUS:LOCKED, until the next STATUS:IDENTIFYING).
+CAMERA_CLIENT = "mjpeg"
+STREAM_STATS_INTERVAL = 30.0
+# Pause between recognitions in the main loop.
+RECOGNITION_INTERVAL = 0.1
 
-print("[Recognizer] Loading machine learning model...")
-try:
-    model = tf.keras.models.load_model('my_object_model.h5')
-    print("[Recognizer] Model loaded successfully.")
-except Exception as e:
-    print(f"CRITICAL ERROR: Could not load model. Error: {e}")
-    exit()
+# train_model.py saves the class order next to the model (classes added later
+# are appended), so prefer it over the list above when it exists.
+CLASS_NAMES_PATH = os.path.splitext(MODEL_PATH)[0] + ".classes.json"
+if os.path.exists(CLASS_NAMES_PATH):
+    with open(CLASS_NAMES_PATH) as class_file:
+        CLASS_NAMES = json.load(class_file)
+    print(f"[Recognizer] Class order from {CLASS_NAMES_PATH}: {CLASS_NAMES}")
 
 outgoing_queue = queue.Queue()
 shutdown_event = threading.Event()
+# Cleared by the controller's STATUS:LOCKED, set again by STATUS:IDENTIFYING.
+recognition_wanted = threading.Event()
+recognition_wanted.set()
+
+
+def _file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as model_file:
+        for chunk in iter(lambda: model_file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def _tflite_interpreter_class():
+    """Prefers the lightweight tflite_runtime package and only falls back to TensorFlow."""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class ObjectClassifier:
+    """
+    Loads the recognition model and classifies single frames.
+    Nothing heavy happens at import time: TensorFlow is imported inside
+    load(), and only when there is no cached TFLite artifact to use.
+    Every start-up phase is recorded in `timings` (seconds).
+    """
+    def __init__(self, model_path=MODEL_PATH, use_tflite_cache=USE_TFLITE_CACHE):
+        self.model_path = model_path
+        self.use_tflite_cache = use_tflite_cache
+        self.timings = {}
+        self.backend = None
+        self.error = None
+        self._keras_model = None
+        self._interpreter = None
+        self.num_classes = None
+
+    def _timed(self, phase, start):
+        self.timings[phase] = time.perf_counter() - start
+
+    def load(self):
+        start = time.perf_counter()
+        tflite_path = None
+        if self.use_tflite_cache:
+            digest = _file_digest(self.model_path)
+            tflite_path = f"{os.path.splitext(self.model_path)[0]}.{digest}.tflite"
+            self._timed("hash_model", start)
+            if os.path.exists(tflite_path):
+                self._load_tflite(tflite_path)
+                return
+
+        start = time.perf_counter()
+        import tensorflow as tf
+        self._timed("import_tensorflow", start)
+
+        start = time.perf_counter()
+        self._keras_model = tf.keras.models.load_model(self.model_path)
+        self._timed("load_h5", start)
+        self.backend = "keras"
+        self.num_classes = self._keras_model.output_shape[-1]
+
+        if tflite_path:
+            start = time.perf_counter()
+            try:
+                converter = tf.lite.TFLiteConverter.from_keras_model(self._keras_model)
+                tflite_bytes = converter.convert()
+                # Drop artifacts converted from older versions of the .h5.
+                for stale in glob.glob(f"{os.path.splitext(self.model_path)[0]}.*.tflite"):
+                    os.remove(stale)
+                with open(tflite_path, "wb") as tflite_file:
+                    tflite_file.write(tflite_bytes)
+                self._timed("convert_tflite", start)
+                print(f"[Recognizer] Cached converted model as {tflite_path}")
+                self._load_tflite(tflite_path)
+            except Exception as e:
+                print(f"[Recognizer] TFLite conversion failed ({e}); using the Keras model.")
+
+    def _load_tflite(self, tflite_path):
+        start = time.perf_counter()
+        Interpreter = _tflite_interpreter_class()
+        self._interpreter = Interpreter(model_path=tflite_path)
+        self._interpreter.allocate_tensors()
+        self._input_index = self._interpreter.get_input_details()[0]["index"]
+        output_details = self._interpreter.get_output_details()[0]
+        self._output_index = output_details["index"]
+        self.num_classes = int(output_details["shape"][-1])
+        self._keras_model = None
+        self.backend = "tflite"
+        self._timed("load_tflite", start)
+
+    def warm_up(self):
+        """Runs one dummy inference so graph tracing / tensor allocation is paid up front."""
+        start = time.perf_counter()
+        self.predict_scores(np.zeros((INPUT_SIZE[1], INPUT_SIZE[0], 3), dtype=np.uint8))
+        self._timed("warm_up", start)
+
+    def prepare(self):
+        """load() + warm_up(), catching errors so it can run on a background thread."""
+        try:
+            self.load()
+            self.warm_up()
+        except Exception as e:
+            self.error = e
+
+    def predict_scores(self, image):
+        """Returns softmax scores for one INPUT_SIZE image (BGR uint8, as read by OpenCV)."""
+        batch = np.expand_dims(image.astype(np.float32), 0)
+        if self._interpreter is not None:
+            self._interpreter.set_tensor(self._input_index, batch)
+            self._interpreter.invoke()
+            logits = self._interpreter.get_tensor(self._output_index)[0]
+        else:
+            # Calling the model directly skips predict()'s per-call dataset setup.
+            logits = self._keras_model(batch, training=False).numpy()[0]
+        exp = np.exp(logits - np.max(logits))
+        return exp / exp.sum()
+
+    def classify(self, frame):
+        """Returns (class_name, confidence_percent) for a full camera frame."""
+        score = self.predict_scores(cv2.resize(frame, INPUT_SIZE))
+        predicted_index = int(np.argmax(score))
+        return CLASS_NAMES[predicted_index], 100 * float(score[predicted_index])
+
+
+def open_camera(camera_client=CAMERA_CLIENT, stream_url=ESP32_CAMERA_URL, base_url=ESP32_CAMERA_BASE_URL):
+    """Connects the selected camera client. Returns (cap, read_frame); check cap.isOpened()."""
+    if camera_client == "snapshot":
+        print(f"Attempting to connect to camera at {base_url}")
+        cap = SnapshotCamera(base_url, min_size=INPUT_SIZE)
+        cap.start()
+        return cap, cap.read
+    print(f"Attempting to connect to camera stream at {stream_url}")
+    if camera_client == "mjpeg":
+        cap = MJPEGStreamReader(stream_url)
+        cap.start()
+        return cap, lambda: cap.read(min_size=INPUT_SIZE)
+    cap = cv2.VideoCapture(stream_url)
+    return cap, cap.read
+
+
+def detection_message(predicted_class, confidence):
+    """Applies the confidence threshold. Returns (detected_object or None, "OBJECT:..." message)."""
+    detected_object = None
+    if confidence > CONFIDENCE_THRESHOLD and predicted_class != "background":
+        detected_object = predicted_class
+    message = f"OBJECT:{detected_object.upper()}" if detected_object else "OBJECT:None"
+    return detected_object, message
+
+
+def print_startup_report(timings):
+    print("\n--- Recognizer Startup Breakdown ---")
+    for phase, seconds in timings.items():
+        print(f"{phase:<26}{seconds * 1000:>9.1f} ms")
+    print("------------------------------------\n")
+
+
+def handle_status_message(message):
+    """Tracks whether the controller currently needs object recognitions."""
+    if message.startswith("STATUS:LOCKED"):
+        recognition_wanted.clear()
+    elif message == "STATUS:IDENTIFYING":
+        recognition_wanted.set()
+
 
 def websocket_thread():
+    async def sender(websocket):
+        while not shutdown_event.is_set():
+            try:
+                message = outgoing_queue.get_nowait()
+                await websocket.send(message)
+            except queue.Empty:
+                await asyncio.sleep(0.01)
+            except websockets.exceptions.ConnectionClosed:
+                break
+    async def receiver(websocket):
+        while not shutdown_event.is_set():
+            try:
+                message = await websocket.recv()
+                handle_status_message(message)
+            except websockets.exceptions.ConnectionClosed:
+                print("[Recognizer Network] Connection lost. Reconnecting...")
+                break
     async def client_handler():
         while not shutdown_event.is_set():
             try:
                 async with websockets.connect(WEBSOCKET_URI) as websocket:
                     print("[Recognizer Network] Connected to server.")
-                    while not shutdown_event.is_set():
-                        try:
-                            message = outgoing_queue.get(timeout=0.1)
-                            await websocket.send(message)
-                        except queue.Empty:
-                            await asyncio.sleep(0.01)
-                        except websockets.exceptions.ConnectionClosed:
-                            print("[Recognizer Network] Connection lost. Reconnecting...")
-                            break 
+                    # Either side ending (lost connection) drops out to reconnect.
+                    _, pending = await asyncio.wait(
+                        [asyncio.ensure_future(sender(websocket)), asyncio.ensure_future(receiver(websocket))],
+                        return_when=asyncio.FIRST_COMPLETED)
+                    for task in pending:
+                        task.cancel()
             except (ConnectionRefusedError, OSError, websockets.exceptions.InvalidURI) as e:
                 if not shutdown_event.is_set():
                     print(f"[Recognizer Network] Connection failed: {e}. Retrying in 2 seconds...")
@@ -46,52 +248,82 @@ def websocket_thread():
     asyncio.run(client_handler())
 
 def main():
-    print(f"Attempting to connect to camera stream at {ESP32_CAMERA_URL}")
-    cap = cv2.VideoCapture(ESP32_CAMERA_URL)
+    startup_start = time.perf_counter()
+    print("[Recognizer] Loading machine learning model in the background...")
+    classifier = ObjectClassifier()
+    if not os.path.exists(MODEL_PATH):
+        print(f"CRITICAL ERROR: Model file {MODEL_PATH} not found.")
+        return
+    loader = threading.Thread(target=classifier.prepare, daemon=True)
+    loader.start()
+
+    # The camera connects while the model loads and warms up.
+    camera_start = time.perf_counter()
+    cap, read_frame = open_camera()
+    camera_seconds = time.perf_counter() - camera_start
     if not cap.isOpened():
         print("Error: Could not open camera stream.")
         return
 
     print("Camera stream opened successfully.")
+    loader.join()
+    if classifier.error is not None:
+        print(f"CRITICAL ERROR: Could not load model. Error: {classifier.error}")
+        cap.release()
+        return
+    print(f"[Recognizer] Model ready ({classifier.backend}).")
+    if classifier.num_classes != len(CLASS_NAMES):
+        print(f"WARNING: Model predicts {classifier.num_classes} classes but CLASS_NAMES has {len(CLASS_NAMES)}.")
+    timings = dict(classifier.timings)
+    timings["camera_connect"] = camera_seconds
     last_sent_message = None
+    last_stats_time = time.time()
 
     while not shutdown_event.is_set():
-        ret, frame = cap.read()
+        if CAMERA_CLIENT == "snapshot" and not recognition_wanted.is_set():
+            # Object locked: fetch nothing until the controller asks again, and
+            # re-send the detection then even if it has not changed.
+            last_sent_message = None
+            if cv2.waitKey(50) & 0xFF == ord('q'):
+                break
+            continue
+
+        ret, frame = read_frame()
         if not ret:
             print("Error: Failed to grab frame.")
             time.sleep(1)
             continue
-        
-        detected_object = None
-        img_resized = cv2.resize(frame, (224, 224))
-        img_array = tf.keras.utils.img_to_array(img_resized)
-        img_array = tf.expand_dims(img_array, 0)
-        predictions = model.predict(img_array)
-        score = tf.nn.softmax(predictions[0])
-        confidence = 100 * np.max(score)
-        predicted_index = np.argmax(score)
-
-        if confidence > CONFIDENCE_THRESHOLD:
-            predicted_class = CLASS_NAMES[predicted_index]
-            if predicted_class != "background":
-                detected_object = predicted_class
-                label = f"Object: {detected_object} ({confidence:.2f}%)"
-                cv2.putText(frame, label, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-        
+        if "first_frame_since_start" not in timings:
+            timings["first_frame_since_start"] = time.perf_counter() - startup_start
+
+        predicted_class, confidence = classifier.classify(frame)
+        detected_object, message_to_send = detection_message(predicted_class, confidence)
+        if detected_object:
+            label = f"Object: {detected_object} ({confidence:.2f}%)"
+            cv2.putText(frame, label, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+
         cv2.imshow("Object Recognition - Gripper View", frame)
-        message_to_send = f"OBJECT:{detected_object.upper()}" if detected_object else "OBJECT:None"
-        
+
         # Only send if the detection changes, to reduce network spam
         if message_to_send != last_sent_message:
             outgoing_queue.put(message_to_send)
             last_sent_message = message_to_send
-        
+            if "first_message_since_start" not in timings:
+                timings["first_message_since_start"] = time.perf_counter() - startup_start
+                print_startup_report(timings)
+
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
-        
-        time.sleep(0.1)
+
+        if CAMERA_CLIENT in ("mjpeg", "snapshot") and time.time() - last_stats_time > STREAM_STATS_INTERVAL:
+            cap.print_stats()
+            last_stats_time = time.time()
+
+        time.sleep(RECOGNITION_INTERVAL)
 
     print("Shutting down application...")
+    if CAMERA_CLIENT in ("mjpeg", "snapshot"):
+        cap.print_stats()
     shutdown_event.set()
     cap.release()
     cv2.destroyAllWindows()
@@ -102,4 +334,4 @@ def main():
 if __name__ == "__main__":
     ws_thread = threading.Thread(target=websocket_thread, daemon=True)
     ws_thread.start()
-    main()
\ No newline at end of file
+    main()
@@ -1,10 +1,18 @@
 # filename: pid_controller.py
 import time
+import numpy as np
 
 class PIDController:
-    """A simple PID controller class."""
+    """
+    A simple PID controller class.
 
-    def __init__(self, Kp, Ki, Kd, setpoint, output_limits=(-180, 180)):
+    dt comes from the timestamp passed to update() (the time the sample was
+    taken) or, if none is given, from `clock`, so the controller can run on
+    recorded or simulated time as well as in real time.
+    """
+
+    def __init__(self, Kp, Ki, Kd, setpoint, output_limits=(-180, 180), clock=time.monotonic,
+                 derivative_on_measurement=False, derivative_filter=0.0, anti_windup=True):
         """
         Initializes the PID controller.
         Args:
@@ -13,52 +21,77 @@ class PIDController:
             Kd (float): Derivative gain.
             setpoint (float): The target value for the controller.
             output_limits (tuple): A tuple (min, max) for the output value.
+            clock (callable): Returns the current time in seconds when update() gets no timestamp.
+            derivative_on_measurement (bool): Differentiate the measurement instead of the error,
+                                              so setpoint changes and the first sample give no kick.
+            derivative_filter (float): Time constant (s) of a first-order low-pass on the derivative; 0 = off.
+            anti_windup (bool): Stop integrating while the output is saturated in the direction of the error.
         """
         self.Kp = Kp
         self.Ki = Ki
         self.Kd = Kd
         self.setpoint = setpoint
         self.output_limits = output_limits
+        self.clock = clock
+        self.derivative_on_measurement = derivative_on_measurement
+        self.derivative_filter = derivative_filter
+        self.anti_windup = anti_windup
 
         self._integral = 0
         self._previous_error = 0
-        self._last_time = time.time()
+        self._previous_value = None
+        self._derivative = 0
+        self._last_time = self.clock()
 
-    def update(self, current_value):
+    def update(self, current_value, timestamp=None):
         """
         Calculates the PID output value for a given measurement.
         Args:
             current_value (float): The current measured value.
+            timestamp (float): When the value was measured, in the clock's time base (default: now).
         Returns:
             float: The calculated output signal.
         """
-        current_time = time.time()
+        current_time = self.clock() if timestamp is None else timestamp
         delta_time = current_time - self._last_time
-        if delta_time == 0:
+        if delta_time <= 0:
             return 0 # Avoid division by zero
 
         error = self.setpoint - current_value
-        
+
         # Proportional term
         P_out = self.Kp * error
 
         # Integral term
-        self._integral += error * delta_time
+        integral_step = error * delta_time
+        self._integral += integral_step
         I_out = self.Ki * self._integral
 
         # Derivative term
-        derivative = (error - self._previous_error) / delta_time
+        if self.derivative_on_measurement:
+            derivative = 0 if self._previous_value is None else -(current_value - self._previous_value) / delta_time
+        else:
+            derivative = (error - self._previous_error) / delta_time
+        if self.derivative_filter > 0:
+            self._derivative += delta_time / (self.derivative_filter + delta_time) * (derivative - self._derivative)
+            derivative = self._derivative
         D_out = self.Kd * derivative
 
         # Calculate the total output
         output = P_out + I_out + D_out
-        
+
         # Clamp the output to the defined limits
         if self.output_limits:
-            output = max(self.output_limits[0], min(self.output_limits[1], output))
+            low, high = self.output_limits
+            if self.anti_windup and ((output > high and error > 0) or (output < low and error < 0)):
+                # Saturated and the error would push further: undo this step's integration.
+                self._integral -= integral_step
+                output -= self.Ki * integral_step
+            output = max(low, min(high, output))
 
         # Update state for next iteration
         self._previous_error = error
+        self._previous_value = current_value
         self._last_time = current_time
 
         return output
@@ -68,8 +101,129 @@ class PIDController:
         self.setpoint = setpoint
         self.reset()
 
-    def reset(self):
-        """Resets the integral and previous error, useful when changing setpoints."""
+    def reset(self, timestamp=None, current_value=None):
+        """
+        Resets the integral and previous error, useful when changing setpoints.
+        Passing the current measurement primes the derivative with it, for a
+        bumpless hand-over: the first update() then gives no derivative kick.
+        """
         self._integral = 0
-        self._previous_error = 0
-        self._last_time = time.time()
\ No newline at end of file
+        self._previous_error = 0 if current_value is None else self.setpoint - current_value
+        self._previous_value = current_value
+        self._derivative = 0
+        self._last_time = self.clock() if timestamp is None else timestamp
+
+
+class PIDControllerBatch:
+    """
+    N independent PID controllers stepped together with numpy, for offline
+    evaluation (gain sweeps, replaying logs). Gains and setpoints are scalars
+    or arrays of length N (pass `size` if they are all scalars); every
+    update() takes one measurement per controller and one shared timestamp.
+    Same maths as PIDController.
+    """
+
+    def __init__(self, Kp, Ki, Kd, setpoint, output_limits=(-180, 180), start_time=0.0,
+                 derivative_on_measurement=False, derivative_filter=0.0, anti_windup=True, size=None):
+        self.Kp, self.Ki, self.Kd, self.setpoint = (np.asarray(v, dtype=np.float64) for v in (Kp, Ki, Kd, setpoint))
+        self.size = size or int(np.broadcast(self.Kp, self.Ki, self.Kd, self.setpoint).size)
+        self.output_limits = output_limits
+        self.derivative_on_measurement = derivative_on_measurement
+        self.derivative_filter = derivative_filter
+        self.anti_windup = anti_windup
+        self.reset(start_time)
+
+    def reset(self, timestamp=0.0, current_values=None):
+        """As PIDController.reset(): current_values (one per controller) primes the derivative."""
+        self._integral = np.zeros(self.size)
+        if current_values is None:
+            self._previous_error = np.zeros(self.size)
+            self._previous_value = None
+        else:
+            self._previous_value = np.broadcast_to(np.asarray(current_values, dtype=np.float64), (self.size,)).copy()
+            self._previous_error = self.setpoint - self._previous_value
+        self._derivative = np.zeros(self.size)
+        self._last_time = timestamp
+
+    def update(self, current_values, timestamp):
+        """One step of all controllers; returns their outputs as an array."""
+        delta_time = timestamp - self._last_time
+        if delta_time <= 0:
+            return np.zeros(self.size)
+        current_values = np.asarray(current_values, dtype=np.float64)
+        error = self.setpoint - current_values
+        integral_step = error * delta_time
+        self._integral += integral_step
+
+        if self.derivative_on_measurement:
+            derivative = (np.zeros(self.size) if self._previous_value is None
+                          else -(current_values - self._previous_value) / delta_time)
+        else:
+            derivative = (error - self._previous_error) / delta_time
+        if self.derivative_filter > 0:
+            self._derivative += delta_time / (self.derivative_filter + delta_time) * (derivative - self._derivative)
+            derivative = self._derivative
+
+        output = self.Kp * error + self.Ki * self._integral + self.Kd * derivative
+        if self.output_limits:
+            low, high = self.output_limits
+            if self.anti_windup:
+                winding = ((output > high) & (error > 0)) | ((output < low) & (error < 0))
+                self._integral -= np.where(winding, integral_step, 0.0)
+                output = output - np.where(winding, self.Ki * integral_step, 0.0)
+            output = np.clip(output, low, high)
+
+        self._previous_error = error
+        self._previous_value = current_values
+        self._last_time = timestamp
+        return output
+
+    def run(self, values, timestamps):
+        """
+        Replays recorded measurements: values is (T,) or (T, N), timestamps (T,).
+        Returns the (T, N) outputs. The controllers continue from their current state.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        outputs = np.empty((len(timestamps), self.size))
+        for i, timestamp in enumerate(timestamps):
+            outputs[i] = self.update(values[i], timestamp)
+        return outputs
+
+
+if __name__ == "__main__":
+    # Closes a simulated grasp (servo pulse -> contact -> first-order force) on
+    # sample timestamps, paced at real time and at 100x, plus a batch run, and
+    # checks that all three give the same pulses.
+    PERIOD, SECONDS, STEP = 0.02, 3.0, 20.0
+    CONTACT, STIFFNESS, TAU = 1000.0, 20.0, 0.3
+    GAINS = dict(Kp=0.002, Ki=1e-5, Kd=0.003, setpoint=700)
+
+    def grasp(speedup):
+        pid = PIDController(**GAINS, clock=lambda: 0.0, derivative_filter=0.05)
+        pulse, force, pulses = 800.0, 0.0, []
+        start = time.perf_counter()
+        for i in range(1, int(SECONDS / PERIOD) + 1):
+            if speedup:
+                time.sleep(max(0.0, start + i * PERIOD / speedup - time.perf_counter()))
+            pulse = min(2100.0, max(800.0, pulse + pid.update(force, timestamp=i * PERIOD) * STEP))
+            force += PERIOD / TAU * (STIFFNESS * max(0.0, pulse - CONTACT) - force)
+            pulses.append(pulse)
+        return np.array(pulses), time.perf_counter() - start
+
+    def grasp_batch(count):
+        pid = PIDControllerBatch(**GAINS, derivative_filter=0.05, size=count)
+        pulse, force = np.full(count, 800.0), np.zeros(count)
+        pulses = np.empty((int(SECONDS / PERIOD), count))
+        start = time.perf_counter()
+        for i in range(1, len(pulses) + 1):
+            pulse = np.clip(pulse + pid.update(force, i * PERIOD) * STEP, 800.0, 2100.0)
+            force += PERIOD / TAU * (STIFFNESS * np.maximum(0.0, pulse - CONTACT) - force)
+            pulses[i - 1] = pulse
+        return pulses, time.perf_counter() - start
+
+    real_time, real_seconds = grasp(1)
+    fast, fast_seconds = grasp(100)
+    batch, batch_seconds = grasp_batch(1000)
+    print(f"{SECONDS:.0f} s grasp at 1x:   {real_seconds:.2f} s wall, final pulse {real_time[-1]:.2f}")
+    print(f"{SECONDS:.0f} s grasp at 100x: {fast_seconds:.3f} s wall, identical: {np.array_equal(real_time, fast)}")
+    print(f"Batch of 1000:      {batch_seconds:.3f} s wall, identical: {np.array_equal(batch, np.repeat(real_time[:, None], batch.shape[1], axis=1))}")
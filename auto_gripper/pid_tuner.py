@@ -0,0 +1,198 @@
+# filename: pid_tuner.py
+# Offline PID gain sweep for main_controller.py.
+#   1. Fits a pulse -> force plant to each group of MATLAB step-test logs:
+#      force = k * lag_tau( max(0, pulse(t - theta) - contact_pulse) ^ n )
+#      (contact point, stiffness curve, first-order lag, dead time).
+#   2. Simulates main_controller's CLOSING loop (PIDController, SERVO_STEP_SIZE,
+#      pulse clamping, the HOLDING test) for thousands of gain sets at once
+#      with PIDControllerBatch, one numpy array element per gain set. The approach
+#      slew before contact does not use the gains, so each run starts where it
+#      hands over: at the plant's contact pulse, with a primed PID reset.
+#   3. Ranks the gains per object class by time to HOLDING, penalising overshoot
+#      past ACCEPTABLE_ERROR_MARGIN and a settled force off the object's target,
+#      and writes the tables to OUTPUT_FILE.
+# Usage: python pid_tuner.py
+
+import os
+import numpy as np
+from pid_controller import PIDControllerBatch
+from main_controller import (TARGET_FORCES, ACCEPTABLE_ERROR_MARGIN, MIN_FORCE_PER_CLAW, KP, KI, KD,
+                             SERVO_OPEN_PULSE, SERVO_MAX_CLOSE_PULSE, SERVO_STEP_SIZE)
+
+# --- CONFIGURATION ---
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "matlab")
+# Logs recorded with the same object, fitted together as one plant.
+PLANT_LOGS = {
+    "soft": ["gripper_log.csv", "gripper_log_1.csv"],
+    "firm": ["gripper_kalman_log_1.csv", "gripper_kalman_log_2.csv", "gripper_kalman_log_3.csv"],
+    "sponge": ["gripper_kalman_log_1_sponge.csv", "gripper_kalman_log_2_sponge.csv", "gripper_kalman_log_3_sponge.csv"],
+}
+# Which fitted plant stands in for each object class of TARGET_FORCES.
+OBJECT_PLANTS = {"paper_box": "sponge", "power_bank": "firm", "egg": "firm", "default": "soft"}
+
+# Plant fit grid
+CONTACT_PULSES = np.arange(1400, 2000, 5.0)
+TIME_CONSTANTS = np.geomspace(0.05, 10, 30)
+DEAD_TIMES = np.arange(0, 0.55, 0.1)
+STIFFNESS_EXPONENTS = (0.5, 0.75, 1.0)
+
+# Gain grid (every combination is simulated)
+KP_VALUES = np.geomspace(1e-4, 1e-2, 21)
+KI_VALUES = np.concatenate([[0.0], np.geomspace(1e-8, 1e-4, 13)])
+KD_VALUES = np.concatenate([[0.0], np.geomspace(1e-8, 1e-2, 13)])
+
+CONTROL_PERIOD = 0.02  # The ESP32 client sends a packet every 20 ms
+SIM_SECONDS = 20.0
+PID_OUTPUT_LIMITS = (-180, 180)  # PIDController default
+# Seconds added to the score per force unit of peak force above target + margin,
+# and of settled force outside target +/- margin (HOLDING freezes the pulse, so
+# a grasp that reaches HOLDING on the way through can still drift off target).
+ERROR_PENALTY = 0.02
+TOP_N = 5
+OUTPUT_FILE = "pid_gain_table.csv"
+
+
+def load_log(path):
+    """Time, pulse, force and a mask dropping single-sample force dropouts (0 between two loaded samples)."""
+    data = np.genfromtxt(path, delimiter=",", names=True)
+    force = data["MeasuredForce"]
+    keep = np.ones(len(force), dtype=bool)
+    keep[1:-1] &= ~((force[1:-1] == 0) & (force[:-2] > 100) & (force[2:] > 100))
+    return data["Time"], data["ServoPulse"], force, keep
+
+
+def fit_plant(logs):
+    """
+    Grid search over contact pulse, time constant, dead time and exponent,
+    with the stiffness k solved by least squares, summing the error over all
+    logs of one object. Returns a dict of the best parameters and its RMSE.
+    """
+    p0, tau, n = [a.ravel() for a in np.meshgrid(CONTACT_PULSES, TIME_CONSTANTS, STIFFNESS_EXPONENTS, indexing="ij")]
+    best = None
+    for theta in DEAD_TIMES:
+        yy = np.zeros(len(p0))
+        yf = np.zeros(len(p0))
+        ff = 0.0
+        samples = 0
+        for t, pulse, force, keep in logs:
+            delayed = np.interp(t - theta, t, pulse, left=pulse[0])
+            drive = np.maximum(0.0, delayed[:, None] - p0) ** n
+            decay = np.exp(-np.diff(t, prepend=t[0])[:, None] / tau)
+            state = np.zeros(len(p0))
+            response = np.empty_like(drive)
+            for i in range(len(t)):
+                state = decay[i] * state + (1 - decay[i]) * drive[i]
+                response[i] = state
+            y, f = response[keep], force[keep][:, None]
+            yy += (y * y).sum(0)
+            yf += (y * f).sum(0)
+            ff += float((f * f).sum())
+            samples += int(keep.sum())
+        k = np.maximum(yf / np.maximum(yy, 1e-12), 0.0)
+        sse = ff - 2 * k * yf + k * k * yy
+        j = int(np.argmin(sse))
+        if best is None or sse[j] < best["sse"]:
+            best = {"contact_pulse": p0[j], "tau": tau[j], "dead_time": theta, "exponent": n[j],
+                    "stiffness": k[j], "sse": sse[j], "rmse": float(np.sqrt(max(sse[j], 0) / samples))}
+    return best
+
+
+def gain_grid():
+    kp, ki, kd = np.meshgrid(KP_VALUES, KI_VALUES, KD_VALUES, indexing="ij")
+    return np.concatenate([[KP], kp.ravel()]), np.concatenate([[KI], ki.ravel()]), np.concatenate([[KD], kd.ravel()])
+
+
+def simulate(plant, target, kp, ki, kd, dt=CONTROL_PERIOD, seconds=SIM_SECONDS):
+    """
+    Runs main_controller's CLOSING loop for every gain set (kp/ki/kd arrays) from
+    the plant's contact pulse, where the approach slew hands over to the PID.
+    Once a gain set reaches HOLDING its pulse is frozen, as in the controller,
+    and the plant keeps settling. Returns per gain set: time to HOLDING from
+    contact (nan if never), peak force and final force.
+    """
+    count = len(kp)
+    pulse = np.full(count, float(plant["contact_pulse"]))
+    # Reset one packet before the first sample, primed with the force there, like the
+    # bumpless pid.reset() at contact.
+    pid = PIDControllerBatch(kp, ki, kd, target, output_limits=PID_OUTPUT_LIMITS)
+    pid.reset(-dt, current_values=0.0)
+    state = np.zeros(count)
+    holding = np.zeros(count, dtype=bool)
+    time_to_holding = np.full(count, np.nan)
+    peak = np.zeros(count)
+    decay = np.exp(-dt / plant["tau"])
+    delay = int(round(plant["dead_time"] / dt))
+    sent = np.full((delay + 1, count), float(plant["contact_pulse"]))  # Pulses still in the dead time
+
+    for step in range(int(seconds / dt)):
+        force = plant["stiffness"] * state
+        np.maximum(peak, force, out=peak)
+
+        closing = ~holding
+        error = target - force
+        output = pid.update(force, step * dt)
+        pulse = np.where(closing, np.clip(pulse + output * SERVO_STEP_SIZE, SERVO_OPEN_PULSE, SERVO_MAX_CLOSE_PULSE), pulse)
+
+        reached = closing & (np.abs(error) < ACCEPTABLE_ERROR_MARGIN) & (force > MIN_FORCE_PER_CLAW)
+        time_to_holding[reached] = step * dt
+        holding |= reached
+
+        sent = np.roll(sent, 1, axis=0)
+        sent[0] = pulse
+        drive = np.maximum(0.0, sent[delay] - plant["contact_pulse"]) ** plant["exponent"]
+        state = decay * state + (1 - decay) * drive
+
+    return time_to_holding, peak, plant["stiffness"] * state
+
+
+def rank_gains(plant, target, kp, ki, kd):
+    """Rows for every gain set sorted by score; gain sets that never hold (or lose the grip) sort last."""
+    time_to_holding, peak, final = simulate(plant, target, kp, ki, kd)
+    overshoot = peak - target
+    excess = np.maximum(0.0, overshoot - ACCEPTABLE_ERROR_MARGIN) + np.maximum(0.0, np.abs(final - target) - ACCEPTABLE_ERROR_MARGIN)
+    # Reaching HOLDING only counts if the grip is still there once the force settles.
+    held = ~np.isnan(time_to_holding) & (final > MIN_FORCE_PER_CLAW)
+    score = np.where(held, time_to_holding + ERROR_PENALTY * excess, np.inf)
+    order = np.argsort(score, kind="stable")
+    return [{"kp": kp[i], "ki": ki[i], "kd": kd[i], "time_to_holding": time_to_holding[i], "overshoot": overshoot[i],
+             "final_error": final[i] - target, "score": score[i], "current": i == 0} for i in order]
+
+
+def print_plant(name, plant):
+    print(f"  {name:<7} contact {plant['contact_pulse']:.0f} us, force = {plant['stiffness']:.3g} * dp^{plant['exponent']:g}, "
+          f"tau {plant['tau']:.2f} s, dead time {plant['dead_time']:.1f} s (fit RMSE {plant['rmse']:.1f})")
+
+
+def format_row(rank, row):
+    held = "never" if np.isnan(row["time_to_holding"]) else f"{row['time_to_holding']:.2f} s"
+    return (f"  {rank:>4}  Kp={row['kp']:<10.3g} Ki={row['ki']:<10.3g} Kd={row['kd']:<10.3g} "
+            f"HOLDING {held:>8}  overshoot {row['overshoot']:+7.0f}  final {row['final_error']:+6.0f}")
+
+
+def main():
+    print("[Tuner] Fitting plants...")
+    plants = {}
+    for name, files in PLANT_LOGS.items():
+        plants[name] = fit_plant([load_log(os.path.join(LOG_DIR, f)) for f in files])
+        print_plant(name, plants[name])
+
+    kp, ki, kd = gain_grid()
+    print(f"[Tuner] Simulating {len(kp)} gain sets per object ({SIM_SECONDS:.0f} s at {1 / CONTROL_PERIOD:.0f} Hz)...")
+    with open(OUTPUT_FILE, "w") as table:
+        table.write("Object,Plant,Target,Rank,Kp,Ki,Kd,TimeToHolding,Overshoot,FinalError\n")
+        for obj, target in TARGET_FORCES.items():
+            plant_name = OBJECT_PLANTS.get(obj, OBJECT_PLANTS["default"])
+            rows = rank_gains(plants[plant_name], target, kp, ki, kd)
+            print(f"\n--- {obj} (target {target}, plant '{plant_name}') ---")
+            for rank, row in enumerate(rows[:TOP_N], 1):
+                print(format_row(rank, row))
+            current = next(i for i, row in enumerate(rows) if row["current"])
+            print(format_row(current + 1, rows[current]) + "  <- current KP/KI/KD")
+            for rank, row in enumerate(rows[:TOP_N], 1):
+                table.write(f"{obj},{plant_name},{target},{rank},{row['kp']:.6g},{row['ki']:.6g},{row['kd']:.6g},"
+                            f"{row['time_to_holding']:.3f},{row['overshoot']:.1f},{row['final_error']:.1f}\n")
+    print(f"\n[Tuner] Gain tables written to {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
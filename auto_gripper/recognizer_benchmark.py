@@ -0,0 +1,129 @@
+# filename: recognizer_benchmark.py
+# End-to-end benchmark of object_recognizer.py without the ESP32-CAM: a
+# fake_camera_server plays a scripted class schedule, and the recognizer's
+# own camera client, classifier and OBJECT: message logic run against it.
+# Reports frames per second, time until the correct OBJECT: message after
+# each scene change, and per-frame accuracy.
+import time
+import numpy as np
+import object_recognizer as recognizer
+from fake_camera_server import FakeCamera, start_server
+
+# --- CONFIGURATION ---
+BENCHMARK_PORT = 8090
+# Any object_recognizer.CAMERA_CLIENT value: "mjpeg", "snapshot" or "opencv".
+BENCHMARK_CAMERA_CLIENT = "mjpeg"
+BENCHMARK_FPS = 15.0
+BENCHMARK_FRAMESIZE = 5
+BENCHMARK_VIDEO_PATH = None
+BENCHMARK_SCHEDULE = [(0, "background"), (5, "egg"), (12, "paper_box"), (19, "power_bank"), (26, "background")]
+BENCHMARK_DURATION = 32.0
+# Keep object_recognizer's pause between recognitions so the FPS matches the
+# real loop; set to False to measure the pipeline's ceiling.
+BENCHMARK_THROTTLE = True
+
+
+def expected_message(object_class):
+    """The OBJECT: message the recognizer should send for a scene of object_class."""
+    return recognizer.detection_message(object_class, 100.0)[1]
+
+
+def time_to_correct(schedule, duration, sent_messages):
+    """
+    For every scheduled scene, seconds from its start until the recognizer's
+    latest sent message is the correct one (None if that never happened).
+    sent_messages is a list of (seconds, message) in send order.
+    """
+    results = []
+    for i, (start, object_class) in enumerate(schedule):
+        end = schedule[i + 1][0] if i + 1 < len(schedule) else duration
+        expected = expected_message(object_class)
+        # The message already standing when the scene started counts at t=0.
+        standing = [m for t, m in sent_messages if t <= start]
+        latency = 0.0 if standing and standing[-1] == expected else None
+        if latency is None:
+            for t, message in sent_messages:
+                if start < t < end and message == expected:
+                    latency = t - start
+                    break
+        results.append((start, object_class, latency))
+    return results
+
+
+def print_report(frames, duration, inference_seconds, scene_results):
+    print("\n--- Recognizer Benchmark ---")
+    print(f"Camera client:      {BENCHMARK_CAMERA_CLIENT} "
+          f"({BENCHMARK_FPS:g} FPS source, framesize {BENCHMARK_FRAMESIZE}, throttle {BENCHMARK_THROTTLE})")
+    if not frames:
+        print("No frames were classified.")
+        return
+    correct = np.array([ok for _, ok in frames])
+    print(f"Frames classified:  {len(frames)} in {duration:.1f}s ({len(frames) / duration:.1f} FPS)")
+    print(f"Inference:          {1000 * np.mean(inference_seconds):.1f} ms mean, "
+          f"{1000 * np.percentile(inference_seconds, 95):.1f} ms p95")
+    print(f"Frame accuracy:     {100 * correct.mean():.1f}%")
+    print("Time to correct OBJECT: message per scene:")
+    for start, object_class, latency in scene_results:
+        shown = f"{latency * 1000:.0f} ms" if latency is not None else "never"
+        print(f"  t={start:>5.1f}s  {object_class:<12}{shown:>10}")
+    for object_class in sorted({c for c, _ in frames}):
+        hits = [ok for c, ok in frames if c == object_class]
+        print(f"  accuracy {object_class:<12}{100 * np.mean(hits):>6.1f}% of {len(hits)} frames")
+    print("----------------------------\n")
+
+
+def main():
+    camera = FakeCamera(framesize=BENCHMARK_FRAMESIZE, fps=BENCHMARK_FPS,
+                        video_path=BENCHMARK_VIDEO_PATH, schedule=BENCHMARK_SCHEDULE)
+    server = start_server(camera, BENCHMARK_PORT)
+
+    classifier = recognizer.ObjectClassifier()
+    classifier.prepare()
+    if classifier.error is not None:
+        print(f"CRITICAL ERROR: Could not load model. Error: {classifier.error}")
+        server.shutdown()
+        return
+    print(f"[Benchmark] Model ready ({classifier.backend}).")
+
+    base_url = f"http://127.0.0.1:{BENCHMARK_PORT}"
+    cap, read_frame = recognizer.open_camera(BENCHMARK_CAMERA_CLIENT, stream_url=f"{base_url}/stream",
+                                             base_url=base_url)
+    if not cap.isOpened():
+        print("Error: Could not open the fake camera.")
+        server.shutdown()
+        return
+
+    frames = []             # (scheduled class, message was correct)
+    inference_seconds = []
+    sent_messages = []      # (seconds, message), only when it changes, like the recognizer
+    last_sent_message = None
+    camera.start_schedule()
+    while camera.elapsed() < BENCHMARK_DURATION:
+        requested_at = camera.elapsed()
+        ret, frame = read_frame()
+        if not ret:
+            continue
+        start = time.perf_counter()
+        predicted_class, confidence = classifier.classify(frame)
+        inference_seconds.append(time.perf_counter() - start)
+        _, message = recognizer.detection_message(predicted_class, confidence)
+
+        truth = camera.class_at(requested_at)
+        frames.append((truth, message == expected_message(truth)))
+        if message != last_sent_message:
+            sent_messages.append((camera.elapsed(), message))
+            last_sent_message = message
+        if BENCHMARK_THROTTLE:
+            time.sleep(recognizer.RECOGNITION_INTERVAL)
+    duration = camera.elapsed()
+
+    if hasattr(cap, "print_stats"):
+        cap.print_stats()
+    cap.release()
+    server.shutdown()
+    print_report(frames, duration, inference_seconds,
+                 time_to_correct(camera.schedule, duration, sent_messages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+# filename: replay_harness.py
+# Accelerated replay harness for main_controller's state machine.
+# Runs GraspStateMachine on a virtual clock, as fast as the CPU allows, fed with
+#   - recorded sensor streams: the FSR columns of the MATLAB logs at their
+#     recorded times (open loop, the force does not react to PULSE1:), or
+#   - autotuner's SimulatedGripper with the pid_tuner plant fits, stepped on the
+#     same virtual clock so it reacts to the engine's PULSE1: commands,
+# plus scripted OBJECT:/CMD: messages. Every scenario is checked against the
+# emitted PULSE1:/PULSE2:/STATUS: sequence:
+#   - PULSE1 stays within [SERVO_OPEN_PULSE, SERVO_MAX_CLOSE_PULSE] and only
+#     closes while EXECUTING_GRASP/APPROACHING or CLOSING, or once HOLDING by at
+#     most REGRIP_STEP right after a STATUS:SLIP, at most REGRIP_MAX_COUNT times,
+#     and the plant's true force after such a regrip stays within its force bound,
+#   - RELEASE/EMERGENCY/RESET open the gripper on the same packet, and the
+#     release steps follow after RELEASE_SETTLE_SECONDS / RECOGNITION_DELAY_SECONDS,
+#   - the STATUS: messages are exactly the expected ones,
+#   - HOLDING is (or is not) reached, with the right target force.
+# It also reports the time to HOLDING per object, from open and with the
+# grasp cache's feed-forward slew (repeated grasps of the same object), the
+# engine's approach-time and overshoot statistics, and the slip detection
+# latency: a "SLIP" script entry is not sent to the engine but distorts the
+# sensor packets from then on (slipped_packet()).
+# Usage: python replay_harness.py
+
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from main_controller import (GraspStateMachine, SystemState, GripperState, TARGET_FORCES,
+                             SERVO_OPEN_PULSE, SERVO_MAX_CLOSE_PULSE,
+                             RELEASE_SETTLE_SECONDS, RECOGNITION_DELAY_SECONDS,
+                             REGRIP_STEP, REGRIP_FORCE_FRACTION, REGRIP_MAX_COUNT,
+                             LEFT_CLAW_INDICES, RIGHT_CLAW_INDICES, FSR_POSITIONS)
+from autotuner import SimulatedGripper
+from grasp_cache import GraspCache
+from pid_tuner import OBJECT_PLANTS
+
+# --- CONFIGURATION ---
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "matlab")
+RECORDED_LOGS = ["gripper_log.csv", "gripper_log_1.csv",
+                 "gripper_kalman_log_1.csv", "gripper_kalman_log_2.csv", "gripper_kalman_log_3.csv",
+                 "gripper_kalman_log_1_sponge.csv", "gripper_kalman_log_2_sponge.csv", "gripper_kalman_log_3_sponge.csv"]
+# The fits printed by pid_tuner.py; "empty" is a gripper closing on nothing.
+PLANTS = {
+    "soft": {"contact_pulse": 1625, "stiffness": 97.7, "exponent": 0.5, "tau": 0.54, "dead_time": 0.0},
+    "firm": {"contact_pulse": 1680, "stiffness": 193, "exponent": 0.5, "tau": 1.61, "dead_time": 0.0},
+    "sponge": {"contact_pulse": 1810, "stiffness": 23.5, "exponent": 0.75, "tau": 0.77, "dead_time": 0.5},
+    "empty": {"contact_pulse": SERVO_MAX_CLOSE_PULSE, "stiffness": 0.0, "exponent": 1.0, "tau": 1.0, "dead_time": 0.0},
+}
+PACKET_PERIOD = 0.02  # The ESP32 client sends a packet every 20 ms
+SEEDS = 20  # Noise seeds per closed-loop scenario
+REPEATED_GRASPS = 4  # Grasps per feed-forward scenario; the first one fills the cache
+GRASP_TIMEOUT = 40.0  # Virtual seconds a scenario may run
+HOLD_SECONDS = 2.0  # How long a grasp is held before the script releases it
+REGRASP_SECONDS = 8.0  # From a release to the next OBJECT:, long enough for the force to decay
+# Release steps only happen on the next message, so they may be late by up to
+# one packet gap (~0.11 s in the Kalman logs).
+RELEASE_TIMING_TOLERANCE = 0.15
+# An injected slip: over SLIP_SECONDS each jaw loses SLIP_FORCE_LOSS of its load, which moves
+# towards its last sensor (reading i scaled by 1 + SLIP_COP_TRAVEL * p_i / max|p|), with
+# stick-slip vibration of SLIP_VIBRATION times the reading until it stops.
+SLIP_AFTER_HOLDING = 3.0
+SLIP_SECONDS = 0.3
+SLIP_FORCE_LOSS = 0.2
+SLIP_COP_TRAVEL = 0.5
+SLIP_VIBRATION = 0.05
+WORKERS = os.cpu_count()
+
+
+class VirtualClock:
+    """Stands in for time.monotonic; it only moves when the harness sets `now`."""
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+def recorded_packets(path):
+    """(time, packet) for every row of a MATLAB log, with the FSR columns as the packet's sensor fields."""
+    data = np.genfromtxt(path, delimiter=",", names=True)
+    fsr = np.column_stack([data[f"FSR{i}"] for i in range(1, 9)]).astype(int)
+    for t, row in zip(data["Time"] - data["Time"][0], fsr):
+        yield t, "0,0," + ",".join(map(str, row))
+
+
+def simulated_packets(gripper, packets, forces):
+    """One packet per PACKET_PERIOD from a SimulatedGripper, stepped on virtual time; the true force goes to `forces`."""
+    step = 0
+    while True:
+        forces.append((step * PACKET_PERIOD, gripper.step(step * PACKET_PERIOD)))
+        yield step * PACKET_PERIOD, packets.get_nowait()
+        step += 1
+
+
+def slipped_packet(packet, elapsed, rng):
+    """`packet` with a slip that began `elapsed` seconds ago applied to both jaws."""
+    fields = np.array([int(v) for v in packet.split(',')], dtype=np.float64)
+    progress = min(1.0, elapsed / SLIP_SECONDS)
+    positions = np.asarray(FSR_POSITIONS) / np.max(np.abs(FSR_POSITIONS))
+    for indices in (LEFT_CLAW_INDICES, RIGHT_CLAW_INDICES):
+        readings = fields[indices] * (1 + SLIP_COP_TRAVEL * progress * positions) * (1 - SLIP_FORCE_LOSS * progress)
+        if elapsed < SLIP_SECONDS:
+            readings += rng.normal(0, SLIP_VIBRATION * readings)
+        fields[indices] = readings
+    return ",".join(str(int(v)) for v in np.clip(np.round(fields), 0, 4095))
+
+
+def run_scenario(scenario):
+    """
+    Replays one scenario and checks it. Returns a dict with the trace of
+    ("in"/"out", time, message, system state, gripper state) entries, the
+    time to HOLDING and target of every grasp, the plant's (time, true force)
+    samples, when a "SLIP" was injected, the virtual duration and the failed checks. "force_models" and
+    "prediction_latency" override main_controller's. The n-th entry of "on_holding" is scheduled when the n-th
+    grasp reaches HOLDING.
+    """
+    clock = VirtualClock()
+    trace = []
+    commands = queue.Queue()
+    engine = None
+
+    def send(message):
+        trace.append(("out", clock(), message, engine.system_state, engine.gripper_state))
+        if message.startswith("PULSE1:"):
+            commands.put(message)
+
+    cache = GraspCache(clock=clock) if scenario.get("cache") else None
+    engine = GraspStateMachine(send=send, clock=clock, log=lambda message: None, cache=cache,
+                               force_models=scenario.get("force_models"),
+                               prediction_latency=scenario.get("prediction_latency"))
+    forces = []
+    if scenario["source"] == "log":
+        sensor = recorded_packets(os.path.join(LOG_DIR, scenario["log"]))
+    else:
+        packets = queue.Queue()
+        gripper = SimulatedGripper(commands, packets, plant=PLANTS[scenario["plant"]], seed=scenario["seed"])
+        sensor = simulated_packets(gripper, packets, forces)
+
+    script = sorted(scenario["script"])
+    on_holding = scenario.get("on_holding", [])
+    grasp_time = None
+    slip_pending = False
+    slip_started = None  # Time of the first slipped packet
+    slip_rng = np.random.default_rng(scenario.get("seed"))
+    holdings = []  # (time to HOLDING, target) per grasp
+    engine.start()
+    next_packet = next(sensor, None)
+    while next_packet is not None or script:
+        if script and (next_packet is None or script[0][0] <= next_packet[0]):
+            clock.now, message = script.pop(0)
+        else:
+            (clock.now, message), next_packet = next_packet, next(sensor, None)
+        if clock.now > scenario["duration"]:
+            break
+        if message == "SLIP":
+            slip_pending = True
+            continue
+        if slip_pending and message[0].isdigit():
+            slip_started = clock.now if slip_started is None else slip_started
+            message = slipped_packet(message, clock.now - slip_started, slip_rng)
+        if not message[0].isdigit():
+            trace.append(("in", clock.now, message, engine.system_state, engine.gripper_state))
+        was_closing = engine.gripper_state == GripperState.CLOSING
+        engine.handle(message)
+
+        if message == "CMD:GRASP" and engine.gripper_state == GripperState.APPROACHING:
+            grasp_time = clock.now
+        if was_closing and engine.gripper_state == GripperState.HOLDING:
+            if len(holdings) < len(on_holding):
+                # Half a packet later, as a real command arrives between two packets rather than
+                # a rounding error before one (which would hand the PID a near-zero dt).
+                script = sorted(script + [(clock.now + delay + PACKET_PERIOD / 2, command)
+                                          for delay, command in on_holding[len(holdings)]])
+            holdings.append((clock.now - grasp_time, engine.target_force))
+        if not script and engine.system_state == SystemState.IDENTIFYING and len(holdings) >= len(on_holding):
+            break
+
+    result = {"name": scenario["name"], "trace": trace, "holdings": holdings, "virtual_seconds": clock.now,
+              "forces": forces, "slip_started": slip_started, "grasp_stats": engine.grasp_stats}
+    result["failures"] = check_scenario(scenario, result)
+    return result
+
+
+def steady_force(plant, pulse):
+    """The force a plant settles to at a constant pulse."""
+    return plant["stiffness"] * max(0.0, pulse - plant["contact_pulse"]) ** plant["exponent"]
+
+
+def check_pulses(trace, forces=(), plant=None):
+    """
+    PULSE1: range and state checks. With the plant and its true `forces`, each
+    regrip must also stay within its force bound: until the next pulse, the force
+    may not exceed the larger of the force at the slip and the force the held
+    pulse settles to, plus REGRIP_FORCE_FRACTION of the target (for a first-order
+    plant that is the bound on the step's steady-force gain).
+    """
+    failures = []
+    last_pulse = SERVO_OPEN_PULSE
+    last_message = None
+    regrips = 0
+    target = TARGET_FORCES["default"]
+    forces = np.array(forces).reshape(-1, 2)
+    pulses = [(e[1], e[2]) for e in trace if e[0] == "out" and e[2].startswith("PULSE1:")]
+    for kind, t, message, system_state, gripper_state in trace:
+        if kind == "in" and message == "CMD:GRASP":
+            regrips = 0
+        if kind != "out" or message.startswith("DATA:"):
+            continue
+        if message.startswith("STATUS:LOCKED:"):
+            target = TARGET_FORCES.get(message.split(':')[2].lower(), TARGET_FORCES["default"])
+        previous, last_message = last_message, message
+        if not message.startswith("PULSE1:"):
+            continue
+        pulse = int(message.split(':')[1])
+        if not SERVO_OPEN_PULSE <= pulse <= SERVO_MAX_CLOSE_PULSE:
+            failures.append(f"{t:.2f} s: {message} out of range")
+        closing = gripper_state in (GripperState.APPROACHING, GripperState.CLOSING)
+        regrip = (system_state == SystemState.EXECUTING_GRASP and gripper_state == GripperState.HOLDING
+                  and previous == "STATUS:SLIP")
+        if regrip:
+            regrips += 1
+            if not 0 < pulse - last_pulse <= REGRIP_STEP or regrips > REGRIP_MAX_COUNT:
+                failures.append(f"{t:.2f} s: regrip {regrips} {message} from {last_pulse}")
+            if plant is not None and len(forces):
+                until = next((u for u, m in pulses if u > t), np.inf)
+                after = forces[(forces[:, 0] >= t) & (forces[:, 0] < until), 1]
+                before = forces[forces[:, 0] <= t, 1]
+                bound = (max(before[-1] if len(before) else 0.0, steady_force(plant, last_pulse))
+                         + REGRIP_FORCE_FRACTION * target)
+                if len(after) and after.max() > bound:
+                    failures.append(f"{t:.2f} s: regrip {regrips} to {pulse} reached force {after.max():.0f}, "
+                                    f"bound {bound:.0f}")
+        elif pulse != SERVO_OPEN_PULSE and not (system_state == SystemState.EXECUTING_GRASP and closing):
+            failures.append(f"{t:.2f} s: {message} sent in {system_state.name}/{gripper_state.name}")
+        last_pulse = pulse
+    return failures
+
+
+def check_releases(trace, end_time):
+    """Every accepted release command opens at once; PULSE2 and STATUS:IDENTIFYING follow on time."""
+    failures = []
+    for i, (kind, t, message, system_state, _) in enumerate(trace):
+        accepted = ((system_state == SystemState.EXECUTING_GRASP and message in ("CMD:RELEASE", "CMD:EMERGENCY", "CMD:RESET"))
+                    or (system_state == SystemState.READY_TO_GRASP and message == "CMD:RESET"))
+        if kind != "in" or not accepted:
+            continue
+        later = [(e[1], e[2]) for e in trace[i + 1:] if e[0] == "out" and not e[2].startswith("DATA:")]
+        if not later or later[0] != (t, f"PULSE1:{SERVO_OPEN_PULSE}"):
+            failures.append(f"{t:.2f} s: {message} did not open the gripper at once")
+            continue
+        for step, delay in (("PULSE2:2300", RELEASE_SETTLE_SECONDS),
+                            ("STATUS:IDENTIFYING", RELEASE_SETTLE_SECONDS + RECOGNITION_DELAY_SECONDS)):
+            sent = next((u for u, m in later if m == step), None)
+            if sent is None:
+                if t + delay + RELEASE_TIMING_TOLERANCE < end_time:
+                    failures.append(f"{t:.2f} s: {message} never sent {step}")
+            elif not delay <= sent - t <= delay + RELEASE_TIMING_TOLERANCE:
+                failures.append(f"{t:.2f} s: {step} {sent - t:.2f} s after {message}, expected {delay:.2f} s")
+    return failures
+
+
+def check_scenario(scenario, result):
+    trace = result["trace"]
+    failures = (check_pulses(trace, result["forces"], PLANTS.get(scenario.get("plant")))
+                + check_releases(trace, result["virtual_seconds"]))
+    statuses = [e[2] for e in trace if e[0] == "out" and e[2].startswith("STATUS:")
+                and e[2] not in scenario.get("ignore_statuses", ())]
+    if statuses != scenario["statuses"]:
+        failures.append(f"STATUS sequence {statuses}, expected {scenario['statuses']}")
+    holdings = result["holdings"]
+    expected = scenario.get("holding")
+    if expected is not None and expected != len(holdings):
+        failures.append(f"reached HOLDING {len(holdings)} times, expected {expected}")
+    for _, target in holdings:
+        if "target" in scenario and target != scenario["target"]:
+            failures.append(f"held at target {target}, expected {scenario['target']}")
+    if scenario.get("saturates") and f"PULSE1:{SERVO_MAX_CLOSE_PULSE}" not in (e[2] for e in trace):
+        failures.append("never closed fully")
+    return failures
+
+
+def build_scenarios():
+    """The scenario matrix: closed-loop grasps per object, command-order edge cases, recorded logs."""
+    scenarios = []
+
+    def locked(*objects):
+        return ["STATUS:IDENTIFYING"] + [s for obj in objects for s in (f"STATUS:LOCKED:{obj.upper()}", "STATUS:IDENTIFYING")]
+
+    for seed in range(SEEDS):
+        for obj, target in TARGET_FORCES.items():
+            plant = OBJECT_PLANTS.get(obj, OBJECT_PLANTS["default"])
+            scenarios.append({"name": f"grasp/{obj}/{plant}/{seed}", "source": "plant", "plant": plant, "seed": seed,
+                              "script": [(0.2, f"OBJECT:{obj}"), (0.5, "CMD:GRASP")],
+                              "on_holding": [[(HOLD_SECONDS, "CMD:RELEASE")]], "duration": GRASP_TIMEOUT,
+                              "statuses": locked(obj), "holding": 1, "target": target})
+            # The same object grasped again and again: the first grasp fills the cache, the rest slew.
+            regrasp = [(HOLD_SECONDS, "CMD:RELEASE"), (HOLD_SECONDS + REGRASP_SECONDS, f"OBJECT:{obj}"),
+                       (HOLD_SECONDS + REGRASP_SECONDS + 0.5, "CMD:GRASP")]
+            scenarios.append({"name": f"feedforward/{obj}/{plant}/{seed}", "source": "plant", "plant": plant, "seed": seed,
+                              "cache": True, "script": [(0.2, f"OBJECT:{obj}"), (0.5, "CMD:GRASP")],
+                              "on_holding": [regrasp] * (REPEATED_GRASPS - 1) + [[(HOLD_SECONDS, "CMD:RELEASE")]],
+                              "duration": REPEATED_GRASPS * GRASP_TIMEOUT, "statuses": locked(*[obj] * REPEATED_GRASPS),
+                              "holding": REPEATED_GRASPS, "target": target})
+            scenarios.append({"name": f"emergency/{obj}/{plant}/{seed}", "source": "plant", "plant": plant, "seed": seed,
+                              "script": [(0.2, f"OBJECT:{obj}"), (0.5, "CMD:GRASP"), (0.6 + 0.05 * seed, "CMD:EMERGENCY")],
+                              "duration": GRASP_TIMEOUT, "statuses": locked(obj)})
+            # One claw predicting (constant velocity) and the other not, either way round.
+            predicting = ["left", "right"][seed % 2]
+            scenarios.append({"name": f"claw-models/{obj}/{plant}/{seed}", "source": "plant", "plant": plant, "seed": seed,
+                              "script": [(0.2, f"OBJECT:{obj}"), (0.5, "CMD:GRASP")],
+                              "on_holding": [[(HOLD_SECONDS, "CMD:RELEASE")]], "duration": GRASP_TIMEOUT,
+                              "force_models": {claw: "constant_velocity" if claw == predicting else "random_walk"
+                                               for claw in ("left", "right")},
+                              "statuses": locked(obj), "holding": 1, "target": target})
+            # A slip a while into the hold: STATUS:SLIP and a bounded regrip, then the release.
+            scenarios.append({"name": f"slip/{obj}/{plant}/{seed}", "source": "plant", "plant": plant, "seed": seed,
+                              "script": [(0.2, f"OBJECT:{obj}"), (0.5, "CMD:GRASP")],
+                              "on_holding": [[(SLIP_AFTER_HOLDING, "SLIP"), (SLIP_AFTER_HOLDING + HOLD_SECONDS, "CMD:RELEASE")]],
+                              "duration": GRASP_TIMEOUT, "holding": 1, "target": target,
+                              "statuses": locked(obj)[:-1] + ["STATUS:SLIP", "STATUS:IDENTIFYING"]})
+        scenarios.append({"name": f"empty/{seed}", "source": "plant", "plant": "empty", "seed": seed,
+                          "script": [(0.2, "OBJECT:egg"), (0.5, "CMD:GRASP"), (20.0, "CMD:RELEASE")],
+                          "duration": GRASP_TIMEOUT, "statuses": locked("egg"), "holding": 0, "saturates": True})
+        # Messages in the wrong state are ignored: only OBJECT:egg and the GRASP after it count.
+        scenarios.append({"name": f"out-of-order/{seed}", "source": "plant", "plant": "firm", "seed": seed,
+                          "script": [(0.1, "CMD:GRASP"), (0.2, "OBJECT:None"), (0.3, "CMD:RELEASE"), (0.4, "OBJECT:egg"),
+                                     (0.5, "CMD:RELEASE"), (0.6, "OBJECT:power_bank"), (0.7, "CMD:GRASP"),
+                                     (0.8, "OBJECT:paper_box"), (0.9, "CMD:GRASP")],
+                          "on_holding": [[(HOLD_SECONDS, "CMD:RELEASE"), (HOLD_SECONDS + 1.0, "CMD:GRASP"),
+                                          (HOLD_SECONDS + 1.5, "OBJECT:egg")]],
+                          "duration": GRASP_TIMEOUT, "statuses": locked("egg"), "holding": 1,
+                          "target": TARGET_FORCES["egg"]})
+        # RESET before grasping, commands during the release, then a full grasp of another object.
+        scenarios.append({"name": f"reset-regrasp/{seed}", "source": "plant", "plant": "soft", "seed": seed,
+                          "script": [(0.2, "OBJECT:egg"), (1.0, "CMD:RESET"), (1.5, "CMD:GRASP"), (1.6, "OBJECT:egg"),
+                                     (3.5, "OBJECT:default"), (4.0, "CMD:GRASP")],
+                          "on_holding": [[(HOLD_SECONDS, "CMD:RESET")]], "duration": GRASP_TIMEOUT,
+                          "statuses": locked("egg", "default"), "holding": 1, "target": TARGET_FORCES["default"]})
+
+    # The recorded force keeps changing after HOLDING (the log does not react to PULSE1:),
+    # which the slip detector may flag, so STATUS:SLIP is not part of the expected sequence.
+    for log in RECORDED_LOGS:
+        scenarios.append({"name": f"log/grasp/{log}", "source": "log", "log": log,
+                          "script": [(0.5, "OBJECT:egg"), (1.0, "CMD:GRASP"), (25.0, "CMD:RELEASE")],
+                          "duration": GRASP_TIMEOUT, "statuses": locked("egg"), "ignore_statuses": ["STATUS:SLIP"]})
+        scenarios.append({"name": f"log/emergency/{log}", "source": "log", "log": log,
+                          "script": [(0.5, "OBJECT:power_bank"), (1.0, "CMD:GRASP"), (3.0, "CMD:EMERGENCY")],
+                          "duration": GRASP_TIMEOUT, "statuses": locked("power_bank")})
+        scenarios.append({"name": f"log/reset/{log}", "source": "log", "log": log,
+                          "script": [(0.5, "OBJECT:paper_box"), (2.0, "CMD:RESET"), (6.0, "OBJECT:egg"),
+                                     (7.0, "CMD:GRASP"), (20.0, "CMD:RELEASE")],
+                          "duration": GRASP_TIMEOUT, "statuses": locked("paper_box", "egg"),
+                          "ignore_statuses": ["STATUS:SLIP"]})
+    return scenarios
+
+
+def main():
+    scenarios = build_scenarios()
+    print(f"[Harness] Replaying {len(scenarios)} scenarios on {WORKERS} workers...")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(pool.map(run_scenario, scenarios, chunksize=4))
+    wall = time.perf_counter() - start
+
+    failed = [r for r in results if r["failures"]]
+    for result in failed:
+        print(f"\nFAIL {result['name']}")
+        for failure in result["failures"]:
+            print(f"  {failure}")
+
+    print("\n--- Time to HOLDING (closed-loop grasps, mean / max) ---")
+    print(f"  {'object':<11} {'from open':>15} {'cache cold':>15} {'feed-forward':>15}")
+    for obj in TARGET_FORCES:
+        from_open = [h[0] for r in results if r["name"].startswith(f"grasp/{obj}/") for h in r["holdings"]]
+        repeated = [[h[0] for h in r["holdings"]] for r in results if r["name"].startswith(f"feedforward/{obj}/")]
+        columns = [from_open, [h[0] for h in repeated if h], [t for h in repeated for t in h[1:]]]
+        print(f"  {obj:<11} " + " ".join(f"{np.mean(c):>7.2f} /{np.max(c):>6.2f}" if c else f"{'-':>15}" for c in columns))
+
+    print("\n--- Approach time and overshoot (engine grasp_stats, mean / max) ---")
+    print(f"  {'object':<11} {'scenarios':<12} {'approach s':>15} {'overshoot':>15}")
+    for obj in TARGET_FORCES:
+        for kind in ("grasp", "feedforward"):
+            stats = [r["grasp_stats"][obj] for r in results
+                     if r["name"].startswith(f"{kind}/{obj}/") and obj in r["grasp_stats"]]
+            if not stats:
+                continue
+            grasps = sum(st["grasps"] for st in stats)
+            approach = sum(st["approach_time"] * st["grasps"] for st in stats) / grasps
+            overshoot = sum(st["overshoot"] * st["grasps"] for st in stats) / grasps
+            print(f"  {obj:<11} {kind:<12} {approach:>7.2f} /{max(st['approach_time_max'] for st in stats):>6.2f} "
+                  f"{overshoot:>+7.0f} /{max(st['overshoot_max'] for st in stats):>+6.0f}")
+
+    print("\n--- Slip detection latency (first slipped packet to STATUS:SLIP, 0 = on it; mean / max) ---")
+    print(f"  {'object':<11} {'packets':>15} {'ms':>15}")
+    for obj in TARGET_FORCES:
+        latencies = [next(e[1] for e in r["trace"] if e[2] == "STATUS:SLIP") - r["slip_started"] for r in results
+                     if r["name"].startswith(f"slip/{obj}/") and r["slip_started"] is not None
+                     and any(e[2] == "STATUS:SLIP" for e in r["trace"])]
+        if latencies:
+            packets = np.array(latencies) / PACKET_PERIOD
+            print(f"  {obj:<11} {packets.mean():>7.2f} /{packets.max():>6.0f} {1000 * np.mean(latencies):>7.0f} /{1000 * np.max(latencies):>6.0f}")
+
+    virtual = sum(r["virtual_seconds"] for r in results)
+    print(f"\n[Harness] {len(results) - len(failed)}/{len(results)} scenarios passed. "
+          f"{virtual:.0f} s of controller time in {wall:.1f} s wall ({virtual / wall:.0f}x real time).")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
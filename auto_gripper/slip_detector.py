@@ -0,0 +1,109 @@
+# filename: slip_detector.py
+# Slip detection for one jaw while the gripper holds, from its raw FSR readings.
+import numpy as np
+
+
+class SlipDetector:
+    """
+    Watches one jaw's raw FSR readings while HOLDING and reports the sample
+    at which the object starts to slip. Three features of the jaw are kept
+    in O(1) per sample (exponentially weighted Welford updates, as in
+    StreamingMetrics), each over a short `window` and over a slow
+    `baseline_window`:
+      - "variance": the variance of the jaw's total reading,
+      - "highpass": the energy of its first difference (the part of the
+        signal above roughly a quarter of the sample rate: stick-slip
+        vibration and sudden load changes, not the slow creep after HOLDING),
+      - "cop": the centre of pressure along the jaw, sum(p_i r_i) / sum(r_i)
+        with the sensor positions p_i.
+    Slip is declared when, for `confirm` samples in a row, the short-window
+    variance or high-pass energy exceeds `ratio` times its baseline plus a
+    noise floor, or the short-window centre of pressure has moved more than
+    `cop_shift` from the baseline one. The baseline only learns from samples
+    without an alarm, so the slip itself does not raise it, and no slip is
+    reported during the first `warmup` samples after reset(), while it forms.
+    """
+    def __init__(self, positions, window=3, baseline_window=50, ratio=6.0, variance_floor=3000.0,
+                 highpass_floor=6000.0, cop_shift=0.2, min_force=200.0, warmup=25, confirm=1):
+        """
+        Args:
+            positions (sequence): Position of each sensor along the jaw, in sensor pitches.
+            window (int): Short (detection) window in samples.
+            baseline_window (int): Slow (baseline) window in samples.
+            ratio (float): Multiple of the baseline variance / high-pass energy that counts as slip.
+            variance_floor (float): Added to the variance threshold, in squared reading units.
+            highpass_floor (float): Added to the high-pass energy threshold, in squared reading units.
+            cop_shift (float): Centre-of-pressure movement that counts as slip, in sensor pitches.
+            min_force (float): Total jaw reading below which the centre of pressure is not tracked.
+            warmup (int): Samples after reset() before slip can be reported.
+            confirm (int): Consecutive samples a condition must hold.
+        """
+        self.positions = np.asarray(positions, dtype=np.float64)
+        self.window = window
+        self.baseline_window = baseline_window
+        self.ratio = ratio
+        self.variance_floor = variance_floor
+        self.highpass_floor = highpass_floor
+        self.cop_shift = cop_shift
+        self.min_force = min_force
+        self.warmup = warmup
+        self.confirm = confirm
+        self.reset()
+
+    def reset(self):
+        """Starts a new baseline, e.g. on reaching HOLDING or after a regrip."""
+        self.count = 0
+        self.total_mean = 0.0
+        self.total_var = 0.0
+        self.highpass = 0.0
+        self.cop = None
+        self.baseline_var = 0.0
+        self.baseline_highpass = 0.0
+        self.baseline_cop = None
+        self._baseline_count = 0
+        self._last_total = None
+        self._alarms = 0
+
+    @staticmethod
+    def _welford(mean, var, x, alpha):
+        diff = x - mean
+        increment = alpha * diff
+        return mean + increment, (1 - alpha) * (var + diff * increment)
+
+    def update(self, readings):
+        """
+        Adds one sample of the jaw's raw readings (in the order of `positions`).
+        Returns "highpass", "variance" or "cop" on a slip sample, otherwise None.
+        """
+        readings = np.asarray(readings, dtype=np.float64)
+        total = float(readings.sum())
+        self.count += 1
+        alpha = max(1.0 / self.count, 1.0 / self.window)
+        self.total_mean, self.total_var = self._welford(self.total_mean, self.total_var, total, alpha)
+        step = 0.0 if self._last_total is None else total - self._last_total
+        self._last_total = total
+        if self.count > 1:
+            self.highpass += max(1.0 / (self.count - 1), 1.0 / self.window) * (step * step - self.highpass)
+        cop = float(self.positions @ readings) / total if total > self.min_force else None
+        if cop is not None:
+            self.cop = cop if self.cop is None else self.cop + alpha * (cop - self.cop)
+
+        alarm = None
+        if self.count > self.warmup:
+            if self.highpass > self.ratio * self.baseline_highpass + self.highpass_floor:
+                alarm = "highpass"
+            elif self.total_var > self.ratio * self.baseline_var + self.variance_floor:
+                alarm = "variance"
+            elif cop is not None and self.baseline_cop is not None and abs(self.cop - self.baseline_cop) > self.cop_shift:
+                alarm = "cop"
+        self._alarms = self._alarms + 1 if alarm else 0
+
+        if alarm is None:
+            self._baseline_count += 1
+            beta = max(1.0 / self._baseline_count, 1.0 / self.baseline_window)
+            # The baselines are slow averages of the short-window features.
+            self.baseline_var += beta * (self.total_var - self.baseline_var)
+            self.baseline_highpass += beta * (self.highpass - self.baseline_highpass)
+            if self.cop is not None:
+                self.baseline_cop = self.cop if self.baseline_cop is None else self.baseline_cop + beta * (self.cop - self.baseline_cop)
+        return alarm if self._alarms >= self.confirm else None
@@ -0,0 +1,99 @@
+# filename: slip_eval.py
+# Replays the held part of the MATLAB logs through main_controller's slip detector:
+#   1. The unmodified holds (servo pulse unchanged for HOLD_SETTLE_SECONDS, both jaws
+#      loaded): every alarm there, with its time, is a candidate false positive.
+#   2. The same holds with a slip injected every INJECTION_SPACING samples
+#      (replay_harness.slipped_packet, onto a fresh detector that has seen the hold
+#      since its start): detection rate, which feature fired and the latency from
+#      the first slipped sample (0 = on that sample), in samples and in
+#      milliseconds at the log's sample period.
+# The closed-loop latency at the live 20 ms packet rate is in replay_harness.py's report.
+# Usage: python slip_eval.py
+
+import os
+import numpy as np
+from main_controller import make_slip_detector, LEFT_CLAW_INDICES, RIGHT_CLAW_INDICES
+from replay_harness import slipped_packet, RECORDED_LOGS, LOG_DIR
+
+# --- CONFIGURATION ---
+HOLD_SETTLE_SECONDS = 3.0  # Since the last pulse change, before a log counts as holding
+MIN_JAW_LOAD = 800  # Total of a jaw's four readings that counts as loaded
+INJECTION_SPACING = 7  # Samples between injected slips
+INJECTION_LEAD = 30  # Samples of the hold a detector sees before its slip
+MAX_LATENCY_SAMPLES = 12  # Samples after the injection a detection is waited for
+
+
+def load_holds(path):
+    """Time and sensor packets of the held segment of a log, or None if it never holds."""
+    data = np.genfromtxt(path, delimiter=",", names=True)
+    t = data["Time"] - data["Time"][0]
+    fsr = np.column_stack([data[f"FSR{i}"] for i in range(1, 9)]).astype(int)
+    changed = np.concatenate([[True], np.diff(data["ServoPulse"]) != 0])
+    last_change = np.maximum.accumulate(np.where(changed, t, -np.inf))
+    held = (t - last_change > HOLD_SETTLE_SECONDS) & (fsr[:, :4].sum(1) > MIN_JAW_LOAD) & (fsr[:, 4:].sum(1) > MIN_JAW_LOAD)
+    held_at = np.nonzero(held)[0]
+    if len(held_at) == 0:
+        return None
+    segment = slice(held_at[0], held_at[-1] + 1)
+    return t[segment], ["0,0," + ",".join(map(str, row)) for row in fsr[segment]]
+
+
+def detect(packets, start=0):
+    """Replays packets[start:] through one detector per jaw; (index, feature) of every alarm."""
+    detectors = [make_slip_detector(), make_slip_detector()]
+    alarms = []
+    for i in range(start, len(packets)):
+        fields = [int(v) for v in packets[i].split(',')]
+        for detector, indices in zip(detectors, (LEFT_CLAW_INDICES, RIGHT_CLAW_INDICES)):
+            feature = detector.update([fields[j] for j in indices])
+            if feature:
+                alarms.append((i, feature))
+                detector.reset()
+    return alarms
+
+
+def main():
+    rng = np.random.default_rng(0)
+    held_seconds = 0.0
+    false_alarms = 0
+    latencies, features, missed = [], {}, 0
+    period = []
+    print("--- Unmodified holds ---")
+    for log in RECORDED_LOGS:
+        holds = load_holds(os.path.join(LOG_DIR, log))
+        if holds is None:
+            print(f"  {log:<34} never holds")
+            continue
+        t, packets = holds
+        held_seconds += t[-1] - t[0]
+        period.append(np.median(np.diff(t)))
+        alarms = detect(packets)
+        false_alarms += len(alarms)
+        listed = ", ".join(f"{t[i]:.1f} s ({feature})" for i, feature in alarms) or "none"
+        print(f"  {log:<34} {t[0]:5.1f}-{t[-1]:5.1f} s, {len(packets)} samples, alarms: {listed}")
+
+        for onset in range(INJECTION_LEAD, len(packets) - MAX_LATENCY_SAMPLES, INJECTION_SPACING):
+            slipped = packets[:onset] + [slipped_packet(p, u - t[onset], rng)
+                                         for p, u in zip(packets[onset:onset + MAX_LATENCY_SAMPLES], t[onset:])]
+            alarms = detect(slipped[:onset + MAX_LATENCY_SAMPLES], onset - INJECTION_LEAD)
+            if alarms and alarms[0][0] < onset:
+                continue  # Already alarmed on the hold itself, counted above
+            if not alarms:
+                missed += 1
+                continue
+            latencies.append(alarms[0][0] - onset)
+            features[alarms[0][1]] = features.get(alarms[0][1], 0) + 1
+
+    print(f"\n  {false_alarms} alarms in {held_seconds:.0f} s of unmodified holds")
+    print("\n--- Injected slips ---")
+    if latencies:
+        sample_ms = 1000 * float(np.mean(period))
+        latencies = np.array(latencies)
+        print(f"  detected {len(latencies)}/{len(latencies) + missed}; features {features}")
+        print(f"  latency {latencies.mean():.2f} / {latencies.max()} samples (mean / max), "
+              f"{latencies.mean() * sample_ms:.0f} / {latencies.max() * sample_ms:.0f} ms at {sample_ms:.0f} ms per sample")
+        print(f"  within 1 sample: {np.mean(latencies <= 1):.0%}, within 2: {np.mean(latencies <= 2):.0%}")
+
+
+if __name__ == "__main__":
+    main()
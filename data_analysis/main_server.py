@@ -1,48 +1,142 @@
 import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import websockets
 
 # Import our custom modules
-from data_analysis.plotter import create_comparison_plot
+from data_analysis.plotter import print_stats, render_comparison_plot
 from data_analysis.kalman_filter import KalmanFilter
+from data_analysis.streaming_metrics import StreamingMetrics
 
 # --- Configuration ---
 SAMPLE_BATCH_SIZE = 1000
-collected_raw_data = []
-collected_filtered_data = []
+PLOT_OUTPUT_DIR = "plots"
+PLOT_FORMATS = ("png", "svg")
+PLOT_WORKERS = 2  # Processes rendering batches; ingestion never waits for them
+CONSOLE_INTERVAL_SECONDS = 0.5  # At most one "Raw -> Filtered" line per interval
 
 # Initialize the Kalman Filter
 kf = KalmanFilter()
+# Live filter metrics over (roughly) the last batch, printed with the console line
+metrics = StreamingMetrics(channels=1, window=SAMPLE_BATCH_SIZE)
+
+
+class BatchBuffer:
+    """
+    Collects (raw, filtered) samples into preallocated numpy arrays. While one
+    pair is filling, the previous one is being rendered; take_batch() swaps them
+    in O(1), so the sample after a batch boundary goes straight into the next
+    batch. A pair is only reused once release() says its render is done; if it
+    is still busy a fresh pair is allocated instead of overwriting it.
+    """
+    def __init__(self, size=SAMPLE_BATCH_SIZE):
+        self.size = size
+        self._free = [self._new_pair(), self._new_pair()]
+        self.raw, self.filtered = self._free.pop()
+        self.count = 0
+        self.total = 0  # samples ever received
+        self.batches = 0
+        self.allocations = 2
+
+    def _new_pair(self):
+        return np.empty(self.size), np.empty(self.size)
+
+    def append(self, raw, filtered):
+        """Stores one sample; returns True when the current batch is full."""
+        self.raw[self.count] = raw
+        self.filtered[self.count] = filtered
+        self.count += 1
+        self.total += 1
+        return self.count == self.size
+
+    def take_batch(self):
+        """Returns (batch index, first sample number, raw, filtered) and starts the next batch."""
+        batch = (self.batches, self.total - self.count, self.raw[:self.count], self.filtered[:self.count])
+        if self._free:
+            self.raw, self.filtered = self._free.pop()
+        else:
+            self.raw, self.filtered = self._new_pair()
+            self.allocations += 1
+        self.count = 0
+        self.batches += 1
+        return batch
+
+    def release(self, raw, filtered):
+        """Hands a rendered batch's arrays back for reuse."""
+        if len(self._free) < 2:
+            self._free.append((raw.base, filtered.base))  # take_batch() handed out slices
+
+
+class ConsoleLimiter:
+    """Lets a message through at most once per interval and counts the rest."""
+    def __init__(self, interval=CONSOLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.next_time = 0.0
+        self.suppressed = 0
+
+    def ready(self):
+        now = time.monotonic()
+        if now < self.next_time:
+            self.suppressed += 1
+            return False
+        self.next_time = now + self.interval
+        return True
+
+
+buffer = BatchBuffer()
+console = ConsoleLimiter()
+plot_pool = None
+pending_renders = set()  # The event loop only keeps weak references to tasks
+
+
+async def render_batch(batch):
+    """Renders one batch in the process pool and prints its stats when it is done."""
+    index, first_sample, raw, filtered = batch
+    loop = asyncio.get_running_loop()
+    try:
+        stats = await loop.run_in_executor(plot_pool, render_comparison_plot, raw, filtered,
+                                           PLOT_OUTPUT_DIR, index, first_sample, PLOT_FORMATS)
+    except Exception as e:
+        print(f"[Plotter] Batch {index} failed: {e}")
+    else:
+        print(f"[Plotter] Batch {index} (samples {first_sample}-{first_sample + stats['samples'] - 1}) "
+              f"saved to {', '.join(stats['paths'])}")
+        print_stats(stats)
+    finally:
+        buffer.release(raw, filtered)
+
+
+def submit_batch():
+    if buffer.count:
+        task = asyncio.get_running_loop().create_task(render_batch(buffer.take_batch()))
+        pending_renders.add(task)
+        task.add_done_callback(pending_renders.discard)
+
 
 async def handler(websocket):
     """
-    Handles connections, collects data, applies the filter, and triggers plotting.
+    Handles connections, collects data, applies the filter, and hands every
+    full batch to the plot workers without pausing ingestion.
     """
-    global collected_raw_data, collected_filtered_data, kf
     print(f"Client connected from {websocket.remote_address}")
-    
+
     try:
         async for message in websocket:
             try:
                 raw_data_point = int(message)
                 filtered_data_point = kf.update(raw_data_point)
-                
-                print(f"Raw: {raw_data_point:<4} -> Filtered: {filtered_data_point:.2f}")
+                metrics.update(raw_data_point, filtered_data_point, time.monotonic())
 
-                collected_raw_data.append(raw_data_point)
-                collected_filtered_data.append(filtered_data_point)
+                if console.ready():
+                    print(f"Raw: {raw_data_point:<4} -> Filtered: {filtered_data_point:.2f}  "
+                          f"({buffer.total + 1} samples, {console.suppressed} lines skipped)")
+                    print(f"  {metrics.summary(['live'])}")
 
                 # Check if we have reached the limit
-                if len(collected_raw_data) >= SAMPLE_BATCH_SIZE:
-                    print(f"Collected {SAMPLE_BATCH_SIZE} data points. Generating plot...")
-                    
-                    # Call the plotting function directly.
-                    # This will PAUSE the server until the plot window is closed.
-                    create_comparison_plot(collected_raw_data, collected_filtered_data)
-                    
-                    # Clear the lists to start collecting the next batch
-                    print("Ready for next batch.")
-                    collected_raw_data.clear()
-                    collected_filtered_data.clear()
+                if buffer.append(raw_data_point, filtered_data_point):
+                    print(f"Collected {SAMPLE_BATCH_SIZE} data points. Rendering plot in the background...")
+                    submit_batch()
 
             except ValueError:
                 print(f"Warning: Could not parse '{message}' as an integer.")
@@ -51,15 +145,22 @@ async def handler(websocket):
         print("Client disconnected.")
     except Exception as e:
         print(f"An error occurred in handler: {e}")
+    finally:
+        # Plot whatever arrived since the last full batch rather than dropping it.
+        submit_batch()
 
 async def main():
     """Starts the WebSocket server."""
-    print(f"Starting WebSocket server. Will plot after every {SAMPLE_BATCH_SIZE} readings.")
-    async with websockets.serve(handler, "0.0.0.0", 8765):
-        await asyncio.Future()  # Run forever
+    global plot_pool
+    print(f"Starting WebSocket server. Will plot to {PLOT_OUTPUT_DIR}/ after every {SAMPLE_BATCH_SIZE} readings.")
+    with ProcessPoolExecutor(max_workers=PLOT_WORKERS) as plot_pool:
+        async with websockets.serve(handler, "0.0.0.0", 8765):
+            await asyncio.Future()  # Run forever
 
 if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         print("\nApplication stopped by user.")
+    print(f"{buffer.total} samples received in {buffer.batches} batches "
+          f"({buffer.allocations} buffers allocated).")
@@ -1,25 +1,69 @@
+import os
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import numpy as np # Import numpy
 
-def calculate_and_print_stats(raw_data, filtered_data):
-    """Calculates and prints key performance metrics for the filter."""
-    
-    # --- 1. Standard Deviation for Noise Measurement ---
-    raw_std = np.std(raw_data)
-    filtered_std = np.std(filtered_data)
-    
-    # --- 2. Root Mean Squared Error for Tracking ---
-    # Ensure lists are the same size, which they should be
-    raw_array = np.array(raw_data)
-    filtered_array = np.array(filtered_data)
-    rmse = np.sqrt(np.mean((filtered_array - raw_array)**2))
-    
+def calculate_stats(raw_data, filtered_data):
+    """Calculates key performance metrics for the filter."""
+    raw_array = np.asarray(raw_data, dtype=np.float64)
+    filtered_array = np.asarray(filtered_data, dtype=np.float64)
+    return {
+        # --- 1. Standard Deviation for Noise Measurement ---
+        "raw_std": float(np.std(raw_array)),
+        "filtered_std": float(np.std(filtered_array)),
+        # --- 2. Root Mean Squared Error for Tracking ---
+        "rmse": float(np.sqrt(np.mean((filtered_array - raw_array)**2))),
+    }
+
+def print_stats(stats):
     print("\n--- Filter Performance Analysis ---")
-    print(f"Standard Deviation (Raw):      {raw_std:.4f}  (Higher = Noisier)")
-    print(f"Standard Deviation (Filtered): {filtered_std:.4f}  (Lower = Smoother)")
-    print(f"RMSE between signals:        {rmse:.4f}  (Measures overall difference)")
+    print(f"Standard Deviation (Raw):      {stats['raw_std']:.4f}  (Higher = Noisier)")
+    print(f"Standard Deviation (Filtered): {stats['filtered_std']:.4f}  (Lower = Smoother)")
+    print(f"RMSE between signals:        {stats['rmse']:.4f}  (Measures overall difference)")
     print("-----------------------------------\n")
 
+def calculate_and_print_stats(raw_data, filtered_data):
+    """Calculates and prints key performance metrics for the filter."""
+    print_stats(calculate_stats(raw_data, filtered_data))
+
+def _draw_comparison(ax, sample_axis, raw_data, filtered_data):
+    ax.plot(sample_axis, raw_data, 'b-', alpha=0.5, label=f"Raw Data (Std Dev: {np.std(raw_data):.2f})")
+    ax.plot(sample_axis, filtered_data, 'r-', linewidth=2, label=f"Kalman Filtered (Std Dev: {np.std(filtered_data):.2f})")
+
+    ax.set_title("Raw vs. Kalman Filtered FSR Data", fontsize=16, weight='bold')
+    ax.set_xlabel("Sample Number", fontsize=12)
+    ax.set_ylabel("FSR Reading (ADC Value)", fontsize=12)
+    ax.grid(True, which='both', linestyle='--', linewidth=0.5)
+
+    y_min = min(raw_data)
+    y_max = max(raw_data)
+    ax.set_ylim(y_min - 50, y_max + 50)
+    ax.set_xlim(sample_axis[0], sample_axis[-1] + 1)
+
+    ax.legend()
+
+def render_comparison_plot(raw_data, filtered_data, output_dir, batch_index, first_sample=0, formats=("png", "svg")):
+    """
+    Saves the comparison plot of one batch to output_dir (one file per format)
+    and returns its stats plus the written paths. Uses a bare Figure instead of
+    pyplot, so it never opens a window and is safe to run in a worker process.
+    """
+    stats = calculate_stats(raw_data, filtered_data)
+    stats.update(batch=batch_index, samples=len(raw_data), first_sample=first_sample)
+
+    fig = Figure(figsize=(12, 7))
+    ax = fig.subplots()
+    _draw_comparison(ax, range(first_sample, first_sample + len(raw_data)), raw_data, filtered_data)
+    fig.tight_layout(pad=1.5)
+
+    os.makedirs(output_dir, exist_ok=True)
+    stats["paths"] = []
+    for fmt in formats:
+        path = os.path.join(output_dir, f"batch_{batch_index:04d}.{fmt}")
+        fig.savefig(path)
+        stats["paths"].append(path)
+    return stats
+
 def create_comparison_plot(raw_data, filtered_data):
     """
     Generates and displays a static plot comparing raw and filtered data.
@@ -33,24 +77,8 @@ def create_comparison_plot(raw_data, filtered_data):
 
     print(f"[Plotter] Creating comparison plot for {len(raw_data)} data points...")
     
-    sample_axis = range(len(raw_data))
-
     fig, ax = plt.subplots(figsize=(12, 7))
-    
-    ax.plot(sample_axis, raw_data, 'b-', alpha=0.5, label=f"Raw Data (Std Dev: {np.std(raw_data):.2f})")
-    ax.plot(sample_axis, filtered_data, 'r-', linewidth=2, label=f"Kalman Filtered (Std Dev: {np.std(filtered_data):.2f})")
-
-    ax.set_title("Raw vs. Kalman Filtered FSR Data", fontsize=16, weight='bold')
-    ax.set_xlabel("Sample Number", fontsize=12)
-    ax.set_ylabel("FSR Reading (ADC Value)", fontsize=12)
-    ax.grid(True, which='both', linestyle='--', linewidth=0.5)
-    
-    y_min = min(raw_data)
-    y_max = max(raw_data)
-    ax.set_ylim(y_min - 50, y_max + 50)
-    ax.set_xlim(0, len(raw_data))
-    
-    ax.legend()
+    _draw_comparison(ax, range(len(raw_data)), raw_data, filtered_data)
     plt.tight_layout(pad=1.5)
     
     plt.show()
@@ -0,0 +1,136 @@
+import numpy as np
+
+
+class StreamingMetrics:
+    """
+    Live filter-performance metrics for any number of (raw, filtered) channels,
+    updated in O(1) per sample from a handful of numpy state arrays, with no
+    sample history kept.
+
+    The window is exponential: every statistic is a weighted Welford update
+    with weight max(1/n, 1/window), so the first `window` samples are averaged
+    exactly and older samples then fade out with a time constant of `window`.
+
+    Per channel it tracks:
+      - mean / std of the raw and the filtered signal
+      - RMSE between them (same as plotter.calculate_stats over the window)
+      - noise reduction: sample-to-sample variation, raw / filtered
+      - lag: the tracking error regressed on the filtered signal's slope,
+        E[(raw - filtered) * d_filtered] / E[d_filtered^2], in samples.
+        For a first-order filter x += K (z - x) this is exactly (1 - K) / K.
+    """
+    def __init__(self, channels=1, window=1000):
+        """
+        Args:
+            channels (int): Number of signals updated together.
+            window (int): Effective window length in samples.
+        """
+        self.channels = channels
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        shape = self.channels
+        self.count = 0
+        self.raw_mean = np.zeros(shape)
+        self.raw_var = np.zeros(shape)
+        self.filtered_mean = np.zeros(shape)
+        self.filtered_var = np.zeros(shape)
+        self.squared_error = np.zeros(shape)
+        self.raw_step_power = np.zeros(shape)
+        self.filtered_step_power = np.zeros(shape)
+        self.error_slope = np.zeros(shape)
+        self.period = 0.0
+        self._last_raw = None
+        self._last_filtered = None
+        self._last_time = None
+
+    @staticmethod
+    def _welford(mean, var, x, alpha):
+        diff = x - mean
+        increment = alpha * diff
+        mean += increment
+        var *= 1 - alpha
+        var += (1 - alpha) * diff * increment
+
+    def update(self, raw, filtered, timestamp=None):
+        """
+        Adds one sample per channel.
+        Args:
+            raw, filtered: Scalars or sequences of length `channels`.
+            timestamp (float): Optional arrival time in seconds, used to express the lag in seconds.
+        """
+        raw = np.asarray(raw, dtype=np.float64)
+        filtered = np.asarray(filtered, dtype=np.float64)
+        self.count += 1
+        alpha = max(1.0 / self.count, 1.0 / self.window)
+
+        self._welford(self.raw_mean, self.raw_var, raw, alpha)
+        self._welford(self.filtered_mean, self.filtered_var, filtered, alpha)
+        error = raw - filtered
+        self.squared_error += alpha * (error * error - self.squared_error)
+
+        if self._last_raw is not None:
+            # Step statistics start one sample later, so they get their own weight.
+            step_alpha = max(1.0 / (self.count - 1), 1.0 / self.window)
+            raw_step = raw - self._last_raw
+            filtered_step = filtered - self._last_filtered
+            self.raw_step_power += step_alpha * (raw_step * raw_step - self.raw_step_power)
+            self.filtered_step_power += step_alpha * (filtered_step * filtered_step - self.filtered_step_power)
+            self.error_slope += step_alpha * (error * filtered_step - self.error_slope)
+            if timestamp is not None and self._last_time is not None:
+                self.period += step_alpha * ((timestamp - self._last_time) - self.period)
+        self._last_raw = raw
+        self._last_filtered = filtered
+        self._last_time = timestamp
+
+    @property
+    def raw_std(self):
+        return np.sqrt(self.raw_var)
+
+    @property
+    def filtered_std(self):
+        return np.sqrt(self.filtered_var)
+
+    @property
+    def rmse(self):
+        return np.sqrt(self.squared_error)
+
+    @property
+    def noise_reduction(self):
+        """Raw / filtered sample-to-sample variation (higher = smoother); inf for a flat filtered signal."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.filtered_step_power > 0,
+                            np.sqrt(self.raw_step_power / self.filtered_step_power), np.inf)
+
+    @property
+    def lag_samples(self):
+        """Estimated delay of filtered behind raw in samples; nan while the filtered signal is flat."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.filtered_step_power > 0, self.error_slope / self.filtered_step_power, np.nan)
+
+    @property
+    def lag_seconds(self):
+        """lag_samples times the average sample period (nan if no timestamps were given)."""
+        return self.lag_samples * self.period if self.period else np.full(self.channels, np.nan)
+
+    def snapshot(self):
+        """All current metrics as a dict of per-channel arrays."""
+        return {
+            "samples": self.count,
+            "raw_mean": self.raw_mean.copy(), "raw_std": self.raw_std,
+            "filtered_mean": self.filtered_mean.copy(), "filtered_std": self.filtered_std,
+            "rmse": self.rmse, "noise_reduction": self.noise_reduction,
+            "lag_samples": self.lag_samples, "lag_seconds": self.lag_seconds,
+        }
+
+    def summary(self, names=None):
+        """One short line per channel, for console output."""
+        names = names or [f"ch{i}" for i in range(self.channels)]
+        lag_s = self.lag_seconds
+        lines = []
+        for i, name in enumerate(names):
+            lag = f"{self.lag_samples[i]:.1f} samples" + (f" ({1000 * lag_s[i]:.0f} ms)" if np.isfinite(lag_s[i]) else "")
+            lines.append(f"{name}: std {self.raw_std[i]:.2f} -> {self.filtered_std[i]:.2f}, RMSE {self.rmse[i]:.2f}, "
+                         f"noise x{self.noise_reduction[i]:.2f}, lag {lag}")
+        return "\n".join(lines)
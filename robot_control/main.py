@@ -5,11 +5,15 @@ import asyncio
 import time
 import tkinter as tk
 import os
+import sys
 import matplotlib.pyplot as plt
 import websockets
 
 from kalman_filter import KalmanFilter
 from dashboard import Dashboard
+# The streaming filter metrics live with the other analysis code in data_analysis/.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from data_analysis.streaming_metrics import StreamingMetrics
 
 # --- CONFIGURATION ---
 WEBSOCKET_URI = "ws://localhost:8765"
@@ -22,6 +26,8 @@ POT1_MEASUREMENT_NOISE = 0.01
 POT2_PROCESS_NOISE = 1e-3
 POT2_MEASUREMENT_NOISE = 0.07
 # --------------------
+METRICS_WINDOW = 500  # Samples the live filter metrics average over
+METRICS_REPORT_SECONDS = 5.0  # How often the data thread prints them
 
 incoming_data_queue = queue.Queue()
 outgoing_command_queue = queue.Queue()
@@ -37,6 +43,10 @@ def data_processing_thread(dashboard, shutdown_event):
     
     is_first_reading = True
     start_time = time.time()
+    # FSR 1-8 then the two pots, in the order they are filtered below
+    metrics = StreamingMetrics(channels=NUM_SENSORS + 2, window=METRICS_WINDOW)
+    metric_names = [f"FSR{i + 1}" for i in range(NUM_SENSORS)] + ["POT1", "POT2"]
+    next_report = start_time + METRICS_REPORT_SECONDS
 
     while not shutdown_event.is_set():
         try:
@@ -80,6 +90,13 @@ def data_processing_thread(dashboard, shutdown_event):
             angle2 = int((max(0, min(4095, filtered_pot2)) / 4095) * 180)
             outgoing_command_queue.put(f"SERVO2:{angle2}")
 
+            now = time.time()
+            metrics.update(raw_fsr_readings + [raw_pot1_reading, raw_pot2_reading],
+                           filtered_fsr_readings + [filtered_pot1, filtered_pot2], now)
+            if now >= next_report:
+                print(f"[Metrics] Last ~{METRICS_WINDOW} samples:\n{metrics.summary(metric_names)}")
+                next_report = now + METRICS_REPORT_SECONDS
+
         except queue.Empty:
             continue
         except Exception as e:
@@ -0,0 +1,144 @@
+# filename: dataset_dedup.py
+# Finds near-duplicate images in the dataset (image_collector.py grabs frames
+# 0.2 s apart, so long runs of almost identical pictures are common) and
+# optionally writes a pruned manifest that train_model.py can train from.
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+
+# --- CONFIGURATION ---
+DATASET_PATH = "dataset"
+# Where the pruned file list is written. Set to None to only print the report.
+MANIFEST_PATH = "pruned_manifest.txt"
+# Two images whose 64-bit difference hashes differ in at most this many bits
+# are treated as duplicates. 0 = identical hash; on our 150-frame captures
+# 2 already removes roughly three quarters of each class.
+HAMMING_THRESHOLD = 2
+# Hashing is I/O + JPEG decode bound; OpenCV releases the GIL so threads scale.
+NUM_WORKERS = os.cpu_count() or 4
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def _capture_order(file_name):
+    """Sort key that keeps image_collector's 0.jpg, 1.jpg, ... 10.jpg order."""
+    stem = os.path.splitext(file_name)[0]
+    return (0, int(stem), "") if stem.isdigit() else (1, 0, stem)
+
+
+def list_dataset(dataset_path):
+    """
+    Returns {class_name: [relative image paths in capture order]}.
+    Paths are relative to dataset_path and use '/' so manifests are portable.
+    """
+    classes = {}
+    for class_name in sorted(os.listdir(dataset_path)):
+        class_dir = os.path.join(dataset_path, class_name)
+        if not os.path.isdir(class_dir):
+            continue
+        files = [f for f in os.listdir(class_dir) if f.lower().endswith(IMAGE_EXTENSIONS)]
+        classes[class_name] = [f"{class_name}/{f}" for f in sorted(files, key=_capture_order)]
+    return classes
+
+
+def difference_hash(image_path):
+    """
+    Computes a 64-bit difference hash (dHash) of an image.
+    The JPEG is decoded at 1/8 scale straight into grayscale, which is far
+    cheaper than a full decode and is all a 9x8 thumbnail needs.
+    Returns a (64,) bool array, or None if the file cannot be read.
+    """
+    img = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if img is None:
+        return None
+    thumb = cv2.resize(img, (9, 8), interpolation=cv2.INTER_AREA)
+    return (thumb[:, 1:] > thumb[:, :-1]).flatten()
+
+
+def hash_images(dataset_path, relative_paths):
+    """Hashes all images in parallel. Returns a list aligned with relative_paths."""
+    full_paths = [os.path.join(dataset_path, p) for p in relative_paths]
+    with ThreadPoolExecutor(max_workers=NUM_WORKERS) as pool:
+        return list(pool.map(difference_hash, full_paths))
+
+
+def cluster_near_duplicates(hashes, threshold):
+    """
+    Greedy single-pass clustering in capture order: each image joins the
+    nearest cluster if its representative is within `threshold` bits, otherwise it
+    starts a new cluster. Representatives are kept in a numpy array so each
+    image is compared against all of them in one vectorized operation.
+
+    Returns a list of clusters, each a list of indices into `hashes`.
+    The first index of every cluster is its representative.
+    """
+    clusters = []
+    representatives = np.zeros((0, 64), dtype=bool)
+    for index, image_hash in enumerate(hashes):
+        if image_hash is None:
+            continue
+        if len(representatives):
+            distances = np.count_nonzero(representatives != image_hash, axis=1)
+            best = int(np.argmin(distances))
+            if distances[best] <= threshold:
+                clusters[best].append(index)
+                continue
+        clusters.append([index])
+        representatives = np.vstack([representatives, image_hash])
+    return clusters
+
+
+def write_manifest(manifest_path, kept_paths, threshold):
+    """Writes one dataset-relative image path per line."""
+    with open(manifest_path, "w") as manifest:
+        manifest.write(f"# Pruned by dataset_dedup.py (hamming threshold {threshold})\n")
+        for path in kept_paths:
+            manifest.write(path + "\n")
+
+
+def main():
+    if not os.path.isdir(DATASET_PATH):
+        print(f"CRITICAL ERROR: Dataset directory '{DATASET_PATH}' not found.")
+        return
+
+    classes = list_dataset(DATASET_PATH)
+    all_paths = [p for paths in classes.values() for p in paths]
+    print(f"INFO: Hashing {len(all_paths)} images with {NUM_WORKERS} workers...")
+
+    start = time.perf_counter()
+    all_hashes = hash_images(DATASET_PATH, all_paths)
+    print(f"INFO: Hashing took {time.perf_counter() - start:.2f}s")
+    hash_lookup = dict(zip(all_paths, all_hashes))
+
+    kept_paths = []
+    print("\n--- Per-Class Redundancy Report ---")
+    print(f"{'Class':<14}{'Images':>8}{'Unique':>8}{'Redundant':>11}{'Largest run':>13}")
+    for class_name, paths in classes.items():
+        hashes = [hash_lookup[p] for p in paths]
+        clusters = cluster_near_duplicates(hashes, HAMMING_THRESHOLD)
+        unreadable = sum(h is None for h in hashes)
+        kept_paths.extend(paths[cluster[0]] for cluster in clusters)
+
+        total = len(paths)
+        redundant = total - len(clusters) - unreadable
+        ratio = 100.0 * redundant / total if total else 0.0
+        largest = max((len(c) for c in clusters), default=0)
+        print(f"{class_name:<14}{total:>8}{len(clusters):>8}{redundant:>6} ({ratio:4.1f}%){largest:>8}")
+        if unreadable:
+            print(f"WARNING: {unreadable} unreadable image(s) in '{class_name}' were skipped.")
+
+    total = len(all_paths)
+    print("-----------------------------------")
+    print(f"Keeping {len(kept_paths)} of {total} images "
+          f"({100.0 * (total - len(kept_paths)) / max(total, 1):.1f}% pruned).")
+
+    if MANIFEST_PATH:
+        write_manifest(MANIFEST_PATH, kept_paths, HAMMING_THRESHOLD)
+        print(f"SUCCESS: Wrote pruned manifest to {MANIFEST_PATH}")
+        print("Set MANIFEST_PATH in train_model.py to train on it; the run log there")
+        print("compares training time and validation accuracy against a full-dataset run.")
+
+
+if __name__ == "__main__":
+    main()
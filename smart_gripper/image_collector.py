@@ -1,7 +1,13 @@
 # filename: image_collector.py
 import cv2
 import os
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+# The lightweight MJPEG client is shared with the recognizer in auto_gripper/.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "auto_gripper"))
+from mjpeg_stream import MJPEGStreamReader
 
 # --- CONFIGURATION ---
 # Make sure this URL matches the one from your object_recognizer.py file
@@ -9,10 +15,180 @@ ESP32_CAMERA_URL = "http://192.168.1.200:81/stream"
 DATASET_PATH = "dataset"
 IMAGES_PER_OBJECT = 150
 
+# "motion" saves a frame only when the scene changed enough since the last saved
+# frame and lets you switch classes with hotkeys without reopening the stream.
+# "timed" is the original fixed 150-frame burst per object.
+CAPTURE_MODE = "motion"
+# Classes selectable with the number keys 1-9 (in this order) in motion mode.
+OBJECT_CLASSES = ['background', 'egg', 'paper_box', 'power_bank']
+# Mean absolute grayscale difference (0-255) against the last saved frame
+# that counts as "different enough" to be worth saving.
+MOTION_THRESHOLD = 6.0
+# Size the frames are shrunk to before comparing, so noise doesn't count as motion.
+MOTION_COMPARE_SIZE = (64, 48)
+# Never save faster than this, even if the scene changes continuously.
+MIN_SAVE_INTERVAL = 0.1
+# JPEG encoding and disk writes happen on these background threads.
+WRITER_THREADS = 2
+# Frames are dropped (not queued) if this many writes are still pending.
+MAX_PENDING_WRITES = 16
+# Frames are saved exactly as the camera encoded them; only the preview is
+# decoded, at the smallest JPEG scale that is still at least this big.
+PREVIEW_MIN_SIZE = (320, 240)
+
+
+def next_image_index(object_path):
+    """Returns the number after the highest existing '<n>.jpg' so reruns never overwrite."""
+    indices = [int(os.path.splitext(f)[0]) for f in os.listdir(object_path)
+               if f.lower().endswith('.jpg') and os.path.splitext(f)[0].isdigit()]
+    return max(indices) + 1 if indices else 0
+
+
+def ensure_object_path(object_name):
+    """Creates dataset/<object_name> if needed and returns its path."""
+    object_path = os.path.join(DATASET_PATH, object_name)
+    if not os.path.exists(object_path):
+        os.makedirs(object_path)
+        print(f"INFO: Created object directory: {object_path}")
+    return object_path
+
+
+def _write_jpeg(image_path, jpeg):
+    with open(image_path, "wb") as image_file:
+        image_file.write(jpeg)
+
+
+def open_stream():
+    """Opens the camera stream, printing the usual hints if it fails. Returns None on failure."""
+    cap = MJPEGStreamReader(ESP32_CAMERA_URL)
+    if not cap.start():
+        print(f"CRITICAL ERROR: Could not open camera stream at {ESP32_CAMERA_URL}.")
+        print("Please check the URL and your ESP32-CAM's Wi-Fi connection.")
+        return None
+    return cap
+
+
+def _motion_signature(frame):
+    small = cv2.resize(frame, MOTION_COMPARE_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (3, 3), 0)
+
+
+def motion_capture_session():
+    """
+    Captures images for several classes from a single stream connection.
+    A frame is saved only when it differs from the last saved frame of the
+    current class by more than MOTION_THRESHOLD. The camera's own JPEG bytes
+    are written to disk by a background thread pool, so nothing is re-encoded
+    and the preview never stalls on disk I/O.
+
+    Hotkeys: 1-9 select a class, n/p next/previous class,
+             space pauses/resumes saving, q quits.
+    """
+    if not os.path.exists(DATASET_PATH):
+        os.makedirs(DATASET_PATH)
+        print(f"INFO: Created main directory: {DATASET_PATH}")
+
+    cap = open_stream()
+    if cap is None:
+        return
+
+    print("\nSUCCESS: Camera connected.")
+    print("Hotkeys: " + ", ".join(f"{i + 1}={name}" for i, name in enumerate(OBJECT_CLASSES[:9]))
+          + " | n/p = next/prev class | space = pause/resume | q = quit")
+
+    writer_pool = ThreadPoolExecutor(max_workers=WRITER_THREADS)
+    pending_writes = []
+    saved_counts = {name: 0 for name in OBJECT_CLASSES}
+    next_index = {}
+    class_index = 0
+    recording = False
+    last_signature = None
+    last_save_time = 0.0
+    dropped_frames = 0
+    session_start = time.time()
+
+    def select_class(index):
+        nonlocal class_index, last_signature, recording
+        class_index = index % len(OBJECT_CLASSES)
+        name = OBJECT_CLASSES[class_index]
+        object_path = ensure_object_path(name)
+        if name not in next_index:
+            next_index[name] = next_image_index(object_path)
+        last_signature = None
+        recording = False
+        print(f"INFO: Class '{name}' selected (next file: {next_index[name]}.jpg). Press space to start saving.")
+
+    select_class(0)
+    try:
+        while True:
+            jpeg = cap.read_jpeg()
+            frame = cap.decode(jpeg, PREVIEW_MIN_SIZE) if jpeg is not None else None
+            if frame is None:
+                print("ERROR: Failed to grab frame. Please check the connection.")
+                break
+
+            object_name = OBJECT_CLASSES[class_index]
+            signature = _motion_signature(frame)
+            difference = 255.0 if last_signature is None else float(cv2.absdiff(signature, last_signature).mean())
+
+            pending_writes = [f for f in pending_writes if not f.done()]
+            now = time.time()
+            if recording and difference > MOTION_THRESHOLD and now - last_save_time >= MIN_SAVE_INTERVAL:
+                if len(pending_writes) < MAX_PENDING_WRITES:
+                    image_path = os.path.join(DATASET_PATH, object_name, f"{next_index[object_name]}.jpg")
+                    pending_writes.append(writer_pool.submit(_write_jpeg, image_path, jpeg))
+                    next_index[object_name] += 1
+                    saved_counts[object_name] += 1
+                    last_signature = signature
+                    last_save_time = now
+                else:
+                    dropped_frames += 1
+
+            # Draw on a copy so the saved frame stays clean.
+            display_frame = frame.copy()
+            state = "SAVING" if recording else "PAUSED"
+            text = f"[{state}] '{object_name}' | saved: {saved_counts[object_name]} | change: {difference:.1f}"
+            cv2.putText(display_frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                        (0, 255, 0) if recording else (0, 200, 255), 2)
+            cv2.imshow("Image Collector - Motion Capture", display_frame)
+
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord('q'):
+                break
+            elif key == ord(' '):
+                recording = not recording
+                print(f"INFO: Saving {'resumed' if recording else 'paused'} for '{object_name}'.")
+            elif key == ord('n'):
+                select_class(class_index + 1)
+            elif key == ord('p'):
+                select_class(class_index - 1)
+            elif ord('1') <= key <= ord('9') and key - ord('1') < len(OBJECT_CLASSES):
+                select_class(key - ord('1'))
+    finally:
+        cap.print_stats()
+        cap.release()
+        cv2.destroyAllWindows()
+        writer_pool.shutdown(wait=True)
+
+    minutes = max(time.time() - session_start, 1e-6) / 60.0
+    total_saved = sum(saved_counts.values())
+    print("\n--- Capture Session Summary ---")
+    for name, count in saved_counts.items():
+        if count:
+            print(f"{name:<14}{count:>5} images")
+    print(f"Total: {total_saved} images in {minutes:.1f} min ({total_saved / minutes:.1f} images/min)")
+    if dropped_frames:
+        print(f"WARNING: {dropped_frames} frames dropped because the disk writer fell behind.")
+
+
 def main():
     """
     Main function to run the image collection process.
     """
+    if CAPTURE_MODE == "motion":
+        motion_capture_session()
+        return
+
     # First, check if the main 'dataset' directory exists. If not, create it.
     if not os.path.exists(DATASET_PATH):
         os.makedirs(DATASET_PATH)
@@ -35,19 +211,15 @@ def main():
             continue
 
         # Create the specific folder for the object inside the 'dataset' directory.
-        object_path = os.path.join(DATASET_PATH, object_name)
-        if not os.path.exists(object_path):
-            os.makedirs(object_path)
-            print(f"INFO: Created object directory: {object_path}")
-        else:
-            # Inform the user if the folder already exists.
-            print(f"INFO: Directory '{object_path}' already exists. Images will be added/overwritten.")
+        object_path = ensure_object_path(object_name)
+        # Continue numbering after any images already in the folder.
+        first_index = next_image_index(object_path)
+        if first_index:
+            print(f"INFO: Directory '{object_path}' already has images. New images start at {first_index}.jpg.")
 
         # Connect to the ESP32 camera stream.
-        cap = cv2.VideoCapture(ESP32_CAMERA_URL)
-        if not cap.isOpened():
-            print(f"CRITICAL ERROR: Could not open camera stream at {ESP32_CAMERA_URL}.")
-            print("Please check the URL and your ESP32-CAM's Wi-Fi connection.")
+        cap = open_stream()
+        if cap is None:
             continue # Go back to asking for an object name.
 
         print("\nSUCCESS: Camera connected. Get ready to capture.")
@@ -63,8 +235,9 @@ def main():
         img_count = 0
         while img_count < IMAGES_PER_OBJECT:
             # Read a frame from the camera.
-            ret, frame = cap.read()
-            if not ret:
+            jpeg = cap.read_jpeg()
+            frame = cap.decode(jpeg, PREVIEW_MIN_SIZE) if jpeg is not None else None
+            if frame is None:
                 print("ERROR: Failed to grab frame. Please check the connection.")
                 break
 
@@ -74,10 +247,10 @@ def main():
             cv2.putText(display_frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
             cv2.imshow("Image Collector - Press 'q' to stop early", display_frame)
 
-            # Save the original, clean frame to the disk.
-            image_name = f"{img_count}.jpg"
+            # Save the original, clean frame to the disk, exactly as the camera sent it.
+            image_name = f"{first_index + img_count}.jpg"
             image_path = os.path.join(object_path, image_name)
-            cv2.imwrite(image_path, frame)
+            _write_jpeg(image_path, jpeg)
             print(f"Saved {image_path}")
             
             img_count += 1
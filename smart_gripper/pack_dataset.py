@@ -0,0 +1,136 @@
+# filename: pack_dataset.py
+# Converts dataset/<class>/*.jpg into pre-resized 224x224 RGB uint8 shards
+# (one .npy per class) that train_model.py can memory-map instead of
+# re-decoding every JPEG on each run. Only classes whose files changed since
+# the last pack are rebuilt.
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from dataset_dedup import list_dataset
+
+# --- CONFIGURATION ---
+DATASET_PATH = "dataset"
+PACKED_PATH = "packed_dataset"
+INDEX_FILE_NAME = "index.json"
+# Must match IMG_HEIGHT / IMG_WIDTH in train_model.py
+IMG_HEIGHT = 224
+IMG_WIDTH = 224
+NUM_WORKERS = os.cpu_count() or 4
+
+
+def class_fingerprint(relative_paths):
+    """Hashes file names, sizes and modification times so edits trigger a rebuild."""
+    digest = hashlib.sha1(f"{IMG_WIDTH}x{IMG_HEIGHT}".encode())
+    for path in relative_paths:
+        stat = os.stat(os.path.join(DATASET_PATH, path))
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def load_resized(image_path):
+    """
+    Decodes one image and resizes it the way image_dataset_from_directory does
+    (RGB channel order, bilinear). Returns None if the file is unreadable.
+    """
+    img = cv2.imread(image_path, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    img = cv2.resize(img, (IMG_WIDTH, IMG_HEIGHT), interpolation=cv2.INTER_LINEAR)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+
+def pack_class(class_name, relative_paths):
+    """
+    Writes all images of one class into <PACKED_PATH>/<class_name>.npy.
+    The shard is written to a temporary file and renamed at the end, so an
+    interrupted pack never leaves a half-written shard behind. Unreadable
+    images are skipped and the shard is cut down to the images stored, so
+    its shape always matches the count in the index.
+    Returns the number of images stored.
+    """
+    shard_path = os.path.join(PACKED_PATH, f"{class_name}.npy")
+    tmp_path = shard_path + ".tmp.npy"
+    shard = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8,
+                                      shape=(len(relative_paths), IMG_HEIGHT, IMG_WIDTH, 3))
+    full_paths = [os.path.join(DATASET_PATH, p) for p in relative_paths]
+    stored = 0
+    with ThreadPoolExecutor(max_workers=NUM_WORKERS) as pool:
+        for path, image in zip(relative_paths, pool.map(load_resized, full_paths)):
+            if image is None:
+                print(f"WARNING: Could not read {path}, skipping.")
+                continue
+            shard[stored] = image
+            stored += 1
+    shard.flush()
+    if stored < len(relative_paths):
+        trimmed_path = shard_path + ".trim.npy"
+        trimmed = np.lib.format.open_memmap(trimmed_path, mode="w+", dtype=np.uint8,
+                                            shape=(stored, IMG_HEIGHT, IMG_WIDTH, 3))
+        trimmed[:] = shard[:stored]
+        trimmed.flush()
+        del trimmed
+        del shard
+        os.replace(trimmed_path, tmp_path)
+    else:
+        del shard
+    os.replace(tmp_path, shard_path)
+    return stored
+
+
+def load_index():
+    index_path = os.path.join(PACKED_PATH, INDEX_FILE_NAME)
+    if not os.path.exists(index_path):
+        return {"classes": []}
+    with open(index_path) as index_file:
+        return json.load(index_file)
+
+
+def main():
+    if not os.path.isdir(DATASET_PATH):
+        print(f"CRITICAL ERROR: Dataset directory '{DATASET_PATH}' not found.")
+        return
+    os.makedirs(PACKED_PATH, exist_ok=True)
+
+    old_entries = {entry["name"]: entry for entry in load_index()["classes"]}
+    classes = list_dataset(DATASET_PATH)
+    new_entries = []
+    start = time.perf_counter()
+
+    # Class order (and therefore label ids) is alphabetical, like image_dataset_from_directory.
+    for class_name, relative_paths in classes.items():
+        fingerprint = class_fingerprint(relative_paths)
+        old = old_entries.get(class_name)
+        shard_file = f"{class_name}.npy"
+        if old and old["fingerprint"] == fingerprint and os.path.exists(os.path.join(PACKED_PATH, shard_file)):
+            print(f"INFO: '{class_name}' unchanged ({old['count']} images), keeping existing shard.")
+            new_entries.append(old)
+            continue
+
+        class_start = time.perf_counter()
+        stored = pack_class(class_name, relative_paths)
+        print(f"INFO: Packed '{class_name}': {stored} images in {time.perf_counter() - class_start:.2f}s")
+        new_entries.append({"name": class_name, "shard": shard_file, "count": stored,
+                            "fingerprint": fingerprint})
+
+    for class_name in set(old_entries) - set(classes):
+        stale = os.path.join(PACKED_PATH, old_entries[class_name]["shard"])
+        if os.path.exists(stale):
+            os.remove(stale)
+        print(f"INFO: Removed shard for deleted class '{class_name}'.")
+
+    index = {"image_size": [IMG_HEIGHT, IMG_WIDTH], "classes": new_entries}
+    with open(os.path.join(PACKED_PATH, INDEX_FILE_NAME), "w") as index_file:
+        json.dump(index, index_file, indent=2)
+
+    total = sum(entry["count"] for entry in new_entries)
+    size_mb = total * IMG_HEIGHT * IMG_WIDTH * 3 / 1e6
+    print(f"SUCCESS: {len(new_entries)} classes, {total} images ({size_mb:.0f} MB) "
+          f"in '{PACKED_PATH}' after {time.perf_counter() - start:.2f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,93 +6,368 @@ from tensorflow import keras
 from tensorflow.keras import layers
 from tensorflow.keras.models import Sequential
 import pathlib
+import csv
+import json
+import os
+import time
+
+SCRIPT_START = time.perf_counter()
 
 # --- CONFIGURATION ---
 DATASET_PATH = "dataset"
+# Optional pruned file list written by dataset_dedup.py. None = use every image.
+MANIFEST_PATH = None
+# Train from the pre-resized shards written by pack_dataset.py instead of JPEGs.
+USE_PACKED_SHARDS = False
+PACKED_PATH = "packed_dataset"
+# Every run appends its timing and accuracy here so pruned and full runs can be compared.
+RUN_LOG_PATH = "training_runs.csv"
 IMG_HEIGHT = 224
 IMG_WIDTH = 224
 BATCH_SIZE = 32
 EPOCHS = 15
+VALIDATION_SPLIT = 0.2
+SEED = 123
+MODEL_PATH = 'my_object_model.h5'
+
+# --- INCREMENTAL MODE ---
+# List new class folders here (e.g. ["sponge"]) to add them to the existing
+# model at MODEL_PATH instead of retraining everything from ImageNet weights.
+# Old class weights are kept, new classes are appended to the end of
+# CLASS_NAMES, and only the classifier head is fine-tuned on the new images
+# plus a small replay sample of every old class.
+INCREMENTAL_NEW_CLASSES = []
+REPLAY_IMAGES_PER_CLASS = 30
+INCREMENTAL_EPOCHS = 5
+INCREMENTAL_LEARNING_RATE = 1e-4
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+
+def read_manifest(manifest_path):
+    """Returns the 'class/file.jpg' entries of a manifest, skipping comments."""
+    with open(manifest_path) as manifest:
+        return [line.strip() for line in manifest if line.strip() and not line.startswith("#")]
+
+
+def _decode_and_resize(path, label):
+    image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+    image = tf.image.resize(image, (IMG_HEIGHT, IMG_WIDTH))
+    return image, label
+
+
+def class_names_path(model_path):
+    """The class order of a saved model lives next to it, e.g. my_object_model.classes.json."""
+    return os.path.splitext(model_path)[0] + ".classes.json"
+
+
+def split_indices(count):
+    """Seeded (training, validation) index split."""
+    order = np.random.RandomState(SEED).permutation(count)
+    num_val = int(VALIDATION_SPLIT * count)
+    return order[num_val:], order[:num_val]
+
+
+def paths_to_dataset(file_paths, labels):
+    """Builds a batched (image, label) dataset from explicit file paths."""
+    ds = tf.data.Dataset.from_tensor_slices((file_paths, labels))
+    ds = ds.map(_decode_and_resize, num_parallel_calls=AUTOTUNE)
+    return ds.batch(BATCH_SIZE)
+
+
+def load_from_manifest(data_dir, manifest_path):
+    """
+    Builds training and validation datasets from a manifest.
+    Classes are sorted alphabetically and split with SEED, the same way
+    image_dataset_from_directory does it, so CLASS_NAMES order is unchanged.
+    """
+    relative_paths = read_manifest(manifest_path)
+    class_names = sorted({p.split("/")[0] for p in relative_paths})
+    file_paths = np.array([str(data_dir / p) for p in relative_paths])
+    labels = np.array([class_names.index(p.split("/")[0]) for p in relative_paths], dtype=np.int32)
+
+    train_idx, val_idx = split_indices(len(file_paths))
+    print(f"Using {len(file_paths)} images from manifest {manifest_path}: "
+          f"{len(train_idx)} for training, {len(val_idx)} for validation.")
+    train_ds = paths_to_dataset(file_paths[train_idx], labels[train_idx])
+    val_ds = paths_to_dataset(file_paths[val_idx], labels[val_idx])
+    return train_ds, val_ds, class_names
+
+
+def load_from_shards(packed_path):
+    """
+    Streams the uint8 shards written by pack_dataset.py into tf.data.
+    Shards are memory-mapped, so start-up only opens a few files; images are
+    gathered batch by batch in parallel map calls. Each shard holds one class,
+    so the shard number is the label.
+    """
+    with open(os.path.join(packed_path, "index.json")) as index_file:
+        index = json.load(index_file)
+    if index["image_size"] != [IMG_HEIGHT, IMG_WIDTH]:
+        raise SystemExit(f"CRITICAL ERROR: Shards in {packed_path} are {index['image_size']}, "
+                         f"expected {[IMG_HEIGHT, IMG_WIDTH]}. Re-run pack_dataset.py.")
+
+    entries = index["classes"]
+    class_names = [entry["name"] for entry in entries]
+    shards = [np.load(os.path.join(packed_path, entry["shard"]), mmap_mode="r") for entry in entries]
+    shard_ids = np.concatenate([np.full(e["count"], i, dtype=np.int32) for i, e in enumerate(entries)])
+    rows = np.concatenate([np.arange(e["count"], dtype=np.int32) for e in entries])
+
+    train_idx, val_idx = split_indices(len(rows))
+    print(f"Using {len(rows)} packed images from {packed_path}: "
+          f"{len(train_idx)} for training, {len(val_idx)} for validation.")
+
+    def gather(batch_shards, batch_rows):
+        images = np.empty((len(batch_rows), IMG_HEIGHT, IMG_WIDTH, 3), dtype=np.uint8)
+        for i, (shard, row) in enumerate(zip(batch_shards, batch_rows)):
+            images[i] = shards[shard][row]
+        return images
+
+    def read_batch(batch_shards, batch_rows):
+        images = tf.numpy_function(gather, [batch_shards, batch_rows], tf.uint8)
+        images.set_shape([None, IMG_HEIGHT, IMG_WIDTH, 3])
+        return tf.cast(images, tf.float32), batch_shards
+
+    def to_dataset(indices, shuffle):
+        ds = tf.data.Dataset.from_tensor_slices((shard_ids[indices], rows[indices]))
+        if shuffle:
+            ds = ds.shuffle(len(indices), seed=SEED, reshuffle_each_iteration=True)
+        return ds.batch(BATCH_SIZE).map(read_batch, num_parallel_calls=AUTOTUNE)
+
+    return to_dataset(train_idx, shuffle=True), to_dataset(val_idx, shuffle=False), class_names
+
+
+def load_incremental(data_dir, old_class_names, new_class_names):
+    """
+    Builds datasets from every image of the new classes plus a seeded random
+    sample of REPLAY_IMAGES_PER_CLASS from each old class, so the head keeps
+    seeing the old objects while it learns the new ones.
+    Labels follow old_class_names + new_class_names.
+    """
+    rng = np.random.RandomState(SEED)
+    file_paths, labels = [], []
+    for label, name in enumerate(old_class_names + new_class_names):
+        files = sorted(str(p) for p in (data_dir / name).glob('*.jpg'))
+        if name in old_class_names and len(files) > REPLAY_IMAGES_PER_CLASS:
+            files = list(rng.choice(files, REPLAY_IMAGES_PER_CLASS, replace=False))
+        if not files:
+            print(f"WARNING: No images found for class '{name}' in {data_dir / name}.")
+        file_paths += files
+        labels += [label] * len(files)
+
+    file_paths = np.array(file_paths)
+    labels = np.array(labels, dtype=np.int32)
+    train_idx, val_idx = split_indices(len(file_paths))
+    print(f"Incremental set: {len(file_paths)} images ({REPLAY_IMAGES_PER_CLASS} replay per old class): "
+          f"{len(train_idx)} for training, {len(val_idx)} for validation.")
+    return paths_to_dataset(file_paths[train_idx], labels[train_idx]), \
+           paths_to_dataset(file_paths[val_idx], labels[val_idx])
+
+
+def read_old_class_names(data_dir):
+    """
+    Class order of the model at MODEL_PATH. Falls back to the alphabetical
+    folder order a full run would have used, minus the classes being added.
+    """
+    sidecar = class_names_path(MODEL_PATH)
+    if os.path.exists(sidecar):
+        with open(sidecar) as sidecar_file:
+            return json.load(sidecar_file)
+    print(f"WARNING: {sidecar} not found, assuming alphabetical folder order for the old classes.")
+    return sorted(p.name for p in data_dir.iterdir()
+                  if p.is_dir() and p.name not in INCREMENTAL_NEW_CLASSES)
+
+
+def widen_classifier(model, num_new_classes):
+    """
+    Returns a copy of `model` whose final Dense layer has `num_new_classes`
+    extra outputs. Existing kernel columns and biases are copied over so old
+    classes keep their logits; everything except the new head is frozen.
+    """
+    old_head = model.layers[-1]
+    old_kernel, old_bias = old_head.get_weights()
+    num_old_classes = old_kernel.shape[1]
+
+    new_head = layers.Dense(num_old_classes + num_new_classes)
+    new_head.build((None, old_kernel.shape[0]))
+    kernel, bias = new_head.get_weights()
+    kernel[:, :num_old_classes] = old_kernel
+    bias[:num_old_classes] = old_bias
+    bias[num_old_classes:] = old_bias.mean()
+    new_head.set_weights([kernel, bias])
+
+    for layer in model.layers[:-1]:
+        layer.trainable = False
+    return Sequential(model.layers[:-1] + [new_head])
+
+
+class ColdStartTimer(keras.callbacks.Callback):
+    """Records how long after script start the first epoch finished (decode, resize and all)."""
+
+    def __init__(self):
+        super().__init__()
+        self.cold_start_seconds = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        if self.cold_start_seconds is None:
+            self.cold_start_seconds = time.perf_counter() - SCRIPT_START
+
+
+RUN_LOG_FIELDS = ["timestamp", "dataset", "epochs", "cold_start_seconds", "train_seconds", "val_accuracy"]
+
+
+def log_run(dataset_label, epochs, cold_start_seconds, train_seconds, val_accuracy):
+    """
+    Appends this run to RUN_LOG_PATH and prints the cold-start and
+    training-time saving plus the accuracy delta against the most recent run
+    on a different dataset.
+    """
+    rows = []
+    if os.path.exists(RUN_LOG_PATH):
+        with open(RUN_LOG_PATH, newline="") as log_file:
+            rows = list(csv.DictReader(log_file))
+    previous = next((row for row in reversed(rows) if row["dataset"] != dataset_label), None)
+
+    rows.append({"timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "dataset": dataset_label,
+                 "epochs": epochs, "cold_start_seconds": f"{cold_start_seconds:.1f}",
+                 "train_seconds": f"{train_seconds:.1f}", "val_accuracy": f"{val_accuracy:.4f}"})
+    # Rewritten in full so logs from older versions pick up new columns.
+    with open(RUN_LOG_PATH, "w", newline="") as log_file:
+        writer = csv.DictWriter(log_file, fieldnames=RUN_LOG_FIELDS, restval="", extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print("\n--- Training Run Summary ---")
+    print(f"Dataset: {dataset_label}")
+    print(f"Cold start (to end of epoch 1): {cold_start_seconds:.1f}s")
+    print(f"Training time:       {train_seconds:.1f}s")
+    print(f"Validation accuracy: {val_accuracy:.4f}")
+    if previous:
+        prev_seconds = float(previous["train_seconds"])
+        prev_accuracy = float(previous["val_accuracy"])
+        saving = 100.0 * (prev_seconds - train_seconds) / prev_seconds if prev_seconds else 0.0
+        print(f"Compared to last '{previous['dataset']}' run: "
+              f"time {prev_seconds:.1f}s -> {train_seconds:.1f}s ({saving:+.1f}% saved), "
+              f"accuracy {prev_accuracy:.4f} -> {val_accuracy:.4f} ({val_accuracy - prev_accuracy:+.4f})")
+        if previous.get("cold_start_seconds"):
+            print(f"Cold start: {float(previous['cold_start_seconds']):.1f}s -> {cold_start_seconds:.1f}s")
+    print("----------------------------\n")
+
 
 # --- 1. LOAD THE DATASET ---
 data_dir = pathlib.Path(DATASET_PATH)
 image_count = len(list(data_dir.glob('*/*.jpg')))
 print(f"Found {image_count} images.")
 
-# Create a training dataset (80%)
-train_ds = tf.keras.utils.image_dataset_from_directory(
-  data_dir,
-  validation_split=0.2,
-  subset="training",
-  seed=123,
-  image_size=(IMG_HEIGHT, IMG_WIDTH),
-  batch_size=BATCH_SIZE)
-
-# Create a validation dataset (20%)
-val_ds = tf.keras.utils.image_dataset_from_directory(
-  data_dir,
-  validation_split=0.2,
-  subset="validation",
-  seed=123,
-  image_size=(IMG_HEIGHT, IMG_WIDTH),
-  batch_size=BATCH_SIZE)
-
-CLASS_NAMES = train_ds.class_names
+if INCREMENTAL_NEW_CLASSES:
+  old_class_names = read_old_class_names(data_dir)
+  CLASS_NAMES = old_class_names + [c for c in INCREMENTAL_NEW_CLASSES if c not in old_class_names]
+  train_ds, val_ds = load_incremental(data_dir, old_class_names, CLASS_NAMES[len(old_class_names):])
+  dataset_label = "incremental:+" + ",".join(CLASS_NAMES[len(old_class_names):])
+elif USE_PACKED_SHARDS:
+  train_ds, val_ds, CLASS_NAMES = load_from_shards(PACKED_PATH)
+  dataset_label = "packed"
+elif MANIFEST_PATH:
+  train_ds, val_ds, CLASS_NAMES = load_from_manifest(data_dir, MANIFEST_PATH)
+  dataset_label = f"manifest:{os.path.basename(MANIFEST_PATH)}"
+else:
+  # Create a training dataset (80%)
+  train_ds = tf.keras.utils.image_dataset_from_directory(
+    data_dir,
+    validation_split=VALIDATION_SPLIT,
+    subset="training",
+    seed=SEED,
+    image_size=(IMG_HEIGHT, IMG_WIDTH),
+    batch_size=BATCH_SIZE)
+
+  # Create a validation dataset (20%)
+  val_ds = tf.keras.utils.image_dataset_from_directory(
+    data_dir,
+    validation_split=VALIDATION_SPLIT,
+    subset="validation",
+    seed=SEED,
+    image_size=(IMG_HEIGHT, IMG_WIDTH),
+    batch_size=BATCH_SIZE)
+
+  CLASS_NAMES = train_ds.class_names
+  dataset_label = "full"
+
 print("Class Names Found:", CLASS_NAMES)
 
-AUTOTUNE = tf.data.AUTOTUNE
-train_ds = train_ds.cache().shuffle(1000).prefetch(buffer_size=AUTOTUNE)
-val_ds = val_ds.cache().prefetch(buffer_size=AUTOTUNE)
+if USE_PACKED_SHARDS:
+  # Shards are already decoded and resized; reading the memmap is as cheap as a cache.
+  train_ds = train_ds.prefetch(buffer_size=AUTOTUNE)
+  val_ds = val_ds.prefetch(buffer_size=AUTOTUNE)
+else:
+  train_ds = train_ds.cache().shuffle(1000).prefetch(buffer_size=AUTOTUNE)
+  val_ds = val_ds.cache().prefetch(buffer_size=AUTOTUNE)
 
 # --- 2. CREATE THE MODEL ---
 num_classes = len(CLASS_NAMES)
-data_augmentation = keras.Sequential([
-  layers.RandomFlip("horizontal", input_shape=(IMG_HEIGHT, IMG_WIDTH, 3)),
-  layers.RandomRotation(0.1),
-  layers.RandomZoom(0.1),
-])
-
-base_model = tf.keras.applications.MobileNetV2(
-    input_shape=(IMG_HEIGHT, IMG_WIDTH, 3),
-    include_top=False,
-    weights='imagenet'
-)
-base_model.trainable = False
+if INCREMENTAL_NEW_CLASSES:
+  # Warm start: reuse the trained model and only widen its classifier head.
+  old_model = keras.models.load_model(MODEL_PATH)
+  model = widen_classifier(old_model, num_classes - len(old_class_names))
+  optimizer = keras.optimizers.Adam(learning_rate=INCREMENTAL_LEARNING_RATE)
+  epochs = INCREMENTAL_EPOCHS
+else:
+  data_augmentation = keras.Sequential([
+    layers.RandomFlip("horizontal", input_shape=(IMG_HEIGHT, IMG_WIDTH, 3)),
+    layers.RandomRotation(0.1),
+    layers.RandomZoom(0.1),
+  ])
+
+  base_model = tf.keras.applications.MobileNetV2(
+      input_shape=(IMG_HEIGHT, IMG_WIDTH, 3),
+      include_top=False,
+      weights='imagenet'
+  )
+  base_model.trainable = False
 
-model = Sequential([
-  data_augmentation,
-  tf.keras.layers.Rescaling(1./255),
-  base_model,
-  layers.GlobalAveragePooling2D(),
-  layers.Dropout(0.2),
-  layers.Dense(num_classes)
-])
+  model = Sequential([
+    data_augmentation,
+    tf.keras.layers.Rescaling(1./255),
+    base_model,
+    layers.GlobalAveragePooling2D(),
+    layers.Dropout(0.2),
+    layers.Dense(num_classes)
+  ])
+  optimizer = 'adam'
+  epochs = EPOCHS
 
 # --- 3. COMPILE THE MODEL ---
-model.compile(optimizer='adam',
+model.compile(optimizer=optimizer,
               loss=tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True),
               metrics=['accuracy'])
 model.summary()
 
 # --- 4. TRAIN THE MODEL ---
 print("\n--- STARTING TRAINING ---")
+cold_start_timer = ColdStartTimer()
+train_start = time.perf_counter()
 history = model.fit(
   train_ds,
   validation_data=val_ds,
-  epochs=EPOCHS
+  epochs=epochs,
+  callbacks=[cold_start_timer]
 )
+train_seconds = time.perf_counter() - train_start
 print("--- TRAINING COMPLETE ---\n")
+log_run(dataset_label, epochs, cold_start_timer.cold_start_seconds, train_seconds, history.history['val_accuracy'][-1])
 
 # --- 5. SAVE THE MODEL ---
-model.save('my_object_model.h5')
-print("Model saved as my_object_model.h5")
+model.save(MODEL_PATH)
+# object_recognizer.py reads the class order from this file, so indices always match.
+with open(class_names_path(MODEL_PATH), "w") as class_file:
+  json.dump(CLASS_NAMES, class_file)
+print(f"Model saved as {MODEL_PATH} with classes {CLASS_NAMES}")
 
 # --- 6. VISUALIZE RESULTS ---
 acc = history.history['accuracy']
-val_acc = history.history['validation_accuracy']
+val_acc = history.history['val_accuracy']
 loss = history.history['loss']
-val_loss = history.history['validation_loss']
-epochs_range = range(EPOCHS)
+val_loss = history.history['val_loss']
+epochs_range = range(epochs)
 
 plt.figure(figsize=(8, 8))
 plt.subplot(1, 2, 1)